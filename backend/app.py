@@ -1,30 +1,86 @@
+import logging
 import os
-print("PATH at Flask startup:", os.environ["PATH"])
-try:
-    import mediapipe as mp
-    print("mediapipe imported successfully at Flask startup!")
-except Exception as e:
-    print("mediapipe import failed at Flask startup:", e)
-from flask import Flask, render_template, request, redirect, url_for, flash, session, make_response, jsonify
+from time import perf_counter
+_import_started = perf_counter()
+from flask import Flask, render_template, request, redirect, url_for, flash, session, make_response, jsonify, Response
 import requests
-import io
-import csv
-from ml import ml_utils
+import json
+import shutil
+import tempfile
+import zipfile
+import db
+import exports
+import logs
+from cache import TTLCache
+from ml import artifacts, forecasts, model_registry
+from utils import attendance, face_mesh_pool, image_io, lazy
+from utils.lazy import lazy_import
 from forms import LoginForm
-import sqlite3
+import jobs
+import migrations
+import pagination
+import stats
 import os
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+try:
+    # Optional: the streaming kiosk check-in needs WebSocket support
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
+
+# Heavy ML/CV modules are imported on first use rather than by every worker at startup
+enrollment = lazy_import('utils.enrollment')
+face_index = lazy_import('utils.face_index')
+face_templates = lazy_import('utils.face_templates')
+kiosk = lazy_import('utils.kiosk')
+ml_utils = lazy_import('ml.ml_utils')
+training = lazy_import('ml.training')
+
+log = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key'  # Change this in production
-DATABASE = os.path.join(os.path.dirname(__file__), 'events.db')
+app.config['MAX_CONTENT_LENGTH'] = image_io.MAX_UPLOAD_BYTES
+# EVENTS_DB points the app (and its migrations, jobs and ML modules) at another database file
+DATABASE = os.environ.get('EVENTS_DB') or os.path.join(os.path.dirname(__file__), 'events.db')
 
 # --- Flask-Login Setup ---
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+migrations.migrate(DATABASE)
+db_pool = db.ConnectionPool(DATABASE)
+db.init_app(app)
+logs.init_app(app)
+sock = Sock(app) if Sock else None
+jobs.DB_PATH = DATABASE
+forecasts.DB_PATH = DATABASE
+artifacts.DB_PATH = DATABASE
+jobs.init_db()
+artifacts.init_db()
+
+def preload():
+    """Import the heavy ML/CV modules now instead of on the first request that needs them."""
+    lazy.preload()
+    for module in (ml_utils, training, face_templates, face_index, enrollment, kiosk):
+        lazy.load(module)
+
+# PRELOAD_MODULES=1 trades a slower start for no first-request import cost; with gunicorn
+# --preload the imports happen once in the master and are shared by every worker
+if os.environ.get('PRELOAD_MODULES') == '1':
+    preload()
+# FACE_MESH_WARMUP=1 also loads the FaceMesh model in each worker before the first photo arrives
+if os.environ.get('FACE_MESH_WARMUP') == '1':
+    face_mesh_pool.warm_up_in_background()
+
+# Users loaded for each authenticated request, keyed by id. Entries are dropped when an admin
+# changes or deletes the user; the TTL bounds staleness for changes made in other workers.
+USER_CACHE_TTL = 60
+user_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=1024)
+
 class User(UserMixin):
     @staticmethod
     def get_by_email(email):
@@ -49,26 +105,71 @@ class User(UserMixin):
 
     @staticmethod
     def get(user_id):
-        """Load user by user_id from the database."""
-        conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-        conn.close()
+        """Load user by user_id, from the user cache or the database."""
+        user = user_cache.get_or_set(str(user_id), lambda: User._fetch(user_id))
         if user:
-            if not isinstance(user, dict):
-                user = dict(user)
             return User(user['id'], user['email'], user['password_hash'], user.get('is_admin', 0))
         return None
 
+    @staticmethod
+    def _fetch(user_id):
+        conn = get_db_connection()
+        user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+        conn.close()
+        return dict(user) if user else None
+
 @login_manager.user_loader
 def load_user(user_id):
     """Flask-Login user loader callback."""
     return User.get(user_id)
 
 def get_db_connection():
-    """Create and return a new database connection (rows as dicts)."""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Check out a pooled database connection (rows as dicts); close() returns it to the pool."""
+    return db_pool.connect()
+
+def events_changed(*event_ids):
+    """
+    Invalidate everything derived from the events table after a write to event_ids (none
+    for a new event, which has no forecast yet). Only those events are re-forecast.
+    """
+    model_registry.mark_stale()
+    stats.invalidate()
+    if event_ids:
+        conn = get_db_connection()
+        forecasts.invalidate(conn, *event_ids)
+        conn.commit()
+        conn.close()
+    forecasts.request_refresh()
+
+def attendees_changed(event_id):
+    """Drop an event's forecast after its attendee list changes, and queue its recomputation."""
+    conn = get_db_connection()
+    forecasts.invalidate(conn, event_id)
+    conn.commit()
+    conn.close()
+    forecasts.request_refresh()
+
+@app.errorhandler(face_mesh_pool.DetectorBusy)
+def face_detector_busy(e):
+    flash(str(e))
+    return redirect(request.url)
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = (request.max_content_length or image_io.MAX_UPLOAD_BYTES) // (1024 * 1024)
+    if request.path.startswith('/api/'):
+        return jsonify({'error': f'Upload is too large (limit {limit_mb} MB).'}), 413
+    flash(f'Upload is too large (limit {limit_mb} MB).')
+    return redirect(request.referrer or url_for('dashboard'))
+
+def page_links(next_cursor):
+    """URLs for the next and first page of the current listing, keeping its other query arguments."""
+    args = request.args.to_dict()
+    cursor = args.pop('cursor', None)
+    return {
+        'next_url': url_for(request.endpoint, **args, cursor=next_cursor) if next_cursor else None,
+        'first_url': url_for(request.endpoint, **args) if cursor else None,
+    }
 
 @app.route('/')
 @login_required
@@ -77,30 +178,24 @@ def dashboard():
         return redirect(url_for('admin_dashboard'))
 
     conn = get_db_connection()
-    stats = {
-        'upcoming': conn.execute("SELECT COUNT(*) FROM events WHERE status = 'Upcoming'").fetchone()[0],
-        'today': conn.execute("SELECT COUNT(*) FROM events WHERE date = date('now')").fetchone()[0],
-        'completed': conn.execute("SELECT COUNT(*) FROM events WHERE status = 'Completed'").fetchone()[0],
-        'total': conn.execute("SELECT COUNT(*) FROM events").fetchone()[0],
-        'cancelled': conn.execute("SELECT COUNT(*) FROM events WHERE status = 'Cancelled'").fetchone()[0]
-    }
+    event_stats = stats.event_stats(conn)
     q = request.args.get('q', '').strip()
     date = request.args.get('date', '').strip()
     location = request.args.get('location', '').strip()
     status = request.args.get('status', '').strip()
-    query = 'SELECT * FROM events WHERE 1=1'
+    filters = ''
     params = []
     if q:
-        query += ' AND LOWER(title) LIKE ?'
+        filters += ' AND LOWER(title) LIKE ?'
         params.append(f'%{q.lower()}%')
     if date:
-        query += ' AND date = ?'
+        filters += ' AND date = ?'
         params.append(date)
     if location:
-        query += ' AND LOWER(location) LIKE ?'
+        filters += ' AND LOWER(location) LIKE ?'
         params.append(f'%{location.lower()}%')
     if status:
-        query += ' AND status = ?'
+        filters += ' AND status = ?'
         params.append(status)
     sort_by = request.args.get('sort_by', 'date')
     sort_order = request.args.get('sort_order', 'asc')
@@ -110,21 +205,16 @@ def dashboard():
         sort_by = 'date'
     if sort_order not in valid_sort_order:
         sort_order = 'asc'
-    query += f' ORDER BY {sort_by} {sort_order.upper()}'
-    events = conn.execute(query, params).fetchall()
-    results_count = len(events)
-    print(f"[DEBUG] Dashboard fetched {results_count} events with query: {query} and params: {params}")
-    if results_count > 0:
-        print(f"[DEBUG] First event object: {events[0]}")
-        print(f"[DEBUG] First event keys: {list(events[0].keys())}")
-    from collections import Counter
-    # Compute status counts for chart
-    status_counts = Counter(event['status'] for event in events)
-    # Ensure all expected keys exist
-    for key in ['Upcoming', 'In Progress', 'Completed', 'Cancelled']:
-        status_counts.setdefault(key, 0)
+    events, next_cursor = pagination.keyset_page(
+        conn, 'SELECT * FROM events WHERE 1=1' + filters, params, sort_by, sort_order,
+        cursor=request.args.get('cursor'), limit=pagination.page_size(request.args.get('per_page')))
+    # Status counts for the chart and the result total cover every matching event, not just this page
+    status_counts = {key: 0 for key in ['Upcoming', 'In Progress', 'Completed', 'Cancelled']}
+    for row in conn.execute('SELECT status, COUNT(*) AS n FROM events WHERE 1=1' + filters + ' GROUP BY status', params):
+        status_counts[row['status']] = row['n']
+    results_count = sum(status_counts.values())
     conn.close()
-    return render_template('dashboard.html', stats=stats, events=events, request=request, results_count=results_count, status_counts=status_counts)
+    return render_template('dashboard.html', stats=event_stats, events=events, request=request, results_count=results_count, status_counts=status_counts, pagination=page_links(next_cursor))
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -151,6 +241,7 @@ def register():
                      (username, email, password_hash))
         conn.commit()
         conn.close()
+        stats.invalidate()
         flash('Registration successful! Please log in.')
         return redirect(url_for('login'))
     return render_template('register.html')
@@ -185,6 +276,7 @@ def admin_register():
                      (username, email, password_hash))
         conn.commit()
         conn.close()
+        stats.invalidate()
         flash('Admin account created! Please log in.')
         return redirect(url_for('login'))
     return render_template('admin_register.html')
@@ -209,9 +301,8 @@ def login():
             else:
                 flash('Invalid email or password!')
         return render_template('login.html', admin_exists=admin_exists, form=form)
-    except Exception as e:
-        import traceback
-        print(traceback.format_exc())
+    except Exception:
+        log.exception('Login failed')
         flash('An error occurred during login.')
         return render_template('login.html', admin_exists=True, form=form)
 
@@ -289,6 +380,7 @@ def add_event():
                      (title, date, time, location, 'Pending Approval', description, attendance, current_user.id))
         conn.commit()
         conn.close()
+        events_changed()
         flash('Event added successfully! Notification: New event created.')
         return redirect(url_for('dashboard'))
     return render_template('add_event.html')
@@ -319,6 +411,7 @@ def edit_event(event_id):
         conn.execute('UPDATE events SET status = ? WHERE id = ?', ('Upcoming', event_id))
         conn.commit()
         conn.close()
+        events_changed(event_id)
         flash('Event approved and set to Upcoming!')
         return redirect(url_for('edit_event', event_id=event_id))
         flash('Event approved!')
@@ -379,59 +472,41 @@ def edit_event(event_id):
                      (title, date, time, location, status, description, attendance, event_id))
         conn.commit()
         conn.close()
+        events_changed(event_id)
         flash(f"Event updated! Notification: Status is now '{status}'.")
         return redirect(url_for('dashboard'))
-    # ML prediction logic
-    model, feature_columns = ml_utils.train_attendance_model()
-    if model is not None and feature_columns is not None:
-        event_features = {
-            'date': event['date'],
-            'location': event['location'],
-            'status': event['status']
-        }
-        prediction = ml_utils.predict_attendance(event_features, model, feature_columns)
+    # Precomputed by the forecast refresher; queue one if this event has not been forecast yet
+    forecast = forecasts.get(conn, event_id)
     conn.close()
+    if forecast:
+        prediction = forecast['predicted_attendance']
+    else:
+        forecasts.request_refresh()
     from datetime import datetime
     now = datetime.now()
-    return render_template('edit_event.html', event=event, attendees=attendees, prediction=prediction, now=now, creator_email=creator_email)
+    return render_template('edit_event.html', event=event, attendees=attendees, prediction=prediction, now=now, creator_email=creator_email,
+                           forecast_pending=forecast is None)
 
 @app.route('/edit/<int:event_id>/add_attendee', methods=['POST'])
 @login_required
 def add_attendee(event_id):
-    import mediapipe as mp
-    import cv2
-    import numpy as np
-    import tempfile
-    import base64
-    import json
     name = request.form['name']
     email = request.form['email']
     role = request.form['role']
-    file = request.files.get('photo')
-    img = None
-    if not file or file.filename == '':
-        webcam_photo = request.form.get('webcam_photo')
-        if webcam_photo and webcam_photo.startswith('data:image'):
-            header, encoded = webcam_photo.split(',', 1)
-            img_bytes = base64.b64decode(encoded)
-            img_array = np.frombuffer(img_bytes, np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-    else:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp:
-            file.save(temp.name)
-            img = cv2.imread(temp.name)
-    face_landmarks = None
+    img = image_io.read_photo(request.files, request.form)
+    face_encoding = None
     if img is not None:
-        mp_face = mp.solutions.face_mesh
-        with mp_face.FaceMesh(static_image_mode=True, max_num_faces=1) as face_mesh:
-            results = face_mesh.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-            if results.multi_face_landmarks:
-                face_landmarks = json.dumps([[lm.x, lm.y, lm.z] for lm in results.multi_face_landmarks[0].landmark])
+        template = face_mesh_pool.detect_landmarks(img)
+        if template is not None:
+            face_encoding = face_templates.encode(template)
     conn = get_db_connection()
-    conn.execute("INSERT INTO attendees (event_id, name, email, status, role, previous_attendance_rate, face_landmarks) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                 (event_id, name, email, 'Registered', role, 0.0, face_landmarks))
+    attendee_id = conn.execute("INSERT INTO attendees (event_id, name, email, status, role, previous_attendance_rate, face_encoding) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (event_id, name, email, 'Registered', role, 0.0, face_encoding)).lastrowid
     conn.commit()
     conn.close()
+    if face_encoding:
+        face_index.update(event_id, attendee_id, face_templates.decode(face_encoding))
+    attendees_changed(event_id)
     flash('Attendee added!')
     return redirect(url_for('edit_event', event_id=event_id))
 
@@ -445,6 +520,7 @@ def edit_attendee(event_id, attendee_id):
     conn.execute("UPDATE attendees SET name=?, email=?, role=? WHERE id=?", (name, email, role, attendee_id))
     conn.commit()
     conn.close()
+    attendees_changed(event_id)
     flash('Attendee updated!')
     return redirect(url_for('edit_event', event_id=event_id))
 
@@ -455,6 +531,8 @@ def delete_attendee(event_id, attendee_id):
     conn.execute("DELETE FROM attendees WHERE id=?", (attendee_id,))
     conn.commit()
     conn.close()
+    face_index.remove(event_id, attendee_id)
+    attendees_changed(event_id)
     flash('Attendee deleted!')
     return redirect(url_for('edit_event', event_id=event_id))
 
@@ -466,17 +544,17 @@ def face_checkin(event_id):
     # Support attendee change via query param
     if request.method == 'GET' and request.args.get('change_attendee') == '1':
         session.pop('face_checkin_attendee_id', None)
+        session.pop('face_checkin_identify', None)
+    # "Just look at the camera": identify the attendee from all of the event's references
+    if request.method == 'GET' and request.args.get('identify') == '1':
+        session.pop('face_checkin_attendee_id', None)
+        session['face_checkin_identify'] = event_id
+    identify_mode = session.get('face_checkin_identify') == event_id
     """
-    Step 1: Attendee selects their name from the list (POST or session)
-    Step 2: Only allow face check-in for the selected attendee
+    Step 1: Attendee selects their name from the list (POST or session), or identify mode is on
+    Step 2: Allow face check-in for the selected attendee, or for whoever the face matches
     """
-    import mediapipe as mp
-    import cv2
     import numpy as np
-    import tempfile
-    import base64
-    import json
-    from scipy.spatial import distance
     from flask import session
     conn = get_db_connection()
     event = conn.execute('SELECT * FROM events WHERE id = ?', (event_id,)).fetchone()
@@ -488,58 +566,100 @@ def face_checkin(event_id):
         if 'attendee_id' in request.form:
             attendee_id = int(request.form['attendee_id'])
             session['face_checkin_attendee_id'] = attendee_id
-        elif not attendee_id:
+            session.pop('face_checkin_identify', None)
+            identify_mode = False
+        elif not attendee_id and not identify_mode:
             return render_template('face_select_attendee.html', event=event, attendees=attendees)
         # Step 2: Handle face check-in for selected attendee
         if 'photo' in request.files or request.form.get('webcam_photo'):
-            file = request.files.get('photo')
-            img = None
-            if not file or file.filename == '':
-                webcam_photo = request.form.get('webcam_photo')
-                if webcam_photo and webcam_photo.startswith('data:image'):
-                    header, encoded = webcam_photo.split(',', 1)
-                    img_bytes = base64.b64decode(encoded)
-                    img_array = np.frombuffer(img_bytes, np.uint8)
-                    img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp:
-                    file.save(temp.name)
-                    img = cv2.imread(temp.name)
+            img = image_io.read_photo(request.files, request.form)
+            if img is not None and identify_mode:
+                probe = face_mesh_pool.detect_landmarks(img)
+                if probe is None:
+                    flash('No face detected in the submitted photo. Please try again.')
+                    return redirect(request.url)
+                conn = get_db_connection()
+                match = face_index.get_index(conn, event_id).identify(probe)
+                attendee = conn.execute('SELECT name FROM attendees WHERE id = ?', (match[0],)).fetchone() if match else None
+                if attendee:
+                    matched_id, dist = match
+                    conn.execute('UPDATE attendees SET status = ? WHERE id = ?', ('Checked In', matched_id))
+                    conn.commit()
+                    match_info = f"Face matched! {attendee['name']} has been checked in. (Similarity: {1-dist/face_templates.MATCH_THRESHOLD:.2f})"
+                    attendees = conn.execute('SELECT * FROM attendees WHERE event_id = ?', (event_id,)).fetchall()
+                else:
+                    match_info = 'Face did not match any registered attendee. Please try again or pick your name.'
+                conn.close()
+                return render_template('face_checkin.html', event=event, attendees=attendees, match_info=match_info, identify_mode=True)
             if img is not None and attendee_id:
-                mp_face = mp.solutions.face_mesh
-                with mp_face.FaceMesh(static_image_mode=True, max_num_faces=1) as face_mesh:
-                    results = face_mesh.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-                    if not results.multi_face_landmarks:
-                        flash('No face detected in the submitted photo. Please try again.')
-                        return redirect(request.url)
-                    input_landmarks = np.array([[lm.x, lm.y, lm.z] for lm in results.multi_face_landmarks[0].landmark])
-                    # Only compare to selected attendee
-                    conn = get_db_connection()
-                    attendee = conn.execute('SELECT * FROM attendees WHERE id = ?', (attendee_id,)).fetchone()
-                    db_landmarks = attendee['face_landmarks']
-                    match_info = ''
-                    if db_landmarks:
-                        db_landmarks_np = np.array(json.loads(db_landmarks))
-                        if db_landmarks_np.shape == input_landmarks.shape:
-                            dist = np.mean(np.linalg.norm(db_landmarks_np - input_landmarks, axis=1))
-                            if dist < 0.03:
-                                conn.execute('UPDATE attendees SET status = ? WHERE id = ?', ('Checked In', attendee_id))
-                                conn.commit()
-                                match_info = f"Face matched! {attendee['name']} has been checked in. (Similarity: {1-dist/0.03:.2f})"
-                            else:
-                                match_info = 'Face did not match the registered reference. Please try again.'
+                input_landmarks = face_mesh_pool.detect_landmarks(img)
+                if input_landmarks is None:
+                    flash('No face detected in the submitted photo. Please try again.')
+                    return redirect(request.url)
+                # Only compare to selected attendee
+                conn = get_db_connection()
+                attendee = conn.execute('SELECT * FROM attendees WHERE id = ?', (attendee_id,)).fetchone()
+                try:
+                    reference = face_templates.from_row(attendee)
+                except ValueError:
+                    reference = np.empty((0, 3), dtype=np.float32)
+                match_info = ''
+                if reference is not None:
+                    if reference.shape == input_landmarks.shape:
+                        dist = face_templates.distance(reference, input_landmarks)
+                        if dist < face_templates.MATCH_THRESHOLD:
+                            conn.execute('UPDATE attendees SET status = ? WHERE id = ?', ('Checked In', attendee_id))
+                            conn.commit()
+                            match_info = f"Face matched! {attendee['name']} has been checked in. (Similarity: {1-dist/face_templates.MATCH_THRESHOLD:.2f})"
                         else:
-                            match_info = 'Reference photo is invalid. Please contact admin.'
+                            match_info = 'Face did not match the registered reference. Please try again.'
                     else:
-                        match_info = 'No reference photo found for this attendee. Please register your reference photo.'
-                    conn.close()
-                    return render_template('face_checkin.html', event=event, attendees=attendees, match_info=match_info)
+                        match_info = 'Reference photo is invalid. Please contact admin.'
+                else:
+                    match_info = 'No reference photo found for this attendee. Please register your reference photo.'
+                conn.close()
+                return render_template('face_checkin.html', event=event, attendees=attendees, match_info=match_info)
         # If not a photo POST, show check-in form
-        return render_template('face_checkin.html', event=event, attendees=attendees)
+        return render_template('face_checkin.html', event=event, attendees=attendees, identify_mode=identify_mode)
     # GET: If attendee_id not set, show selection form
-    if not attendee_id:
+    if not attendee_id and not identify_mode:
         return render_template('face_select_attendee.html', event=event, attendees=attendees)
-    return render_template('face_checkin.html', event=event, attendees=attendees)
+    return render_template('face_checkin.html', event=event, attendees=attendees, identify_mode=identify_mode)
+
+@app.route('/kiosk/<int:event_id>')
+@login_required
+def kiosk_checkin(event_id):
+    """Hands-free check-in page that streams camera frames over a WebSocket."""
+    conn = get_db_connection()
+    event = conn.execute('SELECT * FROM events WHERE id = ?', (event_id,)).fetchone()
+    conn.close()
+    if not event:
+        flash('Event not found.')
+        return redirect(url_for('dashboard'))
+    return render_template('kiosk.html', event=event, streaming_available=sock is not None)
+
+if sock:
+    @app.before_request
+    def reject_cross_origin_websockets():
+        # Refuse the handshake itself, before flask_sock upgrades the connection
+        if request.path.startswith('/ws/') and not kiosk.same_origin(request.headers.get('Origin'), request.host_url):
+            return jsonify({'error': 'Cross-origin WebSocket request refused'}), 403
+
+    @sock.route('/ws/kiosk/<int:event_id>')
+    def kiosk_stream(ws, event_id):
+        if not current_user.is_authenticated:
+            ws.close(reason=1008, message='Login required')
+            return
+
+        def receive():
+            try:
+                return ws.receive()
+            except ConnectionClosed:
+                return None
+
+        # Check-ins from every kiosk connection in this worker share one batched writer
+        writer = attendance.get_writer(DATABASE, prepare=False)
+        kiosk.run_session(receive, ws.send, lambda frame: kiosk.check_in_frame(get_db_connection, event_id, frame, writer))
 
 @app.route('/predict_attendance/<int:event_id>')
 @login_required
@@ -547,25 +667,23 @@ def predict_attendance_page(event_id):
 
     conn = get_db_connection()
     event = conn.execute('SELECT * FROM events WHERE id = ?', (event_id,)).fetchone()
+    forecast = forecasts.get(conn, event_id)
     conn.close()
-    model, feature_columns = ml_utils.train_attendance_model()
-    prediction = None
-    if model is not None and feature_columns is not None:
-        event_features = {
-            'date': event['date'],
-            'location': event['location'],
-            'status': event['status']
-        }
-        prediction = ml_utils.predict_attendance(event_features, model, feature_columns)
-    return render_template('predict_attendance.html', event=event, prediction=prediction)
+    if forecast is None:
+        forecasts.request_refresh()
+    prediction = forecast['predicted_attendance'] if forecast else None
+    return render_template('predict_attendance.html', event=event, prediction=prediction, forecast_pending=forecast is None)
 
 @app.route('/delete/<int:event_id>', methods=['POST'])
 @login_required
 def delete_event(event_id):
     conn = get_db_connection()
     conn.execute('DELETE FROM events WHERE id = ?', (event_id,))
+    forecasts.invalidate(conn, event_id)
     conn.commit()
     conn.close()
+    face_index.drop(event_id)
+    events_changed()
     flash('Event deleted successfully!')
     return redirect(url_for('dashboard'))
 
@@ -576,6 +694,7 @@ def cancel_event(event_id):
     conn.execute("UPDATE events SET status = 'Cancelled' WHERE id = ?", (event_id,))
     conn.commit()
     conn.close()
+    events_changed(event_id)
     flash('Event cancelled! Notification: Event status set to Cancelled.')
     return redirect(url_for('dashboard'))
 
@@ -602,46 +721,45 @@ def admin_view_attendees():
     conn.close()
     return render_template('admin_attendees.html', attendees=attendees)
 
+# Attendee columns included in CSV exports (face data is left out)
+EXPORT_ATTENDEE_COLUMNS = ('id', 'event_id', 'name', 'email', 'status', 'role', 'previous_attendance_rate', 'timestamp')
+
+@app.route('/event/<int:event_id>/attendees/export')
+@login_required
+def export_attendees(event_id):
+    conn = get_db_connection()
+    if not conn.execute('SELECT 1 FROM events WHERE id = ?', (event_id,)).fetchone():
+        conn.close()
+        return 'Event not found', 404
+    rows = exports.iter_query(conn, f"SELECT {', '.join(EXPORT_ATTENDEE_COLUMNS)} FROM attendees WHERE event_id = ? ORDER BY id", (event_id,))
+    return exports.csv_response(f'attendees_event_{event_id}.csv', EXPORT_ATTENDEE_COLUMNS, rows,
+                                compress=exports.wants_gzip(request.args))
+
+@app.route('/admin/attendees/export')
+@login_required
+def admin_export_attendees():
+    if not hasattr(current_user, 'is_admin') or not current_user.is_admin:
+        flash('Access denied: Admins only!')
+        return redirect(url_for('dashboard'))
+    rows = exports.iter_query(get_db_connection(), f"SELECT {', '.join(EXPORT_ATTENDEE_COLUMNS)} FROM attendees ORDER BY event_id, id")
+    return exports.csv_response('attendees.csv', EXPORT_ATTENDEE_COLUMNS, rows, compress=exports.wants_gzip(request.args))
+
 @app.route('/attendees/<int:attendee_id>/update_photo', methods=['GET', 'POST'])
 @login_required
 def update_attendee_photo(attendee_id):
-    import mediapipe as mp
-    import cv2
-    import numpy as np
-    import tempfile
-    import base64
-    import json
     conn = get_db_connection()
     attendee = conn.execute('SELECT * FROM attendees WHERE id = ?', (attendee_id,)).fetchone()
     if request.method == 'POST':
-        file = request.files.get('photo')
-        face_landmarks = None
-        img = None
-        if not file or file.filename == '':
-            webcam_photo = request.form.get('webcam_photo')
-            if webcam_photo:
-                header, encoded = webcam_photo.split(',', 1)
-                img_bytes = base64.b64decode(encoded)
-                np_arr = np.frombuffer(img_bytes, np.uint8)
-                img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-        else:
-            temp = tempfile.NamedTemporaryFile(delete=False)
-            file.save(temp.name)
-            img = cv2.imread(temp.name)
-            temp.close()
+        img = image_io.read_photo(request.files, request.form)
         if img is not None:
-            mp_face_mesh = mp.solutions.face_mesh
-            with mp_face_mesh.FaceMesh(static_image_mode=True, max_num_faces=1) as face_mesh:
-                results = face_mesh.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-                if results.multi_face_landmarks:
-                    face_landmarks = json.dumps([
-                        [lm.x, lm.y, lm.z] for lm in results.multi_face_landmarks[0].landmark
-                    ])
-                else:
-                    flash('No face detected in the provided photo. Please try again.')
-                    return redirect(request.url)
-            conn.execute('UPDATE attendees SET face_landmarks = ? WHERE id = ?', (face_landmarks, attendee_id))
+            template = face_mesh_pool.detect_landmarks(img)
+            if template is None:
+                flash('No face detected in the provided photo. Please try again.')
+                return redirect(request.url)
+            face_encoding = face_templates.encode(template)
+            conn.execute('UPDATE attendees SET face_encoding = ?, face_landmarks = NULL WHERE id = ?', (face_encoding, attendee_id))
             conn.commit()
+            face_index.update(attendee['event_id'], attendee_id, face_templates.decode(face_encoding))
             flash('Reference photo updated successfully!')
             event_id = attendee['event_id']
             conn.close()
@@ -649,6 +767,42 @@ def update_attendee_photo(attendee_id):
     conn.close()
     return render_template('update_attendee_photo.html', attendee=attendee)
 
+@app.route('/api/events/<int:event_id>/enroll_photos', methods=['POST'])
+@login_required
+def enroll_photos(event_id):
+    """
+    Bulk-enroll reference photos for an event's attendees. Accepts a ZIP as 'archive' and/or
+    files as 'photos', each named after the attendee's id or email. The photos are enrolled
+    by a background job; poll status_url for its per-photo report.
+    """
+    request.max_content_length = enrollment.MAX_BATCH_BYTES
+    conn = get_db_connection()
+    event = conn.execute('SELECT 1 FROM events WHERE id = ?', (event_id,)).fetchone()
+    conn.close()
+    if not event:
+        return jsonify({'error': 'Event not found'}), 404
+    batch_dir = tempfile.mkdtemp(prefix='enroll-')
+    try:
+        saved = enrollment.save_batch(request.files, batch_dir)
+    except zipfile.BadZipFile:
+        saved = None
+    if not saved:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        if saved is None:
+            return jsonify({'error': 'archive is not a valid ZIP file'}), 400
+        return jsonify({'error': "No photos found. Send a ZIP as 'archive' or images as 'photos'."}), 400
+    job_id = jobs.submit(enrollment.JOB_KIND, enrollment.enroll_saved_batch, get_db_connection, event_id, batch_dir)
+    return jsonify({'job_id': job_id, 'status_url': url_for('enroll_photos_status', job_id=job_id)}), 202
+
+@app.route('/api/enroll_photos/<job_id>')
+@login_required
+def enroll_photos_status(job_id):
+    """Status of a bulk enrollment job; once finished, its result is the per-photo report."""
+    job = jobs.get_job(job_id)
+    if not job or job['kind'] != enrollment.JOB_KIND:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
 @app.route('/calendar')
 def calendar_view():
     return render_template('calendar.html')
@@ -672,8 +826,19 @@ def api_upcoming_events():
 
 @app.route('/api/events')
 def api_events():
+    # FullCalendar passes the visible range as ISO timestamps; only the date part matters here
+    start = request.args.get('start', '')[:10]
+    end = request.args.get('end', '')[:10]
+    query = 'SELECT id, title, date FROM events WHERE 1=1'
+    params = []
+    if start:
+        query += ' AND date >= ?'
+        params.append(start)
+    if end:
+        query += ' AND date < ?'
+        params.append(end)
     conn = get_db_connection()
-    events = conn.execute('SELECT * FROM events').fetchall()
+    events = conn.execute(query, params).fetchall()
     conn.close()
     # Convert events to FullCalendar format
     event_list = []
@@ -696,30 +861,46 @@ def admin_dashboard():
     today = datetime.date.today().isoformat()
     conn = get_db_connection()
     # Auto-complete events whose date has passed
-    conn.execute("UPDATE events SET status = 'Completed' WHERE (status = 'Upcoming' OR status = 'In Progress') AND date <= ?", (today,))
+    completed = [row['id'] for row in conn.execute(
+        "SELECT id FROM events WHERE (status = 'Upcoming' OR status = 'In Progress') AND date <= ?", (today,))]
+    conn.executemany("UPDATE events SET status = 'Completed' WHERE id = ?", [(event_id,) for event_id in completed])
     conn.commit()
+    if completed:
+        events_changed(*completed)
     users = conn.execute('SELECT id, email, is_admin FROM users').fetchall()
-    events = conn.execute('SELECT * FROM events').fetchall()
+    events, next_cursor = pagination.keyset_page(
+        conn, 'SELECT * FROM events WHERE 1=1', [], 'date',
+        cursor=request.args.get('cursor'), limit=pagination.page_size(request.args.get('per_page')))
     # Calculate dashboard stats
-    stats = {
-        'total_events': conn.execute('SELECT COUNT(*) FROM events').fetchone()[0],
-        'upcoming_events': conn.execute("SELECT COUNT(*) FROM events WHERE status = 'Upcoming'").fetchone()[0],
-        'completed_events': conn.execute("SELECT COUNT(*) FROM events WHERE status = 'Completed'").fetchone()[0],
-        'cancelled_events': conn.execute("SELECT COUNT(*) FROM events WHERE status = 'Cancelled'").fetchone()[0],
-        'pending_approval_events': conn.execute("SELECT COUNT(*) FROM events WHERE status = 'Pending Approval'").fetchone()[0],
-        'total_users': conn.execute('SELECT COUNT(*) FROM users').fetchone()[0],
+    event_stats = stats.event_stats(conn)
+    admin_stats = {
+        'total_events': event_stats['total'],
+        'upcoming_events': event_stats['upcoming'],
+        'completed_events': event_stats['completed'],
+        'cancelled_events': event_stats['cancelled'],
+        'pending_approval_events': event_stats['pending_approval'],
+        'total_users': event_stats['total_users'],
     }
     conn.close()
-    model_accuracy = session.get('model_accuracy')
-    model_metrics = session.get('model_metrics')
-    cm_img = session.get('cm_img')
-    roc_img = session.get('roc_img')
+    # Evaluation artefacts of the latest trained model; plots are served by /ml_vis
+    for key in ('model_accuracy', 'model_metrics', 'cm_img', 'roc_img'):
+        if key in session:
+            session.pop(key)  # left over in cookies from before artefacts were stored server-side
+    model_version = artifacts.latest_version()
+    evaluation = artifacts.load_json(model_version, 'metrics') if model_version else None
+    model_accuracy = f"{evaluation['accuracy']:.2%}" if evaluation else None
+    model_metrics = evaluation['report'] if evaluation else None
+    model_plots = artifacts.names(model_version) if model_version else []
+    # A retrain still in progress, so the dashboard can poll for it
+    active_job = jobs.get_job(request.args['job_id']) if request.args.get('job_id') else jobs.latest_job('retrain_model')
+    if active_job and active_job['status'] not in ('queued', 'running'):
+        active_job = None
     # Load ML model and feature importances
-    model, feature_columns = ml_utils.train_attendance_model()
+    model, feature_columns = model_registry.get_model()
     feature_importances = []
     if model is not None and feature_columns is not None:
         feature_importances = ml_utils.get_feature_importances(model, feature_columns)
-    return render_template('admin_dashboard.html', users=users, events=events, stats=stats, model_accuracy=model_accuracy, model_metrics=model_metrics, cm_img=cm_img, roc_img=roc_img, feature_importances=feature_importances)
+    return render_template('admin_dashboard.html', users=users, events=events, stats=admin_stats, model_accuracy=model_accuracy, model_metrics=model_metrics, model_version=model_version, model_plots=model_plots, feature_importances=feature_importances, active_job=active_job, pagination=page_links(next_cursor))
 
 @app.route('/admin/user_action', methods=['POST'])
 @login_required
@@ -744,8 +925,26 @@ def admin_user_action():
         flash('User deleted.')
     conn.commit()
     conn.close()
+    user_cache.invalidate(str(user_id))
+    stats.invalidate()
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/admin/cache_stats')
+@login_required
+def admin_cache_stats():
+    if not hasattr(current_user, 'is_admin') or not current_user.is_admin:
+        return jsonify({'error': 'Admins only'}), 403
+    # Counters are per worker process
+    return jsonify({'pid': os.getpid(), 'users': user_cache.stats(), 'event_stats': stats.cache_stats()})
+
+@app.route('/admin/startup_report')
+@login_required
+def admin_startup_report():
+    if not hasattr(current_user, 'is_admin') or not current_user.is_admin:
+        return jsonify({'error': 'Admins only'}), 403
+    # Per worker process: how long importing the app took, and what each deferred import cost when it happened
+    return jsonify({'pid': os.getpid(), 'startup_seconds': round(STARTUP_SECONDS, 3), 'lazy_imports': lazy.import_report()})
+
 @app.route('/chatbot', methods=['POST'])
 def chatbot():
     user_message = request.json.get('message', '').lower()
@@ -782,6 +981,7 @@ def admin_event_action():
     conn = get_db_connection()
     if action == 'delete':
         conn.execute('DELETE FROM events WHERE id = ?', (event_id,))
+        forecasts.invalidate(conn, event_id)
         flash('Event deleted.')
     elif action == 'cancel':
         conn.execute("UPDATE events SET status = 'Cancelled' WHERE id = ?", (event_id,))
@@ -793,33 +993,35 @@ def admin_event_action():
         flash('Unknown action.')
     conn.commit()
     conn.close()
+    if action in ('delete', 'cancel', 'approve'):
+        events_changed(event_id)
+    if action == 'delete' and event_id.isdigit():
+        face_index.drop(int(event_id))
     return redirect(url_for('admin_dashboard'))
 
 @app.route('/retrain_model', methods=['POST'])
 @login_required
 def retrain_model():
-    flash('Retrain route called (debug).')
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import confusion_matrix, roc_curve, auc
-    X, y = ml_utils.extract_ml_data()
-    if X.shape[0] < 10:
-        flash('Not enough data to train model. Add more attendee/event records.')
-        return redirect(url_for('admin_dashboard'))
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    acc, report = ml_utils.train_and_evaluate_model(X_train, y_train, X_test, y_test)
-    # Save confusion matrix and ROC curve as base64
-    y_pred = ml_utils.load_model().predict(X_test)
-    y_score = getattr(ml_utils.load_model(), "predict_proba", lambda x: None)(X_test)
-    cm_img = ml_visuals.plot_confusion_matrix(y_test, y_pred, labels=[0,1])
-    roc_img = None
-    if y_score is not None:
-        roc_img = ml_visuals.plot_roc_curve(y_test, y_score[:,1])
-    session['model_accuracy'] = f'{acc:.2%}'
-    session['model_metrics'] = report
-    session['cm_img'] = cm_img
-    session['roc_img'] = roc_img
-    flash(f'Model retrained on real data. Accuracy: {acc:.2%}')
-    return redirect(url_for('admin_dashboard'))
+    if not hasattr(current_user, 'is_admin') or not current_user.is_admin:
+        flash('Access denied: Admins only!')
+        return redirect(url_for('dashboard'))
+    job_id = jobs.submit('retrain_model', training.retrain_models)
+    # Jobs run one at a time in order, so this re-forecasts every event with the new models
+    jobs.submit(forecasts.JOB_KIND, forecasts.refresh, full=True)  # new models: re-forecast every event
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}), 202
+    flash('Model retraining started. Metrics will update when it finishes.')
+    return redirect(url_for('admin_dashboard', job_id=job_id))
+
+@app.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    if not hasattr(current_user, 'is_admin') or not current_user.is_admin:
+        return jsonify({'error': 'Admins only'}), 403
+    job = jobs.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
 
 @app.route('/predict_attendance', methods=['POST'])
 @login_required
@@ -827,32 +1029,96 @@ def predict_attendance():
     event_id = request.form.get('event_id')
     if not event_id:
         return jsonify({'error':'Missing event_id'}), 400
-    preds = ml_utils.predict_attendance_for_event(event_id)
-    # Fetch attendee names
     conn = get_db_connection()
+    forecast = forecasts.get(conn, event_id)
     attendees = conn.execute('SELECT id, name FROM attendees WHERE event_id = ?', (event_id,)).fetchall()
     conn.close()
+    if forecast and forecast['attendee_probabilities'] is not None:
+        # Same decision the classifier's predict() makes: present when P(present) > 0.5
+        preds = [(att_id, int(p > 0.5)) for att_id, p in forecast['attendee_probabilities'].items()]
+    else:
+        forecasts.request_refresh()
+        try:
+            preds = ml_utils.predict_attendance_for_event(event_id)
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
     id_to_name = {a['id']: a['name'] for a in attendees}
     pred_table = [(id_to_name.get(att_id, att_id), 'Present' if status==1 else 'Absent') for att_id, status in preds]
     return jsonify({'predictions': pred_table})
 
+MAX_BATCH_EVENTS = 1000  # event ids per batch prediction request
+
+@app.route('/api/predict_attendance', methods=['POST'])
+@login_required
+def predict_attendance_batch():
+    """
+    Attendee-level predictions for many events in one request, streamed as NDJSON: one line
+    per event with its expected attendance and every attendee's probability of being present.
+    JSON body: {"event_ids": [1, 2, ...]} or {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"}
+    (end exclusive; either bound may be left out). Lines come in event id order; requested
+    ids that do not exist get an error line at the end.
+    """
+    import datetime
+    body = request.get_json(silent=True) or {}
+    event_ids = body.get('event_ids')
+    if event_ids is not None:
+        if not isinstance(event_ids, list) or not all(type(i) is int for i in event_ids):
+            return jsonify({'error': 'event_ids must be a list of integers'}), 400
+        if not event_ids or len(event_ids) > MAX_BATCH_EVENTS:
+            return jsonify({'error': f'Send between 1 and {MAX_BATCH_EVENTS} event_ids'}), 400
+        condition = f"e.id IN ({', '.join('?' * len(event_ids))})"
+        params = list(event_ids)
+    elif body.get('start') or body.get('end'):
+        conditions, params = [], []
+        for key, op in (('start', '>='), ('end', '<')):
+            if body.get(key):
+                try:
+                    params.append(datetime.date.fromisoformat(str(body[key])).isoformat())
+                except ValueError:
+                    return jsonify({'error': f'{key} must be a date (YYYY-MM-DD)'}), 400
+                conditions.append(f'e.date {op} ?')
+        condition = ' AND '.join(conditions)
+    else:
+        return jsonify({'error': 'Send event_ids or a start/end date range'}), 400
+    model = ml_utils.load_model()
+    if model is None:
+        return jsonify({'error': 'Attendance prediction model not found. Please retrain the model first from the Admin Dashboard.'}), 409
+    conn = get_db_connection()
+    events = conn.execute(f'SELECT e.id, e.title, e.date FROM events e WHERE {condition} ORDER BY e.id', params).fetchall()
+    conn.close()
+
+    def generate():
+        # Both sequences are in event id order; events without attendees get an empty line
+        predictions = ml_utils.iter_event_predictions(model, condition, params)
+        pending = next(predictions, None)
+        for event in events:
+            line = {'event_id': event['id'], 'title': event['title'], 'date': event['date']}
+            if pending is not None and pending['event_id'] == event['id']:
+                line.update(pending)
+                pending = next(predictions, None)
+            else:
+                line.update(expected_attendance=0.0, predicted_present=0, attendees=[])
+            yield json.dumps(line) + '\n'
+        if event_ids is not None:
+            found = {event['id'] for event in events}
+            for event_id in dict.fromkeys(event_ids):
+                if event_id not in found:
+                    yield json.dumps({'event_id': event_id, 'error': 'Event not found'}) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/download_metrics')
 @login_required
 def download_metrics():
-    metrics = session.get('model_metrics')
+    model_version = request.args.get('version') or artifacts.latest_version()
+    evaluation = artifacts.load_json(model_version, 'metrics') if model_version else None
+    metrics = evaluation['report'] if evaluation else None
     if not metrics:
         return 'No metrics available', 400
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Label','Precision','Recall','F1'])
-    for label, m in metrics.items():
-        if label in ['accuracy','macro avg','weighted avg']:
-            continue
-        writer.writerow([label, m['precision'], m['recall'], m['f1-score']])
-    response = make_response(output.getvalue())
-    response.headers['Content-Disposition'] = 'attachment; filename=model_metrics.csv'
-    response.headers['Content-Type'] = 'text/csv'
-    return response
+    rows = ([label, m['precision'], m['recall'], m['f1-score']] for label, m in metrics.items()
+            if label not in ('accuracy', 'macro avg', 'weighted avg'))
+    return exports.csv_response(f'model_metrics_{model_version}.csv', ['Label', 'Precision', 'Recall', 'F1'], rows,
+                                compress=exports.wants_gzip(request.args))
 
 @app.route('/download_predictions/<int:event_id>')
 @login_required
@@ -860,37 +1126,34 @@ def download_predictions(event_id):
     if not hasattr(current_user, 'is_admin') or not current_user.is_admin:
         flash('Only admins can download predictions!')
         return redirect(url_for('dashboard'))
-    print(f"[DEBUG] download_predictions called for event_id={event_id}")
-    try:
-        preds = ml_utils.predict_attendance_for_event(event_id)
-        print(f"[DEBUG] Predictions: {preds}")
-        conn = get_db_connection()
-        attendees = conn.execute('SELECT id, name FROM attendees WHERE event_id = ?', (event_id,)).fetchall()
-        conn.close()
-        id_to_name = {a['id']: a['name'] for a in attendees}
-        print(f"[DEBUG] id_to_name mapping: {id_to_name}")
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Attendee','Predicted Status'])
-        for att_id, status in preds:
-            print(f"[DEBUG] Writing row: {att_id}, {status}")
-            writer.writerow([id_to_name.get(att_id, att_id), 'Present' if status==1 else 'Absent'])
-        response = make_response(output.getvalue())
-        response.headers['Content-Disposition'] = f'attachment; filename=predictions_event_{event_id}.csv'
-        response.headers['Content-Type'] = 'text/csv'
-        print("[DEBUG] Returning CSV response")
-        return response
-    except Exception as e:
-        print(f"[ERROR] Exception in download_predictions: {e}")
-        return f"Error in download_predictions: {e}", 500
+    model = ml_utils.load_model()
+    if model is None:
+        return 'Attendance prediction model not found. Please retrain the model first from the Admin Dashboard.', 409
+    rows = ([name, 'Present' if prediction else 'Absent', p]
+            for _, _, name, p, prediction in ml_utils.iter_attendee_predictions(model, 'e.id = ?', (event_id,)))
+    return exports.csv_response(f'predictions_event_{event_id}.csv', ['Attendee', 'Predicted Status', 'Probability'], rows,
+                                compress=exports.wants_gzip(request.args))
 
 @app.route('/ml_vis/<imgtype>')
 @login_required
 def ml_vis(imgtype):
-    img = session.get(f'{imgtype}_img')
-    if not img:
+    version = request.args.get('version')
+    artifact = artifacts.load(version or artifacts.latest_version(), imgtype)
+    if not artifact:
         return 'No image available', 404
-    return f'<img src="data:image/png;base64,{img}" />'
+    data, content_type = artifact
+    response = make_response(data)
+    response.headers['Content-Type'] = content_type
+    if version:
+        # Artefacts never change once written for a model version
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.set_etag(f'{artifacts.latest_version()}-{imgtype}')
+    return response.make_conditional(request)
+
+STARTUP_SECONDS = perf_counter() - _import_started
+log.info('App imported in %.2f s', STARTUP_SECONDS, extra={'pid': os.getpid()})
 
 if __name__ == '__main__':
     app.run(debug=True)
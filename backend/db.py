@@ -0,0 +1,112 @@
+"""
+Per-worker SQLite connection pool for the Flask data layer.
+
+Connections are opened once per worker process, tuned with WAL journaling and the pragmas
+below, and handed back to the pool when callers close() them instead of being torn down.
+WAL lets readers proceed while another worker writes, and the busy timeout makes writers
+wait for the lock instead of failing with "database is locked".
+
+Connections checked out during a request are tracked on the app context and returned when
+it tears down, so a view that forgets to close one does not leak it.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+
+from flask import g, has_app_context
+
+POOL_SIZE = 8
+BUSY_TIMEOUT = 30  # seconds
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',  # safe with WAL; commits no longer fsync the database file
+    f'PRAGMA busy_timeout = {BUSY_TIMEOUT * 1000}',
+    'PRAGMA cache_size = -16000',  # 16 MB page cache per connection
+    'PRAGMA mmap_size = 67108864',  # 64 MB of the database file memory-mapped
+    'PRAGMA temp_store = MEMORY',
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() returns it to its pool."""
+
+    _pool = None
+    _checked_out = False
+    _lease = 0  # bumped on every checkout, so a stale holder cannot release a reused connection
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+        elif self._checked_out:
+            self._checked_out = False
+            self._pool._release(self)
+
+    def discard(self):
+        """Close the underlying connection for good."""
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """A small LIFO pool of connections to one database file, reset after a fork."""
+
+    def __init__(self, path, maxsize=POOL_SIZE):
+        self.path = path
+        self.maxsize = maxsize
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        atexit.register(self.close_all)
+
+    def _open(self):
+        # Connections move between request threads, but only one thread uses a connection at a time
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, factory=PooledConnection, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conn._pool = self
+        return conn
+
+    def connect(self):
+        """Check out a connection (rows as sqlite3.Row). Call close() on it to return it."""
+        with self._lock:
+            if os.getpid() != self._pid:
+                # Connections inherited from the parent process must not be shared with it
+                self._idle = []
+                self._pid = os.getpid()
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        conn.row_factory = sqlite3.Row
+        conn._checked_out = True
+        conn._lease += 1
+        if has_app_context():
+            g.setdefault('_db_connections', []).append((conn, conn._lease))
+        return conn
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()  # uncommitted work is discarded, as closing a plain connection would
+        with self._lock:
+            if os.getpid() == self._pid and len(self._idle) < self.maxsize:
+                self._idle.append(conn)
+                return
+        conn.discard()
+
+    def close_all(self):
+        """Close every idle connection (checkpointing the WAL when the last one closes)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+
+def release_connections(exc=None):
+    """Return any connections still checked out by the current app context to their pool."""
+    for conn, lease in g.pop('_db_connections', []):
+        if conn._lease == lease:
+            conn.close()
+
+
+def init_app(app):
+    app.teardown_appcontext(release_connections)
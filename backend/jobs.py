@@ -0,0 +1,142 @@
+"""
+Local background job runner backed by a SQLite job table.
+
+Long-running work such as model retraining is submitted here so that the request which
+triggers it can return a job id straight away instead of tying up a gunicorn worker.
+Jobs run on a small in-process thread pool; their status, progress and result are
+written to the `jobs` table so any worker can answer a status poll.
+"""
+import json
+import logging
+import os
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+DB_PATH = os.environ.get('EVENTS_DB') or os.path.join(os.path.dirname(__file__), 'events.db')
+MAX_WORKERS = 1
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='jobs')
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def init_db():
+    """Create the jobs table if it does not exist."""
+    conn = _connect()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress REAL DEFAULT 0,
+            message TEXT,
+            result TEXT,
+            error TEXT,
+            worker_pid INTEGER,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def _update(job_id, **fields):
+    fields['updated_at'] = _now()
+    assignments = ', '.join(f'{name} = ?' for name in fields)
+    conn = _connect()
+    conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+    conn.commit()
+    conn.close()
+
+
+class Job:
+    """Handle passed to a running job function for reporting progress."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+
+    def progress(self, fraction, message=None):
+        """Record progress as a fraction between 0 and 1, with an optional status message."""
+        _update(self.id, progress=round(min(max(fraction, 0.0), 1.0), 3), message=message)
+
+
+def _run(job_id, func, args, kwargs):
+    _update(job_id, status='running')
+    try:
+        result = func(Job(job_id), *args, **kwargs)
+    except Exception as e:
+        log.exception('Job %s failed', job_id, extra={'job_id': job_id})
+        _update(job_id, status='failed', error=str(e))
+        return
+    _update(job_id, status='finished', progress=1.0, result=json.dumps(result))
+
+
+def submit(kind, func, *args, **kwargs):
+    """
+    Queue func(job, *args, **kwargs) to run in the background and return the new job id.
+    func must return a JSON-serialisable result (or None).
+    """
+    job_id = uuid.uuid4().hex
+    now = _now()
+    conn = _connect()
+    conn.execute('INSERT INTO jobs (id, kind, status, progress, worker_pid, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                 (job_id, kind, 'queued', 0.0, os.getpid(), now, now))
+    conn.commit()
+    conn.close()
+    _executor.submit(_run, job_id, func, args, kwargs)
+    return job_id
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _to_dict(row):
+    job = dict(row)
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    if job['status'] in ('queued', 'running') and job['worker_pid'] and not _pid_alive(job['worker_pid']):
+        # The worker that owned the job exited before finishing it
+        job['status'] = 'failed'
+        job['error'] = 'Worker exited before the job finished.'
+    return job
+
+
+def get_job(job_id):
+    """Return the job as a dict, or None if it does not exist."""
+    conn = _connect()
+    row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.close()
+    return _to_dict(row) if row else None
+
+
+def latest_job(kind, status=None):
+    """Return the most recently created job of a kind (optionally with a given status), or None."""
+    query = 'SELECT * FROM jobs WHERE kind = ?'
+    params = [kind]
+    if status:
+        query += ' AND status = ?'
+        params.append(status)
+    query += ' ORDER BY created_at DESC, rowid DESC LIMIT 1'
+    conn = _connect()
+    row = conn.execute(query, params).fetchone()
+    conn.close()
+    return _to_dict(row) if row else None
@@ -0,0 +1,158 @@
+"""
+Logging setup for the web app: levels per module, JSON lines, sampling and request ids.
+
+Modules log through the standard library (log = logging.getLogger(__name__)) with %-style
+arguments, so a disabled DEBUG call costs one level check and never formats anything.
+configure() installs a single handler on the root logger that only puts records on a
+queue; a background thread does the writing, so a request thread never waits on stdout.
+
+Environment:
+    LOG_LEVEL    level for everything not listed in LOG_LEVELS (default INFO)
+    LOG_LEVELS   per-module overrides by logger name prefix, e.g. "ml=DEBUG,utils.kiosk=WARNING"
+    LOG_FORMAT   json (default) for one JSON object per line, or text
+
+High-frequency messages can be sampled at the call site: with extra={'sample_every': 100}
+only every 100th record of that message (counted per logger and message template) is
+emitted, carrying a "sampled": 100 field. Other extra fields are included in the JSON.
+Inside a request each record carries the request id, taken from an incoming X-Request-ID
+header or generated, and echoed back on the response.
+"""
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+
+from flask import g, has_request_context, request
+
+DEFAULT_LEVEL = 'INFO'
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Attributes every LogRecord has; anything else was passed in extra= and goes in the JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_handler = None
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request's id ('-' outside a request)."""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Let through every Nth record of messages logged with extra={'sample_every': N}."""
+
+    def __init__(self):
+        super().__init__()
+        self._counters = {}
+
+    def filter(self, record):
+        every = getattr(record, 'sample_every', None)
+        if not every or every <= 1:
+            return True
+        counter = self._counters.setdefault((record.name, record.msg), itertools.count())
+        if next(counter) % every:
+            return False
+        record.sampled = every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request id and any extra fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != 'sample_every':
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(spec):
+    """Parse "name=LEVEL,name=LEVEL" into {name: level}, ignoring malformed entries."""
+    levels = {}
+    for item in (spec or '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure(level=None, levels=None, json_output=None, stream=None):
+    """
+    Route all logging through a queue to stream (default stdout), replacing any handler a
+    previous call installed. Arguments left as None are read from the environment.
+    """
+    global _handler, _listener
+    level = level or os.environ.get('LOG_LEVEL', DEFAULT_LEVEL).upper()
+    levels = parse_levels(os.environ.get('LOG_LEVELS')) if levels is None else levels
+    if json_output is None:
+        json_output = os.environ.get('LOG_FORMAT', 'json').lower() != 'text'
+    shutdown()
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    root.setLevel(level)
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    records = queue.SimpleQueue()
+    # QueueHandler formats on the calling thread (which has the request context); the
+    # listener thread only writes the finished lines
+    _handler = handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(SamplingFilter())
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(
+        '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+    root.addHandler(handler)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(logging.Formatter('%(message)s'))
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    return handler
+
+
+def shutdown():
+    """Write out everything still queued and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown)
+
+
+def init_app(app):
+    """configure() logging and give every request an id (logged as request_id, echoed as X-Request-ID)."""
+    configure()
+    log = logging.getLogger('access')
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex[:16]
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        response.headers[REQUEST_ID_HEADER] = g.get('request_id', '')
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('%s %s %s', request.method, request.path, response.status_code, extra={
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - g.get('request_started', time.perf_counter())) * 1000, 1)})
+        return response
@@ -0,0 +1,229 @@
+"""
+Versioned schema migrations for events.db (and the desktop app's event_management.db).
+
+Each migration is applied once, in order, inside its own transaction, and recorded in the
+`schema_migrations` table, so the app can bring any existing database up to date at
+startup. Migrations are written to be safe on databases that were patched by hand with
+the old scripts/migrate_*.py files (columns are only added if missing). They do not
+import app modules, so a migration keeps doing what it did when it shipped however those
+modules change later.
+
+Run directly to migrate a database file:
+
+    python backend/migrations.py [path/to/events.db]
+"""
+import json
+import os
+import sqlite3
+import struct
+import sys
+from datetime import datetime
+
+DB_PATH = os.environ.get('EVENTS_DB') or os.path.join(os.path.dirname(__file__), 'events.db')
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _add_column(conn, table, column, definition):
+    if column not in _columns(conn, table):
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _has_index_on(conn, table, column):
+    """True if some index on table already has column as its leading key (e.g. a UNIQUE constraint)."""
+    for index in conn.execute(f'PRAGMA index_list({table})').fetchall():
+        info = conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall()
+        if info and info[0][2] == column:
+            return True
+    return False
+
+
+def _create_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            is_admin INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            date TEXT,
+            time TEXT,
+            location TEXT,
+            status TEXT,
+            description TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS attendees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER,
+            name TEXT,
+            email TEXT,
+            status TEXT,
+            FOREIGN KEY(event_id) REFERENCES events(id)
+        )
+    ''')
+
+
+def _add_event_columns(conn):
+    _add_column(conn, 'events', 'attendance', 'INTEGER')
+    _add_column(conn, 'events', 'created_by', 'INTEGER')
+
+
+def _add_attendee_columns(conn):
+    _add_column(conn, 'attendees', 'face_landmarks', 'TEXT')
+    _add_column(conn, 'attendees', 'face_encoding', 'BLOB')
+    _add_column(conn, 'attendees', 'role', 'TEXT')
+    _add_column(conn, 'attendees', 'previous_attendance_rate', 'REAL')
+
+
+def _add_lookup_indexes(conn):
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_attendees_event_id ON attendees(event_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_status ON events(status)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_date ON events(date)')
+    # Keyset pagination of the dashboards orders by (COALESCE(date, ''), id)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_date_key ON events(COALESCE(date, ''), id)")
+    # Duplicate check when adding an event: date = ? AND time = ? AND LOWER(location) = ?
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_date_time_location ON events(date, time, LOWER(location))')
+    # Databases created by the old scripts/init_db.py have no UNIQUE constraint on users.email
+    # ... and the oldest ones (like the root events.db) have no users.username at all
+    for column in ('email', 'username'):
+        if column in _columns(conn, 'users') and not _has_index_on(conn, 'users', column):
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_users_{column} ON users({column})')
+
+
+# Binary face template as utils/face_templates.py wrote it when migration 5 shipped:
+# header (magic, format version, dtype code 1 = little-endian float32, rows, cols), then the values
+_TEMPLATE_HEADER = struct.Struct('<4sBBHH6x')
+
+
+def _landmark_template(text):
+    """Binary template for a JSON list of [x, y, z] points; ValueError/TypeError if it is not one."""
+    points = json.loads(text)
+    if not isinstance(points, list) or not points or not all(isinstance(p, list) for p in points):
+        raise ValueError('Expected a list of landmark points')
+    cols = len(points[0])
+    if not cols or any(len(p) != cols for p in points):
+        raise ValueError('Landmark points differ in length')
+    values = [float(v) for p in points for v in p]
+    return _TEMPLATE_HEADER.pack(b'FTPL', 1, 1, len(points), cols) + struct.pack(f'<{len(values)}f', *values)
+
+
+def _convert_face_landmarks(conn):
+    """Re-encode JSON landmark text as binary templates in face_encoding."""
+    rows = conn.execute('SELECT id, face_landmarks FROM attendees WHERE face_landmarks IS NOT NULL AND face_encoding IS NULL').fetchall()
+    for attendee_id, text in rows:
+        try:
+            template = _landmark_template(text)
+        except (ValueError, TypeError):
+            continue  # not a valid landmark list; leave the row for an admin to re-capture
+        conn.execute('UPDATE attendees SET face_encoding = ?, face_landmarks = NULL WHERE id = ?', (template, attendee_id))
+
+
+def _add_attendance_columns(conn):
+    _add_column(conn, 'attendees', 'timestamp', 'TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_attendees_event_name ON attendees(event_id, name)')
+
+
+def _create_forecasts_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS forecasts (
+            event_id INTEGER PRIMARY KEY,
+            model_version TEXT,
+            classifier_version TEXT,
+            predicted_attendance INTEGER,
+            attendee_probabilities TEXT,
+            computed_at TEXT,
+            FOREIGN KEY(event_id) REFERENCES events(id)
+        )
+    ''')
+
+
+def _add_checkin_method(conn):
+    _add_column(conn, 'attendees', 'checkin_method', 'TEXT')
+    # The desktop app used to write the method into the status ('checked_in_face', 'checked_in_motion')
+    conn.execute('''
+        UPDATE attendees SET checkin_method = SUBSTR(status, 12), status = 'Checked In'
+        WHERE status LIKE 'checked!_in!_%' ESCAPE '!'
+    ''')
+
+
+def _add_event_sort_indexes(conn):
+    # The event listing sorts by title, location or status as well as date, each keyed on
+    # (COALESCE(column, ''), id) like idx_events_date_key (see pagination.keyset_page)
+    for column in ('title', 'location', 'status'):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_events_{column}_key ON events(COALESCE({column}, ''), id)")
+
+
+# (version, description, function) in the order they must be applied. Never edit or
+# renumber a migration that has shipped; append a new one instead.
+MIGRATIONS = [
+    (1, 'Create users, events and attendees tables', _create_base_tables),
+    (2, 'Add events.attendance and events.created_by', _add_event_columns),
+    (3, 'Add attendee face, role and attendance-rate columns', _add_attendee_columns),
+    (4, 'Add indexes for event, attendee and user lookups', _add_lookup_indexes),
+    (5, 'Convert JSON face landmarks to binary face templates', _convert_face_landmarks),
+    (6, 'Add attendees.timestamp and an (event_id, name) index for check-in upserts', _add_attendance_columns),
+    (7, 'Create the forecasts table of precomputed attendance predictions', _create_forecasts_table),
+    (8, "Add attendees.checkin_method and store desktop check-ins as 'Checked In'", _add_checkin_method),
+    (9, 'Add keyset pagination indexes for sorting events by title, location and status', _add_event_sort_indexes),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    ''')
+    conn.commit()
+
+
+def current_version(conn):
+    """Return the highest applied migration version (0 for a database that was never migrated)."""
+    _ensure_version_table(conn)
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_migrations').fetchone()[0]
+
+
+def migrate(db_path=None):
+    """Apply all pending migrations to the database and return the list of versions applied."""
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    try:
+        _ensure_version_table(conn)
+        newly_applied = []
+        for version, description, apply in MIGRATIONS:
+            with conn:
+                # DDL does not open a transaction implicitly; IMMEDIATE also stops two workers
+                # starting up together from applying the same migration twice
+                conn.execute('BEGIN IMMEDIATE')
+                if conn.execute('SELECT 1 FROM schema_migrations WHERE version = ?', (version,)).fetchone():
+                    continue
+                apply(conn)
+                conn.execute('INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)',
+                             (version, description, datetime.now().isoformat(timespec='seconds')))
+            newly_applied.append(version)
+        return newly_applied
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    applied = migrate(path)
+    conn = sqlite3.connect(path)
+    version = current_version(conn)
+    conn.close()
+    if applied:
+        print(f'Applied migrations {applied}; {path} is at schema version {version}.')
+    else:
+        print(f'{path} is up to date at schema version {version}.')
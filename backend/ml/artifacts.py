@@ -0,0 +1,79 @@
+"""
+Server-side store for model evaluation artefacts (plots and metrics), keyed by model version.
+
+Artefacts are written once by the retrain job and never change afterwards, so they can be
+served with long-lived cache headers and referenced from pages by (model version, name)
+instead of being carried around in the session cookie.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+DB_PATH = os.environ.get('EVENTS_DB') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'events.db')
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    """Create the model_artifacts table if it does not exist."""
+    conn = _connect()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS model_artifacts (
+            model_version TEXT NOT NULL,
+            name TEXT NOT NULL,
+            content_type TEXT NOT NULL,
+            data BLOB NOT NULL,
+            created_at TEXT,
+            PRIMARY KEY (model_version, name)
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def save(model_version, name, data, content_type):
+    """Store an artefact (bytes) for a model version, replacing any previous one with that name."""
+    conn = _connect()
+    conn.execute('INSERT OR REPLACE INTO model_artifacts (model_version, name, content_type, data, created_at) VALUES (?, ?, ?, ?, ?)',
+                 (model_version, name, content_type, sqlite3.Binary(data), datetime.now().isoformat(timespec='seconds')))
+    conn.commit()
+    conn.close()
+
+
+def save_json(model_version, name, obj):
+    save(model_version, name, json.dumps(obj).encode('utf-8'), 'application/json')
+
+
+def load(model_version, name):
+    """Return (data, content_type) for an artefact, or None if it does not exist."""
+    conn = _connect()
+    row = conn.execute('SELECT data, content_type FROM model_artifacts WHERE model_version = ? AND name = ?',
+                       (model_version, name)).fetchone()
+    conn.close()
+    return (bytes(row['data']), row['content_type']) if row else None
+
+
+def load_json(model_version, name):
+    artifact = load(model_version, name)
+    return json.loads(artifact[0]) if artifact else None
+
+
+def names(model_version):
+    """Return the names of the artefacts stored for a model version."""
+    conn = _connect()
+    rows = conn.execute('SELECT name FROM model_artifacts WHERE model_version = ? ORDER BY name', (model_version,)).fetchall()
+    conn.close()
+    return [row['name'] for row in rows]
+
+
+def latest_version():
+    """Return the model version with the most recently stored artefacts, or None."""
+    conn = _connect()
+    row = conn.execute('SELECT model_version FROM model_artifacts ORDER BY created_at DESC, rowid DESC LIMIT 1').fetchone()
+    conn.close()
+    return row['model_version'] if row else None
@@ -0,0 +1,131 @@
+"""
+Precomputed attendance forecasts, one row per event in the `forecasts` table.
+
+Pages read an event's forecast with a primary-key lookup instead of running the models
+inline. A background job (see refresh) fills in what is out of date, in batches:
+
+- the predicted attendance of events that have no row yet. Writes to an event or its
+  attendees delete just that event's row (see invalidate); other events keep the
+  forecast they have, even though the regressor is retrained in between. An admin
+  retrain re-forecasts every event (full=True).
+- every attendee's probability of being present, only for events whose row was made
+  by a different attendee classifier than the one now saved (or has none yet).
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import jobs
+from utils.lazy import lazy_import
+
+ml_utils = lazy_import(f'{__package__}.ml_utils')
+model_registry = lazy_import(f'{__package__}.model_registry')
+
+DB_PATH = os.environ.get('EVENTS_DB') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'events.db')
+BATCH_SIZE = 500  # events forecast per predict call and transaction
+JOB_KIND = 'refresh_forecasts'
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def get(conn, event_id):
+    """
+    Return an event's forecast as a dict (attendee_probabilities decoded to {attendee_id: p}),
+    or None if it has not been computed yet.
+    """
+    row = conn.execute('SELECT * FROM forecasts WHERE event_id = ?', (event_id,)).fetchone()
+    if row is None:
+        return None
+    forecast = dict(row)
+    probabilities = forecast['attendee_probabilities']
+    forecast['attendee_probabilities'] = {int(k): p for k, p in json.loads(probabilities).items()} if probabilities else None
+    return forecast
+
+
+def invalidate(conn, *event_ids):
+    """Drop events' forecasts (after they, or their attendees, change or are deleted); the caller commits."""
+    conn.executemany('DELETE FROM forecasts WHERE event_id = ?', [(event_id,) for event_id in event_ids])
+
+
+def _stale_events(conn, model_version, classifier_version, full, after_id, limit):
+    """Events needing work after after_id, with flags for which part of their forecast is out of date."""
+    return conn.execute('''
+        SELECT * FROM (
+            SELECT e.id, e.date, e.location, e.status,
+                   f.event_id IS NULL OR (? AND f.model_version IS NOT ?) AS needs_prediction,
+                   f.event_id IS NULL OR f.classifier_version IS NOT ? AS needs_probabilities
+            FROM events e LEFT JOIN forecasts f ON f.event_id = e.id
+            WHERE e.id > ?
+        )
+        WHERE needs_prediction OR needs_probabilities
+        ORDER BY id LIMIT ?
+    ''', (full, model_version, classifier_version, after_id, limit)).fetchall()
+
+
+def refresh(job=None, batch_size=BATCH_SIZE, full=False):
+    """
+    Bring the forecasts table up to date, batch_size events at a time: predict attendance
+    for events without a forecast (or for every event made by an older regressor when
+    full is True), and score attendees for events scored by another classifier.
+    Runs as a background job; returns how many events got each part recomputed.
+    """
+    bundle = model_registry.refresh_if_stale()  # retrains the regressor here, off the request path, if events changed
+    classifier_bundle = ml_utils.load_model_bundle()
+    classifier = classifier_bundle['model'] if classifier_bundle else None
+    classifier_version = classifier_bundle['version'] if classifier_bundle else None
+    conn = _connect()
+    try:
+        total = conn.execute('SELECT COUNT(*) FROM events').fetchone()[0] or 1
+        done = predicted_count = scored_count = after_id = 0
+        while True:
+            events = _stale_events(conn, bundle['version'], classifier_version, full, after_id, batch_size)
+            if not events:
+                break
+            after_id = events[-1]['id']
+            to_predict = [e for e in events if e['needs_prediction']]
+            to_score = [e['id'] for e in events if e['needs_probabilities']] if classifier is not None else []
+            if to_predict and bundle['model'] is not None:
+                features = [{'date': e['date'], 'location': e['location'], 'status': e['status']} for e in to_predict]
+                predicted = ml_utils.predict_attendance_batch(features, bundle['model'], bundle['feature_columns'])
+            else:
+                predicted = [None] * len(to_predict)  # not enough data to train the regressor yet
+            probabilities = ml_utils.presence_probabilities(classifier, to_score) if to_score else {}
+            now = datetime.now().isoformat(timespec='seconds')
+            with conn:
+                conn.executemany('''
+                    INSERT INTO forecasts (event_id, model_version, predicted_attendance, computed_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(event_id) DO UPDATE SET
+                        model_version = excluded.model_version,
+                        predicted_attendance = excluded.predicted_attendance,
+                        computed_at = excluded.computed_at
+                ''', [(e['id'], bundle['version'], prediction, now) for e, prediction in zip(to_predict, predicted)])
+                conn.executemany('''
+                    UPDATE forecasts SET classifier_version = ?, attendee_probabilities = ?, computed_at = ?
+                    WHERE event_id = ?
+                ''', [(classifier_version, json.dumps(probabilities[event_id]), now, event_id) for event_id in to_score])
+            done += len(events)
+            predicted_count += len(to_predict)
+            scored_count += len(to_score)
+            if job is not None:
+                job.progress(min(0.99, done / total), f'Forecast {predicted_count} events, scored {scored_count}')
+        return {'forecast': predicted_count, 'scored': scored_count,
+                'model_version': bundle['version'], 'classifier_version': classifier_version}
+    finally:
+        conn.close()
+
+
+def request_refresh():
+    """
+    Queue a refresh job unless one is already waiting to start (that one will see this
+    change too). Returns the job id, or None if no new job was needed.
+    """
+    queued = jobs.latest_job(JOB_KIND, status='queued')
+    if queued and queued['status'] == 'queued':
+        return None
+    return jobs.submit(JOB_KIND, refresh)
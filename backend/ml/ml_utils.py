@@ -1,14 +1,44 @@
+import logging
+import os
 import sqlite3
+import threading
+import joblib
 import pandas as pd
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import accuracy_score, classification_report
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+from pandas.api.types import union_categoricals
 import numpy as np
+from datetime import datetime
 
-DB_PATH = 'events.db'
+log = logging.getLogger(__name__)
+
+DB_PATH = os.environ.get('EVENTS_DB') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'events.db')
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'attendance_model.pkl')
+
+# Per-attendee features used by the attendance classifier
+NUMERIC_FEATURES = ['day_of_week', 'hour', 'is_weekend', 'event_attendance', 'previous_attendance_rate']
+CATEGORICAL_FEATURES = ['location', 'event_status', 'event_type', 'attendee_role']
+FEATURE_COLUMNS = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+# Columns of the joined attendee/event query the features are derived from
+_ROW_COLUMNS = ['attendee_id', 'event_id', 'attendee_name', 'attendee_status', 'attendee_role', 'previous_attendance_rate', 'date', 'time',
+                'location', 'event_status', 'event_attendance', 'event_type']
+# Rows read from SQLite per chunk when streaming large joins
+CHUNK_SIZE = 50000
+
+# In-process cache of the unpickled classifier bundle, keyed by (path, mtime)
+_model_cache = {'key': None, 'bundle': None}
+_model_cache_lock = threading.Lock()
+
+def new_version():
+    """Return a sortable version stamp for a freshly trained model."""
+    return datetime.now().strftime('%Y%m%d%H%M%S%f')
 
 def get_event_data():
     """Fetch all event records as a DataFrame from the database."""
-    print("[DEBUG] Connecting to DB")
+    log.debug('Reading event data from %s', DB_PATH)
     conn = sqlite3.connect(DB_PATH)
     df = pd.read_sql_query('SELECT * FROM events', conn)
     conn.close()
@@ -47,40 +77,6 @@ def get_feature_importances(model, feature_columns):
         return importances
     return []
 
-def predict_attendance_for_event(event_id):
-    print(f"[DEBUG] predict_attendance_for_event called with event_id={event_id}")
-    try:
-        model, feature_columns = train_attendance_model()
-        print("[DEBUG] Loaded model and feature columns")
-        if model is None:
-            print("[ERROR] Attendance prediction model not found.")
-            return []
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        print(f"[DEBUG] Fetching attendees and event data for event_id={event_id}")
-        cursor.execute("SELECT id, name FROM attendees WHERE event_id=?", (event_id,))
-        attendees = cursor.fetchall()
-        cursor.execute("SELECT date, location, status FROM events WHERE id=?", (event_id,))
-        event_data = cursor.fetchone()
-        conn.close()
-        if event_data is None or not attendees:
-            print(f"[DEBUG] No event data or attendees found for event_id={event_id}")
-            return []
-        event_features = {
-            'date': event_data[0],
-            'location': event_data[1],
-            'status': event_data[2]
-        }
-        print(f"[DEBUG] Predicting attendance for {len(attendees)} attendees")
-        # For demo: predict same status for all attendees (since model is event-level)
-        predicted_status = predict_attendance(event_features, model, feature_columns)
-        print(f"[DEBUG] Predicted status: {predicted_status}")
-        # Return a list of (attendee_id, predicted_status)
-        return [(att[0], predicted_status) for att in attendees]
-    except Exception as e:
-        print(f"[ERROR] Exception in predict_attendance_for_event: {e}")
-        return []
-
 def predict_attendance(event_features, model, feature_columns):
     """
     Predict attendance for a single event using the trained model.
@@ -89,7 +85,7 @@ def predict_attendance(event_features, model, feature_columns):
     feature_columns: columns used in training.
     Returns integer prediction or None.
     """
-    print("[DEBUG] Predicting attendance for event features={event_features}")
+    log.debug('Predicting attendance for event features=%s', event_features)
     try:
         X_pred = pd.DataFrame([event_features])
         X_pred = pd.get_dummies(X_pred)
@@ -101,5 +97,283 @@ def predict_attendance(event_features, model, feature_columns):
         pred = model.predict(X_pred)
         return int(round(pred[0]))
     except Exception as e:
-        print(f"[ERROR] Exception in predict_attendance: {e}")
+        log.exception('predict_attendance failed for event features=%s', event_features)
         return None
+
+def predict_attendance_batch(events_features, model, feature_columns):
+    """
+    Predict attendance for many events in one call. events_features is a list of dicts
+    like predict_attendance's; each event is one-hot encoded exactly as it would be on its
+    own, so the results match. Returns a list of ints.
+    """
+    X_pred = pd.get_dummies(pd.DataFrame(events_features))
+    X_pred = X_pred.reindex(columns=list(feature_columns), fill_value=0)
+    return [int(round(p)) for p in model.predict(X_pred)]
+
+# --- Attendee-level attendance classifier ---
+
+def _attendee_query(conn, where=''):
+    """
+    Build the joined attendee/event query for the classifier, substituting NULL for
+    optional columns (role, previous_attendance_rate, type) that older schemas lack.
+    """
+    attendee_cols = {row[1] for row in conn.execute('PRAGMA table_info(attendees)')}
+    event_cols = {row[1] for row in conn.execute('PRAGMA table_info(events)')}
+    role = 'a.role' if 'role' in attendee_cols else 'NULL'
+    prev_rate = 'a.previous_attendance_rate' if 'previous_attendance_rate' in attendee_cols else 'NULL'
+    event_type = 'e.type' if 'type' in event_cols else 'NULL'
+    return f'''
+        SELECT a.id AS attendee_id, e.id AS event_id, a.name AS attendee_name, a.status AS attendee_status, {role} AS attendee_role,
+               {prev_rate} AS previous_attendance_rate, e.date, e.time, e.location,
+               e.status AS event_status, e.attendance AS event_attendance, {event_type} AS event_type
+        FROM attendees a
+        JOIN events e ON a.event_id = e.id
+        {where}
+    '''
+
+def iter_attendee_chunks(where='', params=(), chunksize=CHUNK_SIZE):
+    """
+    Stream joined attendee/event rows as DataFrames of at most chunksize rows, so large
+    joins never have to be materialised as Python tuples all at once.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        query = _attendee_query(conn, where)
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+            yield chunk
+    finally:
+        conn.close()
+
+def _parse_distinct(values, parse):
+    """
+    Apply a vectorized parser to the distinct values of a column only and broadcast the
+    result back through the factorized codes. Dates and times repeat for every attendee of
+    an event, so this parses each one once. Missing or unparseable values become 0.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=object)).fillna(0).to_numpy(dtype=np.float32)
+    # Missing values have code -1, which picks the trailing 0
+    return np.append(parsed, np.float32(0))[codes]
+
+def _categorical(values):
+    """Return values as a Categorical with missing entries mapped to 'unknown'."""
+    cat = pd.Categorical(values.to_numpy(dtype=object))
+    if cat.isna().any():
+        if 'unknown' not in cat.categories:
+            cat = cat.add_categories('unknown')
+        cat = cat.fillna('unknown')
+    return cat
+
+def _feature_frame(df):
+    """
+    Build the raw classifier feature frame (FEATURE_COLUMNS) from joined rows using
+    vectorized date/time parsing. Numeric features are float32 and categorical features
+    are pandas categoricals, which keeps each chunk compact.
+    """
+    day_of_week = _parse_distinct(df['date'], lambda s: pd.to_datetime(s, format='%Y-%m-%d', errors='coerce').dt.dayofweek)  # 0=Monday
+    hour = _parse_distinct(df['time'], lambda s: pd.to_numeric(s.astype(str).str.split(':', n=1).str[0], errors='coerce'))
+    X = pd.DataFrame({
+        'day_of_week': day_of_week,
+        'hour': hour,
+        'is_weekend': (day_of_week >= 5).astype(np.float32),
+        'event_attendance': pd.to_numeric(df['event_attendance'], errors='coerce').fillna(0).to_numpy(dtype=np.float32),
+        'previous_attendance_rate': pd.to_numeric(df['previous_attendance_rate'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float32),
+    })
+    for col in CATEGORICAL_FEATURES:
+        X[col] = _categorical(df[col])
+    return X[FEATURE_COLUMNS]
+
+def _labels(df):
+    """Label: 1 if attendee.status == 'Present' (case-insensitive), else 0."""
+    return df['attendee_status'].astype('string').str.lower().eq('present').fillna(False).to_numpy(dtype=np.int8)
+
+def _concat_feature_frames(frames):
+    """Concatenate chunk feature frames, merging categoricals without widening to object dtype."""
+    if len(frames) == 1:
+        return frames[0]
+    X = pd.DataFrame({col: np.concatenate([f[col].to_numpy() for f in frames]) for col in NUMERIC_FEATURES})
+    for col in CATEGORICAL_FEATURES:
+        X[col] = union_categoricals([f[col] for f in frames])
+    return X[FEATURE_COLUMNS]
+
+def extract_ml_data(chunksize=CHUNK_SIZE):
+    """
+    Extracts features (X) and labels (y) from attendees/events tables for ML.
+    Features: day_of_week, hour, is_weekend, event_attendance, previous_attendance_rate (numeric)
+    and location, event_status, event_type, attendee_role (categorical, encoded by the pipeline).
+    Label: 1 if attendee.status == 'Present', else 0
+    Returns: X (DataFrame of FEATURE_COLUMNS), y (numpy array)
+
+    The join is read chunksize rows at a time, which only bounds the transient cost of
+    each fetch: the returned X and y hold every row, so memory grows linearly with the
+    number of attendees (compact categoricals, about 7 MB per 300k rows). The classifier
+    is fitted on the whole set at once; this is not out-of-core training.
+    """
+    frames = []
+    labels = []
+    for chunk in iter_attendee_chunks(chunksize=chunksize):
+        frames.append(_feature_frame(chunk))
+        labels.append(_labels(chunk))
+    if not frames:
+        return _feature_frame(pd.DataFrame(columns=_ROW_COLUMNS)), np.empty((0,), dtype=np.int8)
+    return _concat_feature_frames(frames), np.concatenate(labels)
+
+def build_pipeline(model=None):
+    """
+    Return an unfitted Pipeline: one-hot encoder for the categorical features followed by
+    the classifier. The encoder is fitted once at training time and persisted with the model,
+    so prediction only ever calls transform with the training column layout.
+    """
+    if model is None:
+        from sklearn.ensemble import RandomForestClassifier
+        model = RandomForestClassifier(n_estimators=100, random_state=42)
+    encoder = ColumnTransformer([
+        ('categorical', OneHotEncoder(handle_unknown='ignore', dtype=np.float32), CATEGORICAL_FEATURES),
+        ('numeric', 'passthrough', NUMERIC_FEATURES),
+    ], sparse_threshold=1.0)  # always emit a sparse matrix
+    return Pipeline([('encoder', encoder), ('model', model)])
+
+def train_and_evaluate_model(X_train, y_train, X_test, y_test, model=None):
+    """
+    Fit the encoder and classifier pipeline, evaluate it, and save it to MODEL_PATH.
+    Returns a dict with the fitted pipeline ('model'), its 'version', 'accuracy', the
+    classification 'report' dict, and the test-set predictions ('y_pred') and class
+    probabilities ('y_score', None if the classifier has no predict_proba).
+    The saved model is also placed in the load_model cache, so it is never read back from disk.
+    """
+    pipeline = build_pipeline(model)
+    pipeline.fit(X_train, y_train)
+    y_pred = pipeline.predict(X_test)
+    y_score = pipeline.predict_proba(X_test) if hasattr(pipeline, 'predict_proba') else None
+    acc = accuracy_score(y_test, y_pred)
+    report = classification_report(y_test, y_pred, output_dict=True)
+    bundle = {
+        'model': pipeline,
+        'feature_columns': FEATURE_COLUMNS,
+        'version': new_version(),
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    # Write then rename, so another worker never unpickles a half-written file
+    tmp_path = f'{MODEL_PATH}.{os.getpid()}.tmp'
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
+    with _model_cache_lock:
+        _model_cache.update(key=_model_cache_key(), bundle=bundle)
+    return {
+        'model': pipeline,
+        'version': bundle['version'],
+        'accuracy': acc,
+        'report': report,
+        'y_pred': y_pred,
+        'y_score': y_score,
+    }
+
+def _model_cache_key():
+    try:
+        return MODEL_PATH, os.stat(MODEL_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def load_model_bundle():
+    """
+    Return the saved classifier bundle (model, feature_columns, version, trained_at), or None.
+    The unpickled bundle is cached in-process and only reloaded when the file's mtime changes,
+    e.g. after another worker retrains the model.
+    """
+    key = _model_cache_key()
+    if key is None:
+        return None
+    with _model_cache_lock:
+        if _model_cache['key'] == key:
+            return _model_cache['bundle']
+        try:
+            bundle = joblib.load(MODEL_PATH)
+        except Exception:
+            bundle = None
+        if not isinstance(bundle, dict) or 'model' not in bundle:
+            # Bare estimator saved before the encoder was persisted; its column layout is unknown
+            bundle = None
+        _model_cache.update(key=key, bundle=bundle)
+        return bundle
+
+def load_model():
+    """Return the fitted encoder + classifier pipeline, or None if no model has been trained."""
+    bundle = load_model_bundle()
+    return bundle['model'] if bundle else None
+
+def model_version():
+    """Return the version stamp of the saved classifier, or None if no model has been trained."""
+    bundle = load_model_bundle()
+    return bundle['version'] if bundle else None
+
+def presence_probabilities(model, event_ids):
+    """
+    Return {event_id: {attendee_id: probability of being present}} for every attendee of
+    the given events, scored with the classifier pipeline in chunked batches.
+    """
+    probabilities = {event_id: {} for event_id in event_ids}
+    if not event_ids:
+        return probabilities
+    placeholders = ', '.join('?' * len(event_ids))
+    for chunk in iter_attendee_chunks(f'WHERE e.id IN ({placeholders})', tuple(event_ids)):
+        present = _present_probability(model, chunk)
+        for event_id, attendee_id, p in zip(chunk['event_id'].tolist(), chunk['attendee_id'].tolist(), present.tolist()):
+            probabilities[event_id][attendee_id] = round(p, 4)
+    return probabilities
+
+def _present_probability(model, chunk):
+    """P(present) for every row of a joined attendee/event chunk, in one predict_proba call."""
+    classes = list(model.classes_)
+    if 1 not in classes:
+        return np.zeros(len(chunk))  # trained on data where nobody was present
+    return model.predict_proba(_feature_frame(chunk))[:, classes.index(1)]
+
+def iter_attendee_predictions(model, where='', params=(), chunksize=CHUNK_SIZE):
+    """
+    Score the attendees of every event matching where (a condition on the events alias e,
+    e.g. 'e.date >= ?') and yield (event_id, attendee_id, name, probability, prediction)
+    in event and attendee id order. Attendees are scored chunksize at a time with one
+    predict_proba call per chunk, whichever events they belong to, so memory stays bounded
+    however many rows there are.
+    """
+    clause = f'WHERE {where} ORDER BY e.id, a.id' if where else 'ORDER BY e.id, a.id'
+    for chunk in iter_attendee_chunks(clause, params, chunksize):
+        present = _present_probability(model, chunk)
+        rows = zip(chunk['event_id'].tolist(), chunk['attendee_id'].tolist(), chunk['attendee_name'].tolist(), present.tolist())
+        for event_id, attendee_id, name, p in rows:
+            yield event_id, attendee_id, name, round(p, 4), int(p > 0.5)
+
+def iter_event_predictions(model, where='', params=(), chunksize=CHUNK_SIZE):
+    """
+    Group iter_attendee_predictions by event: yield one dict per event, in event id order,
+    {'event_id', 'expected_attendance', 'predicted_present', 'attendees': [{'attendee_id',
+    'name', 'probability', 'prediction'}]}. Events without attendees are not yielded.
+    """
+    current = None
+    for event_id, attendee_id, name, p, prediction in iter_attendee_predictions(model, where, params, chunksize):
+        if current is None or current['event_id'] != event_id:
+            if current is not None:
+                yield _rounded(current)
+            current = {'event_id': event_id, 'expected_attendance': 0.0, 'predicted_present': 0, 'attendees': []}
+        current['expected_attendance'] += p
+        current['predicted_present'] += prediction
+        current['attendees'].append({'attendee_id': attendee_id, 'name': name, 'probability': p, 'prediction': prediction})
+    if current is not None:
+        yield _rounded(current)
+
+def _rounded(event_prediction):
+    event_prediction['expected_attendance'] = round(event_prediction['expected_attendance'], 2)
+    return event_prediction
+
+def predict_attendance_for_event(event_id):
+    """
+    Predict attendance for each attendee of an event. Returns [(attendee_id, predicted_status)]
+    """
+    model = load_model()
+    if model is None:
+        raise RuntimeError("Attendance prediction model not found. Please retrain the model first from the Admin Dashboard.")
+    predictions = []
+    for chunk in iter_attendee_chunks('WHERE e.id = ?', (event_id,)):
+        y_pred = model.predict(_feature_frame(chunk))
+        predictions.extend(zip(chunk['attendee_id'].tolist(), y_pred.astype(int).tolist()))
+    return predictions
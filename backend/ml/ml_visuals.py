@@ -1,8 +1,16 @@
+import matplotlib
+matplotlib.use('Agg')  # plots are rendered off the main thread, without a display
 import matplotlib.pyplot as plt
 import numpy as np
-import io, base64
+import io
 from sklearn.metrics import confusion_matrix, roc_curve, auc
 
+def _to_png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    plt.close(fig)
+    return buf.getvalue()
+
 def plot_confusion_matrix(y_true, y_pred, labels):
     cm = confusion_matrix(y_true, y_pred, labels=labels)
     fig, ax = plt.subplots(figsize=(4,4))
@@ -21,12 +29,7 @@ def plot_confusion_matrix(y_true, y_pred, labels):
             ax.text(j, i, format(cm[i, j], fmt), ha="center", va="center",
                     color="white" if cm[i, j] > thresh else "black")
     fig.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    return img_base64
+    return _to_png(fig)
 
 def plot_roc_curve(y_true, y_score):
     fpr, tpr, _ = roc_curve(y_true, y_score)
@@ -40,9 +43,4 @@ def plot_roc_curve(y_true, y_score):
     ax.set_ylabel('True Positive Rate')
     ax.set_title('Receiver Operating Characteristic')
     ax.legend(loc="lower right")
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    return img_base64
+    return _to_png(fig)
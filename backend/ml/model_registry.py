@@ -0,0 +1,136 @@
+"""
+Persistent, versioned registry for the event attendance regression model.
+
+The model is trained in a background job, written to disk together with its feature
+columns and a version stamp, and then served to every prediction path from an in-process
+cache. When the events table changes it is only flagged stale (see mark_stale): lookups
+keep serving the last good model, and the background forecast refresh retrains it (see
+refresh_if_stale), as does an admin's explicit retrain. Until a first model exists,
+lookups queue that refresh and get None. Training never holds the cache lock, so
+lookups do not wait for it. Other workers pick up a new model by noticing that the file
+on disk has changed.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+from utils.lazy import lazy_import
+
+# Loaded on first use: pandas and scikit-learn come with them, and mark_stale needs neither
+joblib = lazy_import('joblib')
+ml_utils = lazy_import(f'{__package__}.ml_utils')
+forecasts = lazy_import(f'{__package__}.forecasts')
+
+REGISTRY_DIR = os.path.dirname(__file__)
+MODEL_PATH = os.path.join(REGISTRY_DIR, 'attendance_regressor.pkl')
+STALE_PATH = os.path.join(REGISTRY_DIR, 'attendance_regressor.stale')
+
+_lock = threading.Lock()  # guards _cache; only held to read or swap it
+_training = threading.Lock()  # one training at a time
+_cache = {'mtime': None, 'bundle': None}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def mark_stale():
+    """Flag the stored model as out of date; the next refresh_if_stale() retrains it."""
+    with open(STALE_PATH, 'w') as f:
+        f.write(datetime.now().isoformat())
+
+
+def _train_and_save():
+    started = time.time_ns()
+    model, feature_columns = ml_utils.train_attendance_model()
+    bundle = {
+        'model': model,
+        'feature_columns': list(feature_columns) if feature_columns is not None else None,
+        'version': ml_utils.new_version(),
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    tmp_path = f'{MODEL_PATH}.{os.getpid()}.tmp'
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
+    # Only clear the stale flag if nobody changed events while we were training
+    stale_mtime = _mtime(STALE_PATH)
+    if stale_mtime is not None and stale_mtime <= started:
+        try:
+            os.remove(STALE_PATH)
+        except FileNotFoundError:
+            pass
+    return bundle
+
+
+def is_stale():
+    return _mtime(STALE_PATH) is not None
+
+
+def _load():
+    """
+    Return the current bundle, reloading from disk only when another worker replaced it,
+    or None if no model has been trained yet. A stale model keeps being served.
+    """
+    mtime = _mtime(MODEL_PATH)
+    if mtime is None:
+        return None
+    if _cache['mtime'] != mtime:
+        _cache['bundle'] = joblib.load(MODEL_PATH)
+        _cache['mtime'] = mtime
+    return _cache['bundle']
+
+
+def _served_bundle():
+    with _lock:
+        bundle = _load()
+    if bundle is None:
+        forecasts.request_refresh()  # the refresh job trains the first model
+    return bundle
+
+
+def _train():
+    """Train and save a new model outside the cache lock, then swap it in."""
+    with _training:
+        bundle = _train_and_save()
+        mtime = _mtime(MODEL_PATH)
+        with _lock:
+            _cache['bundle'] = bundle
+            _cache['mtime'] = mtime
+    return bundle
+
+
+def get_model():
+    """
+    Return (model, feature_columns) for attendance prediction.
+    Both are None until a model is trained, or if there was not enough data to train one.
+    """
+    bundle = _served_bundle()
+    if bundle is None:
+        return None, None
+    return bundle['model'], bundle['feature_columns']
+
+
+def current_version():
+    """Return the version stamp of the model currently being served (None before the first one)."""
+    bundle = _served_bundle()
+    return bundle['version'] if bundle else None
+
+
+def refresh_if_stale():
+    """
+    Train if events changed since the model was trained or there is no model yet
+    (background jobs only). Returns the bundle.
+    """
+    if is_stale() or _mtime(MODEL_PATH) is None:
+        return _train()
+    with _lock:
+        return _load()
+
+
+def retrain():
+    """Retrain the model immediately (admin request). Returns the new version stamp."""
+    return _train()['version']
@@ -0,0 +1,37 @@
+"""
+Model retraining pipeline, run as a background job (see backend/jobs.py).
+"""
+from sklearn.model_selection import train_test_split
+
+from . import artifacts, ml_utils, ml_visuals, model_registry
+
+MIN_TRAINING_ROWS = 10
+
+
+def retrain_models(job):
+    """
+    Retrain the attendance classifier and regressor, reporting progress through job.
+    Evaluation plots and metrics are stored in the artefact store under the new model version;
+    the job result references them by name.
+    """
+    job.progress(0.05, 'Extracting attendee/event features')
+    X, y = ml_utils.extract_ml_data()
+    if X.shape[0] < MIN_TRAINING_ROWS:
+        raise ValueError('Not enough data to train model. Add more attendee/event records.')
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    job.progress(0.3, 'Training attendance classifier')
+    trained = ml_utils.train_and_evaluate_model(X_train, y_train, X_test, y_test)
+    job.progress(0.7, 'Rendering evaluation plots')
+    y_pred, y_score = trained['y_pred'], trained['y_score']
+    artifacts.save(trained['version'], 'cm', ml_visuals.plot_confusion_matrix(y_test, y_pred, labels=[0, 1]), 'image/png')
+    if y_score is not None and y_score.shape[1] > 1 and len(set(y_test)) > 1:
+        artifacts.save(trained['version'], 'roc', ml_visuals.plot_roc_curve(y_test, y_score[:, 1]), 'image/png')
+    artifacts.save_json(trained['version'], 'metrics', {'accuracy': trained['accuracy'], 'report': trained['report']})
+    job.progress(0.9, 'Retraining attendance regressor')
+    regressor_version = model_registry.retrain()
+    return {
+        'model_version': trained['version'],
+        'regressor_version': regressor_version,
+        'accuracy': trained['accuracy'],
+        'artifacts': artifacts.names(trained['version']),
+    }
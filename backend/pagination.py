@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination for event listings.
+
+Pages are ordered by (sort column, id) and each page starts strictly after the last row of
+the previous one, so fetching page N costs the same as fetching page 1 no matter how many
+events there are. The cursor handed to the client is an opaque base64url token holding the
+sort key and id of the last row shown.
+"""
+import base64
+import binascii
+import json
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def page_size(value, default=PAGE_SIZE):
+    """Parse a per_page request argument, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (sort_value, id) from a cursor token, or None if the token is missing or malformed."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_value, row_id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(row_id, int) or not isinstance(sort_value, str):
+        return None
+    return sort_value, row_id
+
+
+def keyset_page(conn, query, params, sort_by, sort_order='asc', cursor=None, limit=PAGE_SIZE):
+    """
+    Run query (a SELECT ending in a WHERE clause, without ORDER BY) one page at a time.
+    sort_by must be a trusted column name; the query must select it along with id. Every
+    column the app sorts events by needs an index on (COALESCE(column, ''), id) (see
+    migrations), or each page sorts the whole table.
+    Returns (rows, next_cursor), where next_cursor is None on the last page.
+    """
+    key = f"COALESCE({sort_by}, '')"
+    direction = 'DESC' if sort_order == 'desc' else 'ASC'
+    params = list(params)
+    position = decode_cursor(cursor)
+    if position:
+        # The redundant bound on the sort key alone lets SQLite seek an index on (key, id)
+        # rather than scanning it from the start
+        op = '<' if direction == 'DESC' else '>'
+        query += f' AND {key} {op}= ? AND ({key}, id) {op} (?, ?)'
+        params.extend([position[0], *position])
+    query += f' ORDER BY {key} {direction}, id {direction} LIMIT ?'
+    params.append(limit + 1)
+    rows = conn.execute(query, params).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[sort_by] or '', last['id'])
+    return rows, next_cursor
@@ -0,0 +1,45 @@
+"""
+Event statistics for the user and admin dashboards.
+
+All per-status counts come from a single aggregate pass over the events table and are
+cached until an event or user is written (see invalidate), or for at most CACHE_TTL
+seconds so changes made by other workers are picked up.
+"""
+from cache import TTLCache
+
+CACHE_TTL = 30
+
+_cache = TTLCache(ttl=CACHE_TTL, maxsize=1)
+
+
+def _compute(conn):
+    row = conn.execute('''
+        SELECT COUNT(*) AS total,
+               COALESCE(SUM(date = date('now')), 0) AS today,
+               COALESCE(SUM(status = 'Upcoming'), 0) AS upcoming,
+               COALESCE(SUM(status = 'In Progress'), 0) AS in_progress,
+               COALESCE(SUM(status = 'Completed'), 0) AS completed,
+               COALESCE(SUM(status = 'Cancelled'), 0) AS cancelled,
+               COALESCE(SUM(status = 'Pending Approval'), 0) AS pending_approval,
+               (SELECT COUNT(*) FROM users) AS total_users
+        FROM events
+    ''').fetchone()
+    return dict(row)
+
+
+def event_stats(conn):
+    """
+    Return a dict with total, today, upcoming, in_progress, completed, cancelled,
+    pending_approval and total_users counts. conn is only used on a cache miss.
+    """
+    return _cache.get_or_set('events', lambda: _compute(conn))
+
+
+def invalidate():
+    """Drop cached statistics after events or users change."""
+    _cache.invalidate()
+
+
+def cache_stats():
+    """Hit/miss counters of the statistics cache in this worker."""
+    return _cache.stats()
@@ -0,0 +1,143 @@
+"""
+Buffered, idempotent attendance writes.
+
+Check-ins are queued and written by one background thread per database, which groups
+everything recorded within FLUSH_INTERVAL seconds into a single transaction. A burst of
+check-ins when the doors open therefore costs one commit rather than one each, and callers
+never wait on the SQLite write lock.
+
+Writes are upserts keyed on (event_id, name) or on the attendee id, so seeing the same
+person again updates their row instead of adding a duplicate.
+"""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.25  # seconds
+MAX_BATCH = 500
+BUSY_TIMEOUT = 30  # seconds
+
+
+def prepare_schema(conn):
+    """Add the columns and index the writer relies on. Idempotent; run once at startup."""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(attendees)')}
+    if 'timestamp' not in columns:
+        conn.execute('ALTER TABLE attendees ADD COLUMN timestamp TEXT')
+    if 'checkin_method' not in columns:
+        conn.execute('ALTER TABLE attendees ADD COLUMN checkin_method TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_attendees_event_name ON attendees(event_id, name)')
+
+
+def _write(conn, records):
+    """Apply (event_id, name, status, attendee_id, method, timestamp) records in one transaction."""
+    latest = {}
+    for record in records:
+        event_id, name, _, attendee_id, _, _ = record
+        latest[('id', attendee_id) if attendee_id is not None else ('name', event_id, name)] = record
+    with conn:
+        for event_id, name, status, attendee_id, method, timestamp in latest.values():
+            if attendee_id is not None:
+                conn.execute('UPDATE attendees SET status = ?, checkin_method = ?, timestamp = ? WHERE id = ?',
+                             (status, method, timestamp, attendee_id))
+                continue
+            updated = conn.execute('UPDATE attendees SET status = ?, checkin_method = ?, timestamp = ? WHERE event_id = ? AND name = ?',
+                                   (status, method, timestamp, event_id, name)).rowcount
+            if not updated:
+                conn.execute('''
+                    INSERT INTO attendees (event_id, name, status, role, previous_attendance_rate, checkin_method, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (event_id, name, status, 'attendee', 1.0, method, timestamp))
+
+
+class AttendanceWriter:
+    """Queue of check-ins for one database, written in batches by a daemon thread."""
+
+    def __init__(self, db_path, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH, prepare=True):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.error = None
+        if prepare:
+            conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+            with conn:
+                prepare_schema(conn)
+            conn.close()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='attendance-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)  # write what is still queued when the program exits
+
+    def record(self, event_id, name, status, attendee_id=None, method=None):
+        """
+        Queue a check-in. With attendee_id the row is updated by id, otherwise by (event_id, name).
+        method ('face', 'motion', ...) is stored in attendees.checkin_method.
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._queue.put((event_id, name, status, attendee_id, method, now))
+
+    def flush(self, timeout=None):
+        """Write everything recorded so far now, and wait until it is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Write what is queued and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+        try:
+            while True:
+                batch, waiters, stop = [], [], False
+                item = self._queue.get()
+                deadline = None
+                while True:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if stop or waiters or len(batch) >= self.max_batch:
+                        break
+                    # Gather whatever else arrives within the flush interval into the same transaction
+                    deadline = deadline or time.monotonic() + self.flush_interval
+                    try:
+                        item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    try:
+                        _write(conn, batch)
+                    except sqlite3.Error as e:
+                        self.error = e
+                        log.error('Attendance write failed, %d check-ins lost: %s', len(batch), e)
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path, prepare=True):
+    """Return this process's writer for db_path, creating it (and preparing the schema) on first use."""
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = _writers[db_path] = AttendanceWriter(db_path, prepare=prepare)
+        return writer
@@ -0,0 +1,252 @@
+"""
+Background capture loop for desktop check-in.
+
+A CaptureEngine reads frames from a camera or a video file on its own thread and runs a
+detector on at most `fps` frames a second. Frames in between are grabbed but never decoded
+or converted, and each frame that is detected on is cropped to the region of interest and
+shrunk to `max_side` pixels first, so detection cost stays flat regardless of the camera
+resolution. Results are handed to a callback and/or a queue, which lets a Tkinter window
+poll for them with after() instead of blocking its main loop.
+
+Run directly to benchmark a detector on a video file without a camera:
+
+    python -m backend.utils.capture path/to/video.mp4 [face|motion] [fps]
+"""
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+from . import face_templates, image_io
+
+DETECT_FPS = 5
+MAX_SIDE = 480  # detectors work on small inputs; larger frames only cost resize time
+
+CaptureResult = namedtuple('CaptureResult', 'frame_index timestamp result')
+CaptureResult.__doc__ = 'Output of the detector for one frame; timestamp is seconds since the capture started.'
+
+
+class FaceDetector:
+    """MediaPipe face detection. Returns the list of detections, or None if there are none."""
+
+    def __init__(self, min_confidence=0.7):
+        self.min_confidence = min_confidence
+        self._detector = None
+
+    def __call__(self, frame):
+        if self._detector is None:
+            # Built on first use, so on the capture thread that will keep using it
+            import mediapipe as mp
+            self._detector = mp.solutions.face_detection.FaceDetection(model_selection=0, min_detection_confidence=self.min_confidence)
+        return self._detector.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).detections or None
+
+    def close(self):
+        if self._detector is not None:
+            self._detector.close()
+            self._detector = None
+
+
+class MotionDetector:
+    """
+    Difference against the first frame seen. Returns bounding boxes (x, y, w, h) of changed
+    regions covering at least min_area_fraction of the frame, or None if there are none.
+    """
+
+    def __init__(self, min_area_fraction=0.016):
+        self.min_area_fraction = min_area_fraction
+        self._background = None
+
+    def __call__(self, frame):
+        gray = cv2.GaussianBlur(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (21, 21), 0)
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray
+            return None
+        thresh = cv2.threshold(cv2.absdiff(self._background, gray), 25, 255, cv2.THRESH_BINARY)[1]
+        thresh = cv2.dilate(thresh, None, iterations=2)
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_area = self.min_area_fraction * gray.shape[0] * gray.shape[1]
+        boxes = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) > min_area]
+        return boxes or None
+
+    def close(self):
+        self._background = None
+
+
+class FaceRecognizer:
+    """
+    FaceMesh on every face in the frame (up to max_faces), matched against a FaceIndex of
+    the event's attendees. Returns a list of (attendee_id, distance), or None if no face
+    in the frame is recognised.
+    """
+
+    def __init__(self, index, max_faces=5, threshold=face_templates.MATCH_THRESHOLD):
+        self.index = index
+        self.max_faces = max_faces
+        self.threshold = threshold
+        self._face_mesh = None
+
+    def __call__(self, frame):
+        if self._face_mesh is None:
+            import mediapipe as mp
+            # Video mode: landmarks are tracked between frames instead of re-detected from scratch
+            self._face_mesh = mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=self.max_faces)
+        faces = self._face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).multi_face_landmarks
+        if not faces:
+            return None
+        probes = [face_templates.from_face_mesh(face) for face in faces]
+        matches = self.index.identify_many(probes, self.threshold)
+        return [(attendee_id, distance) for _, attendee_id, distance in matches] or None
+
+    def close(self):
+        if self._face_mesh is not None:
+            self._face_mesh.close()
+            self._face_mesh = None
+
+
+def crop(frame, roi):
+    """Crop a frame to roi = (x0, y0, x1, y1) given as fractions of its width and height."""
+    if roi is None:
+        return frame
+    height, width = frame.shape[:2]
+    x0, y0, x1, y1 = roi
+    return frame[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)]
+
+
+class CaptureEngine:
+    """
+    Run detector over frames from source (a camera index or a video file path) on a
+    background thread.
+
+    Live sources are paced by the clock: the newest frame is detected on once every 1/fps
+    seconds and the rest are skipped. Video files are paced by their own frame rate, so a
+    file is processed as fast as the detector allows while seeing the same frames a camera
+    would. Every detector output that is not None is delivered to on_result and put on
+    the results queue; with every_frame=True the Nones are delivered too.
+    The engine stops at the end of a file, after timeout seconds, or when stop() is called.
+    """
+
+    def __init__(self, detector, source=0, fps=DETECT_FPS, roi=None, max_side=MAX_SIDE, on_result=None,
+                 results=None, timeout=None, every_frame=False):
+        self.detector = detector
+        self.source = source
+        self.fps = fps
+        self.roi = roi
+        self.max_side = max_side
+        self.on_result = on_result
+        self.results = results if results is not None else queue.Queue()
+        self.timeout = timeout
+        self.every_frame = every_frame
+        self.error = None
+        self.stats = {'frames_read': 0, 'frames_detected': 0, 'detect_seconds': 0.0, 'elapsed_seconds': 0.0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='capture', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        self.join()
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            raise IOError(f'Could not open video source {self.source!r}')
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # keep camera latency to one frame where the backend supports it
+        return cap
+
+    def _run(self):
+        cap = None
+        started = time.monotonic()
+        try:
+            cap = self._open()
+            live = isinstance(self.source, int)
+            # Video files: detect on every step-th frame of the file's own timeline
+            step = 1 if live else max(1, round((cap.get(cv2.CAP_PROP_FPS) or self.fps) / self.fps))
+            next_due = started
+            index = -1
+            while not self._stop.is_set():
+                if self.timeout is not None and time.monotonic() - started > self.timeout:
+                    break
+                if not cap.grab():
+                    break
+                index += 1
+                self.stats['frames_read'] += 1
+                if live:
+                    now = time.monotonic()
+                    if now < next_due:
+                        continue
+                    next_due = max(next_due + 1 / self.fps, now)
+                elif index % step:
+                    continue
+                ok, frame = cap.retrieve()
+                if not ok:
+                    continue
+                self._detect(index, started, frame)
+        except Exception as e:
+            self.error = e
+        finally:
+            if cap is not None:
+                cap.release()
+            if hasattr(self.detector, 'close'):
+                self.detector.close()
+            self.stats['elapsed_seconds'] = time.monotonic() - started
+
+    def _detect(self, index, started, frame):
+        frame = image_io.downscale(crop(frame, self.roi), self.max_side)
+        began = time.monotonic()
+        result = self.detector(frame)
+        self.stats['detect_seconds'] += time.monotonic() - began
+        self.stats['frames_detected'] += 1
+        if result is None and not self.every_frame:
+            return
+        item = CaptureResult(index, began - started, result)
+        if self.on_result is not None:
+            self.on_result(item)
+        self.results.put(item)
+
+
+def wait_for_detection(detector, source=0, timeout=10, **options):
+    """Run a capture until the detector first returns a result; return it, or None after timeout."""
+    with CaptureEngine(detector, source=source, timeout=timeout, **options) as engine:
+        while engine.running or not engine.results.empty():
+            try:
+                return engine.results.get(timeout=0.1).result
+            except queue.Empty:
+                continue
+    return None
+
+
+if __name__ == '__main__':
+    path = sys.argv[1]
+    detector = FaceDetector() if (sys.argv[2] if len(sys.argv) > 2 else 'face') == 'face' else MotionDetector()
+    fps = float(sys.argv[3]) if len(sys.argv) > 3 else DETECT_FPS
+    engine = CaptureEngine(detector, source=path, fps=fps).start()
+    engine.join()
+    if engine.error:
+        sys.exit(f'Capture failed: {engine.error}')
+    stats = engine.stats
+    per_frame = stats['detect_seconds'] / max(1, stats['frames_detected']) * 1000
+    print(f"{stats['frames_read']} frames read, {stats['frames_detected']} detected on, "
+          f"{engine.results.qsize()} with results, {per_frame:.1f} ms per detection, "
+          f"{stats['elapsed_seconds']:.2f} s total")
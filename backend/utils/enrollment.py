@@ -0,0 +1,257 @@
+"""
+Bulk enrollment of attendee reference photos.
+
+A batch is a ZIP archive or a multipart list of photos whose file names identify the
+attendee, either by id (``42.jpg``) or by email (``jane@example.com.png``). The request
+only saves the uploads to disk (save_batch); a background job then enrolls them
+(enroll_saved_batch), so a large batch never ties up a web worker. Landmark extraction
+runs across a process pool (FaceMesh holds the GIL for most of its work, so threads
+would not help), and every successful template is written in one transaction. The job's
+result is one report entry per photo.
+"""
+import atexit
+import multiprocessing
+import os
+import shutil
+import threading
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from . import face_index, face_templates, image_io
+from .face_mesh_pool import FaceMeshPool
+
+MAX_BATCH_BYTES = 1024 * 1024 * 1024  # request size limit for the enrollment endpoint
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+MIN_PARALLEL_BATCH = 8  # smaller batches are not worth starting worker processes for
+WINDOW = 256  # photos decoded and held in memory at a time
+MIN_FACE_PIXELS = 100  # face bounding box must be at least this wide and tall
+MIN_SHARPNESS = 30.0  # variance of the Laplacian over the face; lower means blurred
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+JOB_KIND = 'enroll_photos'
+ARCHIVE_NAME = 'archive.zip'  # inside a saved batch directory, next to a photos/ directory
+
+
+def _new_enrollment_mesh():
+    import mediapipe as mp
+    # Two faces so photos with more than one person can be rejected rather than guessed at
+    return mp.solutions.face_mesh.FaceMesh(static_image_mode=True, max_num_faces=2)
+
+
+_pool = FaceMeshPool(size=1, factory=_new_enrollment_mesh)
+
+
+def _init_worker():
+    cv2.setNumThreads(1)  # one process per core already
+
+
+def photo_key(filename):
+    """Attendee key of a photo file name: an int id, a lower-cased email, or None."""
+    stem = os.path.splitext(os.path.basename(filename))[0].strip()
+    if stem.isdigit():
+        return int(stem)
+    if '@' in stem:
+        return stem.lower()
+    return None
+
+
+def save_batch(files, directory):
+    """
+    Save the request's 'archive' ZIP and 'photos' uploads into directory for a background
+    job to enroll. Returns how many uploads were saved; raises zipfile.BadZipFile if the
+    archive is not a ZIP.
+    """
+    saved = 0
+    archive = files.get('archive')
+    if archive and archive.filename:
+        path = os.path.join(directory, ARCHIVE_NAME)
+        archive.save(path)
+        if not zipfile.is_zipfile(path):
+            raise zipfile.BadZipFile(f'{archive.filename} is not a ZIP file')
+        saved += 1
+    photos_dir = os.path.join(directory, 'photos')
+    for i, file in enumerate(files.getlist('photos')):
+        if file and file.filename:
+            os.makedirs(photos_dir, exist_ok=True)
+            # The sequence prefix keeps upload order and makes any client file name safe to use
+            file.save(os.path.join(photos_dir, f'{i:06d}_{os.path.basename(file.filename)}'))
+            saved += 1
+    return saved
+
+
+def iter_saved_batch(directory):
+    """
+    Yield (filename, bytes-or-None) for every image in a batch saved by save_batch: the
+    entries of the archive, then each photo. Photos over the per-photo size limit yield None.
+    Entries are read one at a time so a large archive is never held in memory at once.
+    """
+    archive_path = os.path.join(directory, ARCHIVE_NAME)
+    if os.path.exists(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or name.startswith('.') or '__MACOSX' in info.filename:
+                    continue
+                if not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                too_large = info.file_size > image_io.MAX_UPLOAD_BYTES
+                yield name, None if too_large else zf.read(info)
+    photos_dir = os.path.join(directory, 'photos')
+    if os.path.isdir(photos_dir):
+        for saved_name in sorted(os.listdir(photos_dir)):
+            with open(os.path.join(photos_dir, saved_name), 'rb') as f:
+                data = f.read(image_io.MAX_UPLOAD_BYTES + 1)
+            yield saved_name.split('_', 1)[1], None if len(data) > image_io.MAX_UPLOAD_BYTES else data
+
+
+def assess(img, faces):
+    """
+    Status of a decoded photo given FaceMesh's multi_face_landmarks: 'ok', 'no_face',
+    'multiple_faces' or 'low_quality', with a human-readable detail.
+    """
+    if not faces:
+        return 'no_face', 'No face detected'
+    if len(faces) > 1:
+        return 'multiple_faces', f'{len(faces)} faces detected'
+    height, width = img.shape[:2]
+    points = np.array([(lm.x, lm.y) for lm in faces[0].landmark], dtype=np.float32)
+    x0, y0 = np.clip(points.min(axis=0), 0, 1) * (width, height)
+    x1, y1 = np.clip(points.max(axis=0), 0, 1) * (width, height)
+    if min(x1 - x0, y1 - y0) < MIN_FACE_PIXELS:
+        return 'low_quality', f'Face is only {int(x1 - x0)}x{int(y1 - y0)} px'
+    crop = cv2.cvtColor(img[int(y0):int(y1), int(x0):int(x1)], cv2.COLOR_BGR2GRAY)
+    sharpness = float(cv2.Laplacian(crop, cv2.CV_64F).var())
+    if sharpness < MIN_SHARPNESS:
+        return 'low_quality', f'Photo is blurred (sharpness {sharpness:.0f})'
+    return 'ok', None
+
+
+def extract_template(photo):
+    """
+    Process one (filename, bytes) photo. Returns (status, detail, template bytes or None).
+    Runs in a worker process; each worker keeps its own FaceMesh.
+    """
+    filename, data = photo
+    if data is None:
+        return 'too_large', f'Photo is over {image_io.MAX_UPLOAD_BYTES // (1024 * 1024)} MB', None
+    img = image_io.decode_bytes(data)
+    if img is None:
+        return 'unreadable', 'Not a readable image', None
+    with _pool.acquire() as face_mesh:
+        results = face_mesh.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    status, detail = assess(img, results.multi_face_landmarks)
+    if status != 'ok':
+        return status, detail, None
+    return 'enrolled', None, face_templates.encode(face_templates.from_face_mesh(results.multi_face_landmarks[0]))
+
+
+class TemplateExtractor:
+    """
+    Callable that runs extract_template over a list of photos. Small lists run in-process;
+    the first large one starts a pool of worker processes, which later calls reuse until
+    close(). Safe to share between request threads.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __call__(self, photos):
+        if self._executor is None and len(photos) < MIN_PARALLEL_BATCH:
+            return [extract_template(photo) for photo in photos]
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the web worker has threads (job runner, pools) that fork would copy mid-state
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            executor = self._executor
+        return list(executor.map(extract_template, photos, chunksize=max(1, len(photos) // (self.max_workers * 4))))
+
+    def close(self):
+        """Shut down the worker processes, if any were started."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def shared_extractor():
+    """
+    This process's TemplateExtractor, created on first use. Its worker processes (and the
+    MediaPipe import each one pays) are kept for every later batch and shut down at exit.
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = TemplateExtractor()
+            atexit.register(_extractor.close)
+        return _extractor
+
+
+def enroll(conn, event_id, photos, extractor=None):
+    """
+    Enroll (filename, bytes) photos for an event's attendees, extracting templates WINDOW
+    photos at a time (with the shared extractor unless one is given), then writing them
+    all in one transaction.
+    Returns {'summary': {status: count}, 'photos': [per-photo report]}.
+    """
+    attendees = conn.execute('SELECT id, email FROM attendees WHERE event_id = ?', (event_id,)).fetchall()
+    by_id = {row['id']: row['id'] for row in attendees}
+    by_email = {row['email'].lower(): row['id'] for row in attendees if row['email']}
+    report, window, templates, seen = [], [], [], set()
+
+    def flush(extract):
+        for (entry, _), (status, detail, template) in zip(window, extract([photo for _, photo in window])):
+            entry['status'], entry['detail'] = status, detail
+            if template is not None:
+                templates.append((template, entry['attendee_id']))
+        window.clear()
+
+    extract = extractor or shared_extractor()
+    for filename, data in photos:
+        key = photo_key(filename)
+        attendee_id = (by_id if isinstance(key, int) else by_email).get(key)
+        entry = {'filename': filename, 'attendee_id': attendee_id, 'status': None, 'detail': None}
+        report.append(entry)
+        if attendee_id is None:
+            entry['status'], entry['detail'] = 'unknown_attendee', 'File name is not an attendee id or email of this event'
+        elif attendee_id in seen:
+            entry['status'], entry['detail'] = 'duplicate', 'Another photo in this batch is for the same attendee'
+        else:
+            seen.add(attendee_id)
+            window.append((entry, (filename, data)))
+            if len(window) >= WINDOW:
+                flush(extract)
+    flush(extract)
+    with conn:
+        conn.executemany('UPDATE attendees SET face_encoding = ?, face_landmarks = NULL WHERE id = ?', templates)
+    for template, attendee_id in templates:
+        face_index.update(event_id, attendee_id, face_templates.decode(template))
+    return {'summary': dict(Counter(entry['status'] for entry in report)), 'photos': report}
+
+
+def enroll_saved_batch(job, connect, event_id, directory, extractor=None):
+    """
+    Background job: enroll a batch saved by save_batch for the event, using a connection
+    from connect(), then delete the batch directory. Returns the enroll() report.
+    """
+    conn = connect()
+    try:
+        return enroll(conn, event_id, iter_saved_batch(directory), extractor=extractor)
+    finally:
+        conn.close()
+        shutil.rmtree(directory, ignore_errors=True)
@@ -1,115 +1,88 @@
-import cv2
-import mediapipe as mp
+import os
 import sqlite3
-from datetime import datetime
-import numpy as np
+
+from . import attendance, enrollment
+from .capture import FaceDetector, MotionDetector, wait_for_detection
+from .face_index import FaceIndex
 
 DB_PATH = 'event_management.db'
+CHECKED_IN = 'Checked In'  # the status web check-ins write; the method goes in checkin_method
+
+def load_event_faces(event_id, db_path=None):
+    """
+    Load an event's attendee face templates once for a recognition session.
+    Returns (FaceIndex, {attendee_id: name}).
+    """
+    conn = sqlite3.connect(db_path or DB_PATH)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM attendees WHERE event_id = ?", (event_id,)).fetchall()
+    conn.close()
+    return FaceIndex.from_rows(rows), {row['id']: row['name'] for row in rows}
+
+
+def attendance_writer():
+    """The desktop app's attendance writer; the first call prepares the attendees schema."""
+    return attendance.get_writer(DB_PATH)
+
+
+def check_in_attendees(attendee_ids, method):
+    """
+    Queue existing attendee rows to be marked as checked in; they are written together in the next flush.
+    """
+    writer = attendance_writer()
+    for attendee_id in attendee_ids:
+        writer.record(None, None, CHECKED_IN, attendee_id=attendee_id, method=method)
+
 
 def log_attendance(username, method, event_id):
     """
     Log check-in attendance for the user with timestamp and method (face/motion) for a specific event.
+    Repeated check-ins update the user's existing row for the event.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    # Add timestamp column if not exists
-    try:
-        cursor.execute("ALTER TABLE attendees ADD COLUMN timestamp TEXT")
-    except sqlite3.OperationalError:
-        pass  # Already exists
-    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    cursor.execute("""
-        INSERT INTO attendees (event_id, name, status, role, previous_attendance_rate, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (event_id, username, f"checked_in_{method}", 'attendee', 1.0, now))
-    conn.commit()
-    conn.close()
+    attendance_writer().record(event_id, username, CHECKED_IN, method=method)
 
 
-def detect_face_via_webcam(timeout=10):
+def enroll_photo(attendee_id, path, db_path=None):
     """
-    Opens webcam, detects a face using MediaPipe, returns True if face detected within timeout seconds.
+    Store the face template of the photo at path as the attendee's reference for face check-in.
+    Returns (status, detail) as in the web app's bulk enrollment report ('enrolled', 'no_face', ...).
     """
-    mp_face = mp.solutions.face_detection
-    mp_draw = mp.solutions.drawing_utils
-    cap = cv2.VideoCapture(0)
-    detected = False
-    with mp_face.FaceDetection(model_selection=0, min_detection_confidence=0.7) as face_detection:
-        start_time = cv2.getTickCount()
-        freq = cv2.getTickFrequency()
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = face_detection.process(rgb)
-            if results.detections:
-                for detection in results.detections:
-                    mp_draw.draw_detection(frame, detection)
-                detected = True
-                cv2.putText(frame, 'Face detected! Press Q to confirm.', (30, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
-            else:
-                cv2.putText(frame, 'No face detected', (30, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-            cv2.imshow('Face Check-In', frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-            elapsed = (cv2.getTickCount() - start_time) / freq
-            if elapsed > timeout:
-                break
-    cap.release()
-    cv2.destroyAllWindows()
-    return detected
-
-
-def detect_motion_via_webcam(timeout=10, min_area=5000):
+    with open(path, 'rb') as f:
+        data = f.read(enrollment.image_io.MAX_UPLOAD_BYTES + 1)
+    if len(data) > enrollment.image_io.MAX_UPLOAD_BYTES:
+        data = None
+    status, detail, template = enrollment.extract_template((os.path.basename(path), data))
+    if template is not None:
+        conn = sqlite3.connect(db_path or DB_PATH)
+        with conn:
+            conn.execute('UPDATE attendees SET face_encoding = ?, face_landmarks = NULL WHERE id = ?', (template, attendee_id))
+        conn.close()
+    return status, detail
+
+
+def detect_face_via_webcam(timeout=10, source=0):
+    """
+    Watch the webcam (or a video file) for up to timeout seconds. Returns True if a face is detected.
+    """
+    return wait_for_detection(FaceDetector(), source=source, timeout=timeout) is not None
+
+
+def detect_motion_via_webcam(timeout=10, source=0, min_area_fraction=0.016):
     """
-    Opens webcam, detects motion. Returns True if significant motion detected within timeout seconds.
+    Watch the webcam (or a video file) for up to timeout seconds. Returns True if significant motion is detected.
     """
-    cap = cv2.VideoCapture(0)
-    detected = False
-    first_frame = None
-    start_time = cv2.getTickCount()
-    freq = cv2.getTickFrequency()
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.GaussianBlur(gray, (21, 21), 0)
-        if first_frame is None:
-            first_frame = gray
-            continue
-        frame_delta = cv2.absdiff(first_frame, gray)
-        thresh = cv2.threshold(frame_delta, 25, 255, cv2.THRESH_BINARY)[1]
-        thresh = cv2.dilate(thresh, None, iterations=2)
-        cnts, _ = cv2.findContours(thresh.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        for c in cnts:
-            if cv2.contourArea(c) > min_area:
-                detected = True
-                (x, y, w, h) = cv2.boundingRect(c)
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-        status_text = 'Motion detected! Press Q to confirm.' if detected else 'No motion detected.'
-        color = (0,255,0) if detected else (0,0,255)
-        cv2.putText(frame, status_text, (30, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-        cv2.imshow('Motion Check-In', frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-        elapsed = (cv2.getTickCount() - start_time) / freq
-        if elapsed > timeout:
-            break
-    cap.release()
-    cv2.destroyAllWindows()
-    return detected
+    return wait_for_detection(MotionDetector(min_area_fraction), source=source, timeout=timeout) is not None
 
 if __name__ == "__main__":
     username = input("Enter username for demo logging: ")
+    event_id = int(input("Event id: "))
     method = input("Type 'face' or 'motion': ").strip()
     if method == 'face':
         result = detect_face_via_webcam()
     else:
         result = detect_motion_via_webcam()
     if result:
-        log_attendance(username, method)
+        log_attendance(username, method, event_id)
         print("Check-in successful!")
     else:
         print("Check-in failed.")
@@ -0,0 +1,187 @@
+"""
+In-memory 1:N face identification for event check-in.
+
+Each event's attendee templates are held in one contiguous (N, 468, 3) float32 matrix so a
+probe face is compared against every attendee in a single vectorised operation. An index is
+built from the database the first time an event is checked into by this worker, then kept
+up to date as attendees are added, removed or re-photographed here. Changes made by other
+workers are picked up when the index expires after INDEX_TTL seconds.
+"""
+import threading
+import time
+
+import numpy as np
+
+from . import face_templates
+
+INDEX_TTL = 300
+BLOCK_ROWS = 256  # templates compared per step; bounds scratch memory at BLOCK_ROWS x probes x 5.6 KB
+
+
+class FaceIndex:
+    """Attendee id -> face template matrix with vectorised nearest-neighbour search."""
+
+    def __init__(self, shape=(face_templates.LANDMARKS, 3), capacity=16):
+        self.shape = tuple(shape)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._templates = np.empty((capacity, *self.shape), dtype=np.float32)
+        self._positions = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, attendee_id):
+        return attendee_id in self._positions
+
+    def upsert(self, attendee_id, template):
+        """Add an attendee's template, or replace it if they are already indexed."""
+        template = np.asarray(template, dtype=np.float32)
+        if template.shape != self.shape:
+            raise ValueError(f'Template shape {template.shape} does not match index shape {self.shape}')
+        with self._lock:
+            position = self._positions.get(attendee_id)
+            if position is None:
+                if self._size == len(self._ids):
+                    self._grow()
+                position = self._size
+                self._size += 1
+                self._ids[position] = attendee_id
+                self._positions[attendee_id] = position
+            self._templates[position] = template
+
+    def remove(self, attendee_id):
+        """Drop an attendee from the index (no-op if they are not indexed)."""
+        with self._lock:
+            position = self._positions.pop(attendee_id, None)
+            if position is None:
+                return
+            last = self._size - 1
+            if position != last:
+                # Keep the matrix dense by moving the last row into the freed slot
+                moved_id = int(self._ids[last])
+                self._ids[position] = moved_id
+                self._templates[position] = self._templates[last]
+                self._positions[moved_id] = position
+            self._size = last
+
+    def _grow(self):
+        capacity = max(2 * len(self._ids), 16)
+        ids = np.empty(capacity, dtype=np.int64)
+        templates = np.empty((capacity, *self.shape), dtype=np.float32)
+        ids[:self._size] = self._ids[:self._size]
+        templates[:self._size] = self._templates[:self._size]
+        self._ids, self._templates = ids, templates
+
+    def _distance_matrix(self, probes):
+        """
+        Mean landmark distance from each of M probes to every indexed template, as
+        (ids, (M, N) distances). Templates are compared BLOCK_ROWS at a time, so the
+        per-landmark differences never exist for the whole index at once.
+        """
+        with self._lock:
+            ids = self._ids[:self._size].copy()
+            distances = np.empty((len(probes), self._size), dtype=np.float32)
+            for start in range(0, self._size, BLOCK_ROWS):
+                stop = min(start + BLOCK_ROWS, self._size)
+                diff = self._templates[None, start:stop] - probes[:, None]
+                distances[:, start:stop] = np.sqrt(np.einsum('mnlk,mnlk->mnl', diff, diff)).mean(axis=2)
+        return ids, distances
+
+    def distances(self, probe):
+        """Mean landmark distance from probe to every indexed template, as (ids, distances)."""
+        ids, distances = self._distance_matrix(np.asarray(probe, dtype=np.float32)[None])
+        return ids, distances[0]
+
+    def identify(self, probe, threshold=face_templates.MATCH_THRESHOLD):
+        """Return (attendee_id, distance) of the closest template under threshold, or None."""
+        if np.shape(probe) != self.shape:
+            return None
+        ids, distances = self.distances(probe)
+        if not len(ids):
+            return None
+        best = int(np.argmin(distances))
+        if distances[best] >= threshold:
+            return None
+        return int(ids[best]), float(distances[best])
+
+    def identify_many(self, probes, threshold=face_templates.MATCH_THRESHOLD):
+        """
+        Match several faces from one frame at once. Returns a list of (probe position,
+        attendee_id, distance) for the probes that match, closest pairs first; each attendee
+        is matched to at most one probe.
+        """
+        probes = np.asarray(probes, dtype=np.float32)
+        if probes.ndim != 3 or probes.shape[1:] != self.shape:
+            return []
+        ids, distances = self._distance_matrix(probes)
+        if not len(ids):
+            return []
+        matches, used_probes, used_ids = [], set(), set()
+        for flat in np.argsort(distances, axis=None):
+            probe, position = np.unravel_index(flat, distances.shape)
+            if distances[probe, position] >= threshold:
+                break
+            if probe in used_probes or position in used_ids:
+                continue
+            used_probes.add(probe)
+            used_ids.add(position)
+            matches.append((int(probe), int(ids[position]), float(distances[probe, position])))
+        return matches
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build an index from attendee rows with id and face_encoding/face_landmarks columns."""
+        index = cls()
+        for row in rows:
+            try:
+                template = face_templates.from_row(row)
+                if template is not None:
+                    index.upsert(row['id'], template)
+            except (ValueError, TypeError):
+                continue  # unreadable or wrong-shape reference; that attendee can use 1:1 check-in
+        return index
+
+
+_indexes = {}  # event_id -> (FaceIndex, built_at)
+_indexes_lock = threading.Lock()
+
+
+def get_index(conn, event_id):
+    """Return the face index for an event, building it from the database with conn if needed."""
+    with _indexes_lock:
+        entry = _indexes.get(event_id)
+    if entry and time.monotonic() - entry[1] < INDEX_TTL:
+        return entry[0]
+    rows = conn.execute('SELECT id, face_encoding, face_landmarks FROM attendees WHERE event_id = ? '
+                        'AND (face_encoding IS NOT NULL OR face_landmarks IS NOT NULL)', (event_id,)).fetchall()
+    index = FaceIndex.from_rows(rows)
+    with _indexes_lock:
+        _indexes[event_id] = (index, time.monotonic())
+    return index
+
+
+def update(event_id, attendee_id, template):
+    """Add or replace an attendee's template in the event's index, if this worker has built it."""
+    with _indexes_lock:
+        entry = _indexes.get(event_id)
+    if entry:
+        entry[0].upsert(attendee_id, template)
+
+
+def remove(event_id, attendee_id):
+    """Remove an attendee from the event's index, if this worker has built it."""
+    with _indexes_lock:
+        entry = _indexes.get(event_id)
+    if entry:
+        entry[0].remove(attendee_id)
+
+
+def drop(event_id=None):
+    """Forget the index of one event, or of every event if event_id is None."""
+    with _indexes_lock:
+        if event_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(event_id, None)
@@ -0,0 +1,116 @@
+"""
+Pool of initialised MediaPipe FaceMesh detectors shared by the photo routes.
+
+Building a FaceMesh loads its TFLite graph, which costs far more than running it on one
+photo, so each worker keeps a few instances alive and lends them out one request at a time
+(a FaceMesh is not safe to use from two threads at once). The pool size bounds how many
+photos a worker landmarks concurrently; further requests wait up to ACQUIRE_TIMEOUT seconds
+for a free detector.
+"""
+import logging
+import os
+import queue
+import threading
+from contextlib import ExitStack, contextmanager
+
+from .lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+face_templates = lazy_import(f'{__package__}.face_templates')
+
+log = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get('FACE_MESH_POOL_SIZE', 2))
+ACQUIRE_TIMEOUT = 30  # seconds
+
+
+class DetectorBusy(TimeoutError):
+    """Raised when no detector became free within the acquire timeout."""
+
+
+def _new_face_mesh():
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(static_image_mode=True, max_num_faces=1)
+
+
+class FaceMeshPool:
+    """Bounded, lazily filled pool of FaceMesh instances for one process."""
+
+    def __init__(self, size=POOL_SIZE, factory=_new_face_mesh):
+        self.size = size
+        self._factory = factory
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    @contextmanager
+    def acquire(self, timeout=ACQUIRE_TIMEOUT):
+        """Borrow a detector for the duration of the with block."""
+        if os.getpid() != self._pid:
+            self._reset()  # detectors built before a fork belong to the parent process
+        slots = self._slots
+        if not slots.acquire(timeout=timeout):
+            raise DetectorBusy('All face detectors are busy. Please try again.')
+        try:
+            try:
+                detector = self._idle.get_nowait()
+            except queue.Empty:
+                detector = self._factory()
+            try:
+                yield detector
+            except Exception:
+                detector.close()  # its graph may be left in a bad state; build a fresh one next time
+                raise
+            self._idle.put(detector)
+        finally:
+            slots.release()
+
+    def warm_up(self, count=None):
+        """Build up to count detectors (default: the pool size) and run each once on a blank frame."""
+        blank = np.zeros((64, 64, 3), dtype=np.uint8)
+        count = min(count or self.size, self.size)
+        with ExitStack() as stack:
+            # Hold all of them at once so each warm-up builds a new detector
+            detectors = [stack.enter_context(self.acquire()) for _ in range(count)]
+            for detector in detectors:
+                detector.process(blank)
+
+    def close(self):
+        """Close the idle detectors."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool = FaceMeshPool()
+
+
+def get_pool():
+    return _pool
+
+
+def detect_landmarks(bgr_image, pool=None):
+    """Face template (468, 3) float32 for the first face in a BGR image, or None if no face is found."""
+    with (pool or _pool).acquire() as face_mesh:
+        results = face_mesh.process(cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB))
+    if not results.multi_face_landmarks:
+        return None
+    return face_templates.from_face_mesh(results.multi_face_landmarks[0])
+
+
+def warm_up_in_background(pool=None):
+    """Warm the pool on a daemon thread so startup is not blocked by loading the model."""
+    def run():
+        try:
+            (pool or _pool).warm_up()
+        except Exception:
+            log.exception('FaceMesh warm-up failed')
+    thread = threading.Thread(target=run, name='face-mesh-warmup', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,80 @@
+"""
+Compact binary storage for FaceMesh face templates.
+
+A template is the (468, 3) array of normalised landmark coordinates FaceMesh returns for
+one face. It is stored in attendees.face_encoding as a 16-byte header followed by the raw
+little-endian float values:
+
+    magic b'FTPL' | format version (u8) | dtype code (u8) | rows (u16) | cols (u16) | padding
+
+The header keeps the BLOB self-describing (so float16 templates or a different landmark
+model can be added later) and the padding keeps the data 16-byte aligned, so decode() can
+wrap the bytes returned by sqlite3 with np.frombuffer without copying them.
+"""
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'FTPL'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBHH6x')
+DTYPES = {1: np.dtype('<f4'), 2: np.dtype('<f2')}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+LANDMARKS = 468  # FaceMesh points per face, without iris refinement
+MATCH_THRESHOLD = 0.03  # mean landmark distance below which two templates are the same face
+
+
+def encode(landmarks, dtype=np.float32):
+    """Serialise a (rows, cols) landmark array to template bytes."""
+    dtype = np.dtype(dtype).newbyteorder('<')
+    array = np.ascontiguousarray(landmarks, dtype=dtype)
+    if array.ndim != 2:
+        raise ValueError(f'Expected a 2-D landmark array, got shape {array.shape}')
+    rows, cols = array.shape
+    return HEADER.pack(MAGIC, FORMAT_VERSION, DTYPE_CODES[dtype], rows, cols) + array.tobytes()
+
+
+def decode(blob):
+    """
+    Return the (rows, cols) landmark array stored in template bytes. The array is a
+    read-only view on blob; float16 templates are widened to float32.
+    """
+    if blob is None or len(blob) < HEADER.size:
+        raise ValueError('Face template is empty or truncated')
+    magic, version, dtype_code, rows, cols = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != FORMAT_VERSION or dtype_code not in DTYPES:
+        raise ValueError('Unrecognised face template format')
+    dtype = DTYPES[dtype_code]
+    if len(blob) != HEADER.size + rows * cols * dtype.itemsize:
+        raise ValueError('Face template length does not match its header')
+    array = np.frombuffer(blob, dtype=dtype, count=rows * cols, offset=HEADER.size).reshape(rows, cols)
+    return array if dtype_code == 1 else array.astype(np.float32)
+
+
+def from_face_mesh(face_landmarks):
+    """Template array for one face from a FaceMesh result (results.multi_face_landmarks[i])."""
+    return np.array([(lm.x, lm.y, lm.z) for lm in face_landmarks.landmark], dtype=np.float32)
+
+
+def from_json(text):
+    """Template array from the legacy JSON list of [x, y, z] stored in attendees.face_landmarks."""
+    return np.asarray(json.loads(text), dtype=np.float32)
+
+
+def from_row(row):
+    """
+    Template array for an attendee row, or None if the attendee has no reference face.
+    Rows written before templates were stored as BLOBs fall back to face_landmarks JSON.
+    """
+    keys = row.keys()
+    if 'face_encoding' in keys and row['face_encoding']:
+        return decode(row['face_encoding'])
+    if 'face_landmarks' in keys and row['face_landmarks']:
+        return from_json(row['face_landmarks'])
+    return None
+
+
+def distance(a, b):
+    """Mean Euclidean distance between corresponding landmarks of two templates."""
+    return float(np.mean(np.linalg.norm(a - b, axis=1)))
@@ -0,0 +1,60 @@
+"""
+Decoding of uploaded and webcam photos straight from memory.
+
+Photos are decoded with cv2.imdecode from the request body rather than being written to a
+temporary file and read back, and anything larger than MAX_IMAGE_SIDE pixels on its long
+edge is downscaled before landmarking: FaceMesh works on a 192x192 crop, so full-resolution
+phone photos only cost decode and resize time.
+"""
+import base64
+import binascii
+
+from .lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+MAX_IMAGE_SIDE = 1280
+MAX_UPLOAD_BYTES = 16 * 1024 * 1024  # Flask MAX_CONTENT_LENGTH for the photo routes
+
+
+def decode_bytes(data, max_side=MAX_IMAGE_SIDE):
+    """Decode encoded image bytes (JPEG, PNG, ...) to a BGR array, or None if they are not an image."""
+    if not data:
+        return None
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    return downscale(img, max_side)
+
+
+def decode_data_url(data_url, max_side=MAX_IMAGE_SIDE):
+    """Decode a 'data:image/...;base64,...' URL as posted by the webcam capture forms."""
+    if not data_url or not data_url.startswith('data:image') or ',' not in data_url:
+        return None
+    try:
+        data = base64.b64decode(data_url.split(',', 1)[1])
+    except (binascii.Error, ValueError):
+        return None
+    return decode_bytes(data, max_side)
+
+
+def downscale(img, max_side=MAX_IMAGE_SIDE):
+    """Shrink img so its longer side is at most max_side pixels, keeping the aspect ratio."""
+    height, width = img.shape[:2]
+    longest = max(height, width)
+    if not max_side or longest <= max_side:
+        return img
+    scale = max_side / longest
+    return cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+
+
+def read_photo(files, form, file_field='photo', webcam_field='webcam_photo'):
+    """
+    Return the BGR image submitted with a request: the uploaded file if one was chosen,
+    otherwise the webcam capture. None if neither holds a decodable image.
+    """
+    file = files.get(file_field)
+    if file and file.filename:
+        return decode_bytes(file.read())
+    return decode_data_url(form.get(webcam_field))
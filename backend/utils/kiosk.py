@@ -0,0 +1,148 @@
+"""
+Continuous check-in for a kiosk tablet streaming camera frames over one connection.
+
+The client sends small JPEG frames as fast as it likes; frames land in a single-slot
+buffer and a detection thread always works on the newest one, so a frame that arrives
+while detection is busy replaces the one still waiting rather than queueing behind it.
+Results go back to the client as small JSON messages.
+
+The transport is abstracted as two callables so the loop can run over a WebSocket (see
+the /ws/kiosk route) or be driven directly in tests.
+"""
+import json
+import logging
+import threading
+
+from . import face_index, face_mesh_pool, face_templates, image_io
+
+log = logging.getLogger(__name__)
+
+FRAME_MAX_SIDE = 640  # kiosk frames are sent at about 320 px; anything bigger is shrunk first
+
+
+class LatestFrame:
+    """Single-slot frame buffer: put() overwrites any frame that has not been taken yet."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        with self._cond:
+            self.received += 1
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self._cond.notify()
+
+    def take(self):
+        """Block until a frame is available and return it, or return None once closed."""
+        with self._cond:
+            while self._frame is None and not self._closed:
+                self._cond.wait()
+            frame, self._frame = self._frame, None
+            return frame
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def run_session(receive, send, recognise):
+    """
+    Serve one kiosk connection until receive() returns None.
+
+    receive() returns the next frame (JPEG bytes) from the client; send(text) pushes a
+    message to it; recognise(frame) returns a JSON-serialisable result dict for one frame.
+    Returns the LatestFrame buffer, whose counters show how many frames were dropped.
+    """
+    slot = LatestFrame()
+    send_lock = threading.Lock()
+
+    def push(message):
+        with send_lock:
+            send(json.dumps(message))
+
+    def detect():
+        while True:
+            frame = slot.take()
+            if frame is None:
+                return
+            try:
+                result = recognise(frame)
+            except Exception as e:
+                # Frames arrive several times a second; one bad camera must not flood the log
+                log.exception('Kiosk recognition failed', extra={'sample_every': 100})
+                result = {'status': 'error', 'message': str(e)}
+            result['dropped'] = slot.dropped
+            try:
+                push(result)
+            except Exception:
+                return  # client went away; the receive loop will notice too
+
+    worker = threading.Thread(target=detect, name='kiosk-detect', daemon=True)
+    worker.start()
+    try:
+        push({'status': 'ready'})
+        while True:
+            frame = receive()
+            if frame is None:
+                break
+            if isinstance(frame, str):
+                continue  # text messages (keep-alives) carry no frame
+            slot.put(frame)
+    finally:
+        slot.close()
+        worker.join()
+        log.info('Kiosk session ended: %d frames received, %d dropped', slot.received, slot.dropped)
+    return slot
+
+
+def same_origin(origin, host_url):
+    """
+    True if a WebSocket handshake's Origin header names this site (request.host_url).
+    Browsers send cookies with cross-site WebSocket handshakes, so without this check any
+    page a logged-in user visits could open a kiosk session as them.
+    """
+    return bool(origin) and origin.rstrip('/').lower() == host_url.rstrip('/').lower()
+
+
+def check_in_frame(connect, event_id, frame, writer=None):
+    """
+    Identify the face in one JPEG frame among the event's attendees and check them in.
+    connect() returns a database connection; with an AttendanceWriter the check-in is
+    queued on it instead of being committed here. Returns a result dict whose 'status' is
+    'match', 'already_checked_in', 'no_match', 'no_face', 'bad_frame' or 'busy'.
+    """
+    img = image_io.decode_bytes(frame, max_side=FRAME_MAX_SIDE)
+    if img is None:
+        return {'status': 'bad_frame'}
+    try:
+        probe = face_mesh_pool.detect_landmarks(img)
+    except face_mesh_pool.DetectorBusy:
+        return {'status': 'busy'}
+    if probe is None:
+        return {'status': 'no_face'}
+    conn = connect()
+    try:
+        match = face_index.get_index(conn, event_id).identify(probe)
+        attendee = conn.execute('SELECT id, name, status FROM attendees WHERE id = ? AND event_id = ?',
+                                (match[0], event_id)).fetchone() if match else None
+        if attendee is None:
+            return {'status': 'no_match'}
+        result = {'attendee_id': attendee['id'], 'name': attendee['name'],
+                  'similarity': round(1 - match[1] / face_templates.MATCH_THRESHOLD, 2)}
+        if attendee['status'] == 'Checked In':
+            return {'status': 'already_checked_in', **result}
+        if writer is not None:
+            writer.record(event_id, attendee['name'], 'Checked In', attendee_id=attendee['id'], method='face')
+        else:
+            conn.execute('UPDATE attendees SET status = ? WHERE id = ?', ('Checked In', attendee['id']))
+            conn.commit()
+        return {'status': 'match', **result}
+    finally:
+        conn.close()
@@ -0,0 +1,137 @@
+"""
+Deferred imports for the heavy ML/CV dependencies.
+
+numpy, OpenCV, pandas, scikit-learn, matplotlib and MediaPipe together take seconds and
+hundreds of MB to import, yet most requests (login, dashboards, the calendar) never touch
+them. Modules that need them bind a LazyModule instead:
+
+    cv2 = lazy_import('cv2')
+
+and the real import happens on first attribute access, so a web worker only pays for what
+its requests actually use. preload() imports them up front instead, for deployments that
+would rather pay at startup than on a first request. Every import made through here is
+timed; import_report() lists the cost per module.
+
+Run directly for a report of what importing the web app costs, module by module:
+
+    python backend/utils/lazy.py ['import app']
+"""
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Imported by preload(), in this order (later ones reuse the earlier ones)
+HEAVY_MODULES = ('numpy', 'cv2', 'pandas', 'sklearn', 'joblib', 'matplotlib', 'mediapipe')
+
+_import_times = {}  # module name -> {'seconds': float, 'trigger': str}
+_lock = threading.RLock()
+
+
+def _load(name, trigger):
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None and name in _import_times:
+            return module
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        # Modules another import already pulled in cost nothing here, which is worth knowing too
+        _import_times.setdefault(name, {'seconds': time.perf_counter() - started, 'trigger': trigger})
+        return module
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access."""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _resolve(self, trigger='attribute access'):
+        module = self.__dict__['_module']
+        if module is None:
+            module = _load(self.__dict__['_name'], trigger)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._resolve(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name):
+    """Return a LazyModule for name (an absolute module name, e.g. 'cv2' or 'ml.training')."""
+    return LazyModule(name)
+
+
+def load(module):
+    """Import a LazyModule now (plain modules are returned unchanged)."""
+    return module._resolve('preload') if isinstance(module, LazyModule) else module
+
+
+def preload(names=HEAVY_MODULES):
+    """
+    Import modules ahead of the first request that needs them. Modules that are not
+    installed are skipped. Returns the names that failed to import.
+    """
+    failed = []
+    for name in names:
+        try:
+            _load(name, 'preload')
+        except ImportError:
+            failed.append(name)
+    return failed
+
+
+def import_report():
+    """[{'module', 'seconds', 'trigger'}] for every import made through this module, costliest first."""
+    with _lock:
+        rows = [{'module': name, **info} for name, info in _import_times.items()]
+    return sorted(rows, key=lambda row: row['seconds'], reverse=True)
+
+
+def importtime_report(statement='import app', cwd=None):
+    """
+    Import cost of running statement in a fresh interpreter, from python -X importtime.
+    Returns (direct, heavy): [(module, cumulative seconds)] for each module imported
+    directly by the imported module, and for each HEAVY_MODULES package wherever it was
+    first imported, costliest first.
+    """
+    cwd = cwd or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=cwd,
+                            capture_output=True, text=True).stderr
+    direct, children, heavy = {}, {}, {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue  # column header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # importtime indents two spaces per level
+        name, seconds = name.strip(), int(cumulative) / 1e6
+        if depth == 1:
+            children[name] = seconds
+        elif depth == 0:
+            # A module is listed after its children; the last top-level one is the statement's
+            direct, children = children, {}
+        if name in HEAVY_MODULES:
+            heavy[name] = seconds
+    by_cost = lambda costs: sorted(costs.items(), key=lambda item: item[1], reverse=True)
+    return by_cost(direct), by_cost(heavy)
+
+
+if __name__ == '__main__':
+    statement = sys.argv[1] if len(sys.argv) > 1 else 'import app'
+    direct, heavy = importtime_report(statement)
+    print(f'Modules imported by `{statement}`, with everything they import in turn:')
+    for name, seconds in direct:
+        print(f'{seconds:8.3f} s  {name}')
+    print('Heavy dependencies loaded at import:', ', '.join(f'{name} ({seconds:.2f} s)' for name, seconds in heavy) or 'none')
@@ -175,7 +175,11 @@ class RegisterWindow:
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend', 'utils'))
-from backend.utils.face_checkin import detect_face_via_webcam, detect_motion_via_webcam, log_attendance
+import queue
+from backend import migrations
+from backend.utils import face_checkin
+from backend.utils.capture import CaptureEngine, FaceDetector, FaceRecognizer, MotionDetector
+from backend.utils.face_checkin import attendance_writer, check_in_attendees, enroll_photo, load_event_faces, log_attendance
 
 class DashboardWindow:
     def __init__(self, parent, username):
@@ -285,6 +289,8 @@ class DashboardWindow:
         self.edit_attendee_btn.pack(side=tk.LEFT, padx=4)
         self.delete_attendee_btn = ttk.Button(attendee_btns_frame, text="Delete Attendee", command=self.delete_attendee)
         self.delete_attendee_btn.pack(side=tk.LEFT, padx=4)
+        self.enroll_face_btn = ttk.Button(attendee_btns_frame, text="Enroll Face Photo", command=self.enroll_face)
+        self.enroll_face_btn.pack(side=tk.LEFT, padx=4)
 
         btns_frame = ttk.Frame(self.frame)
         btns_frame.pack(pady=4)
@@ -381,19 +387,89 @@ class DashboardWindow:
             return None
         return self.events[idx][0]
 
+    CHECKIN_TIMEOUT = 10  # seconds
+    RECOGNITION_TIMEOUT = 60  # seconds a doorway recognition session runs unless stopped
+    CHECKIN_POLL_MS = 100
+
     def handle_checkin(self, method):
         event_id = self.get_selected_event_id()
         if not event_id:
             messagebox.showwarning("Check-In", "Please select an event first.")
             return
-        if method == 'face':
-            result = detect_face_via_webcam()
+        if getattr(self, 'capture', None) and self.capture.running:
+            if method == 'face':
+                self.capture.stop()  # the face button doubles as "Stop Check-In" during recognition
+            return
+        if method == 'face' and self.start_recognition(event_id):
+            return
+        # Without enrolled faces, face check-in falls back to checking in whoever is logged in once a face is seen.
+        # Capture runs on its own thread; poll it from the Tk event loop so the window stays responsive
+        detector = FaceDetector() if method == 'face' else MotionDetector()
+        self.capture = CaptureEngine(detector, timeout=self.CHECKIN_TIMEOUT).start()
+        self.face_checkin_btn.state(['disabled'])
+        self.motion_checkin_btn.state(['disabled'])
+        self.top.after(self.CHECKIN_POLL_MS, self.poll_checkin, method, event_id)
+
+    def start_recognition(self, event_id):
+        # Templates are loaded once per session; every face in each frame is matched against all of them
+        index, self.checkin_names = load_event_faces(event_id)
+        if not len(index):
+            return False  # nobody to recognise; handle_checkin falls back to presence check-in
+        self.checked_in = []
+        self.capture = CaptureEngine(FaceRecognizer(index), timeout=self.RECOGNITION_TIMEOUT).start()
+        self.face_checkin_btn.config(text="Stop Check-In")
+        self.motion_checkin_btn.state(['disabled'])
+        self.top.after(self.CHECKIN_POLL_MS, self.poll_recognition)
+        return True
+
+    def poll_recognition(self):
+        new = []
+        while True:
+            try:
+                item = self.capture.results.get_nowait()
+            except queue.Empty:
+                break
+            for attendee_id, _ in item.result:
+                if attendee_id not in self.checked_in and attendee_id not in new:
+                    new.append(attendee_id)
+        if new:
+            # Everyone recognised since the last poll is written in one transaction
+            check_in_attendees(new, 'face')
+            attendance_writer().flush()
+            self.checked_in.extend(new)
+            self.update_attendance_history()
+        if self.capture.running:
+            self.top.after(self.CHECKIN_POLL_MS, self.poll_recognition)
+            return
+        self.face_checkin_btn.config(text="Face Check-In")
+        self.motion_checkin_btn.state(['!disabled'])
+        if self.capture.error:
+            messagebox.showerror("Check-In", f"Camera error: {self.capture.error}")
+        elif self.checked_in:
+            names = ", ".join(self.checkin_names.get(attendee_id, str(attendee_id)) for attendee_id in self.checked_in)
+            messagebox.showinfo("Check-In", f"Checked in {len(self.checked_in)}: {names}")
         else:
-            result = detect_motion_via_webcam()
-        if result:
+            messagebox.showwarning("Check-In", "No registered attendee was recognised.")
+
+    def poll_checkin(self, method, event_id):
+        try:
+            self.capture.results.get_nowait()
+            detected = True
+        except queue.Empty:
+            if self.capture.running:
+                self.top.after(self.CHECKIN_POLL_MS, self.poll_checkin, method, event_id)
+                return
+            detected = False
+        self.capture.stop()
+        self.face_checkin_btn.state(['!disabled'])
+        self.motion_checkin_btn.state(['!disabled'])
+        if detected:
             log_attendance(self.username, method, event_id)
+            attendance_writer().flush()
             messagebox.showinfo("Check-In", f"{method.capitalize()} detected! Check-in successful.")
             self.update_attendance_history()
+        elif self.capture.error:
+            messagebox.showerror("Check-In", f"Camera error: {self.capture.error}")
         else:
             messagebox.showwarning("Check-In", f"No {method} detected. Check-in failed.")
 
@@ -544,7 +620,7 @@ class DashboardWindow:
         cursor.execute("SELECT id, title FROM events")
         events = cursor.fetchall()
         for eid, title in events:
-            cursor.execute("SELECT COUNT(*), SUM(CASE WHEN status LIKE 'checked_in_face%' THEN 1 ELSE 0 END), SUM(CASE WHEN status LIKE 'checked_in_motion%' THEN 1 ELSE 0 END) FROM attendees WHERE event_id=?", (eid,))
+            cursor.execute("SELECT COUNT(*), SUM(CASE WHEN checkin_method = 'face' THEN 1 ELSE 0 END), SUM(CASE WHEN checkin_method = 'motion' THEN 1 ELSE 0 END) FROM attendees WHERE event_id=?", (eid,))
             total, face, motion = cursor.fetchone()
             tree.insert('', 'end', values=(title, total or 0, face or 0, motion or 0))
         # Export
@@ -657,6 +733,21 @@ class DashboardWindow:
         self.update_attendance_history()
         messagebox.showinfo("Delete Attendee", "Attendee deleted.")
 
+    def enroll_face(self):
+        from tkinter import filedialog
+        selected = self.attendance_tree.selection()
+        if not selected:
+            messagebox.showwarning("Enroll Face", "No attendee selected.")
+            return
+        path = filedialog.askopenfilename(title="Reference photo", filetypes=[("Images", "*.jpg *.jpeg *.png *.bmp *.webp")])
+        if not path:
+            return
+        status, detail = enroll_photo(int(selected[0]), path)
+        if status == 'enrolled':
+            messagebox.showinfo("Enroll Face", "Face enrolled; Face Check-In will now recognise this attendee.")
+        else:
+            messagebox.showwarning("Enroll Face", f"Photo not enrolled: {detail}")
+
     def logout(self):
         self.top.destroy()
         # Optionally, re-launch login window here
@@ -668,6 +759,7 @@ def launch_dashboard(username):
 if __name__ == "__main__":
     root = tk.Tk()
     root.withdraw()  # Hide root window until login succeeds
+    migrations.migrate(face_checkin.DB_PATH)  # face templates, check-in method and timestamp columns
     def on_login_success(username):
         root.deiconify()
         launch_dashboard(username)
@@ -1,37 +1,9 @@
-import sqlite3
+import os
+import sys
 
-conn = sqlite3.connect('events.db')
-c = conn.cursor()
-c.execute('''
-    CREATE TABLE IF NOT EXISTS events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        date TEXT NOT NULL,
-        time TEXT NOT NULL,
-        location TEXT NOT NULL,
-        status TEXT NOT NULL,
-        description TEXT
-    )
-''')
-c.execute('''
-    CREATE TABLE IF NOT EXISTS attendees (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        event_id INTEGER NOT NULL,
-        name TEXT NOT NULL,
-        email TEXT,
-        status TEXT,
-        face_landmarks TEXT,
-        FOREIGN KEY(event_id) REFERENCES events(id) ON DELETE CASCADE
-    )
-''')
-c.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL UNIQUE,
-        email TEXT NOT NULL,
-        password_hash TEXT NOT NULL
-    )
-''')
-conn.commit()
-conn.close()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import migrations
+
+# Tables, columns and indexes are defined by the versioned migrations in backend/migrations.py
+migrations.migrate('events.db')
 print("Database and required tables created successfully!")
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from utils import attendance
+from utils.attendance import AttendanceWriter
+
+
+class AttendanceWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = os.path.join(self.tmpdir.name, 'event_management.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE attendees (id INTEGER PRIMARY KEY, event_id INTEGER, name TEXT, status TEXT, role TEXT, previous_attendance_rate REAL)')
+        conn.execute("INSERT INTO attendees (event_id, name, status) VALUES (1, 'Ana', 'Registered')")
+        conn.commit()
+        conn.close()
+
+    def rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('SELECT event_id, name, status FROM attendees ORDER BY id').fetchall()
+        conn.close()
+        return rows
+
+    def test_schema_is_prepared_once_and_idempotent(self):
+        AttendanceWriter(self.db_path).close()
+        AttendanceWriter(self.db_path).close()
+        conn = sqlite3.connect(self.db_path)
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(attendees)')}
+        plan = ' '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN SELECT 1 FROM attendees WHERE event_id = 1 AND name = ?', ('Ana',)))
+        conn.close()
+        self.assertIn('timestamp', columns)
+        self.assertIn('idx_attendees_event_name', plan)
+
+    def test_repeated_check_ins_upsert(self):
+        writer = AttendanceWriter(self.db_path)
+        self.addCleanup(writer.close)
+        for _ in range(3):
+            writer.record(1, 'Ana', 'checked_in_face')
+            writer.record(1, 'Ben', 'checked_in_motion')
+        writer.record(2, 'Ana', 'checked_in_face')
+        self.assertTrue(writer.flush(timeout=5))
+        writer.record(1, 'Ben', 'checked_in_face')
+        writer.record(None, None, 'Checked In', attendee_id=1)
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(self.rows(), [(1, 'Ana', 'Checked In'), (1, 'Ben', 'checked_in_face'), (2, 'Ana', 'checked_in_face')])
+
+    def test_burst_is_written_in_one_transaction(self):
+        writer = AttendanceWriter(self.db_path, flush_interval=1)
+        self.addCleanup(writer.close)
+        commits = []
+        original = attendance._write
+        attendance._write = lambda conn, batch: commits.append(len(batch)) or original(conn, batch)
+        self.addCleanup(setattr, attendance, '_write', original)
+        threads = [threading.Thread(target=writer.record, args=(1, f'guest{i}', 'checked_in_face')) for i in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.flush(timeout=5)
+        self.assertEqual(commits, [50])
+        self.assertEqual(len(self.rows()), 51)
+
+    def test_close_writes_what_is_queued(self):
+        writer = AttendanceWriter(self.db_path, flush_interval=10)
+        writer.record(1, 'Cy', 'checked_in_face')
+        writer.close()
+        writer.close()
+        self.assertIn((1, 'Cy', 'checked_in_face'), self.rows())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import cv2
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from utils.capture import CaptureEngine, MotionDetector, crop, wait_for_detection
+
+
+def write_video(path, frames=60, fps=30, size=(640, 480)):
+    """Write a video with a white square that appears from frame 30 onwards."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for i in range(frames):
+        frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        if i >= 30:
+            frame[100:300, 200:400] = 255
+        writer.write(frame)
+    writer.release()
+
+
+class RecordingDetector:
+    def __init__(self):
+        self.shapes = []
+        self.closed = False
+
+    def __call__(self, frame):
+        self.shapes.append(frame.shape)
+        return len(self.shapes)
+
+    def close(self):
+        self.closed = True
+
+
+class TestCaptureEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.video = os.path.join(cls.tmpdir, 'door.avi')
+        write_video(cls.video)
+        if not cv2.VideoCapture(cls.video).isOpened():
+            raise unittest.SkipTest('OpenCV cannot read back MJPG video here')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def test_video_file_is_sampled_at_the_detection_fps(self):
+        detector = RecordingDetector()
+        delivered = []
+        engine = CaptureEngine(detector, source=self.video, fps=5, on_result=delivered.append).start()
+        engine.join(timeout=30)
+        self.assertIsNone(engine.error)
+        self.assertEqual(engine.stats['frames_read'], 60)
+        self.assertEqual(engine.stats['frames_detected'], 10)  # every 6th frame of a 30 fps file
+        self.assertEqual([r.frame_index for r in delivered], list(range(0, 60, 6)))
+        self.assertEqual(engine.results.qsize(), 10)
+        self.assertTrue(detector.closed)
+
+    def test_frames_are_cropped_to_roi_and_downscaled(self):
+        detector = RecordingDetector()
+        engine = CaptureEngine(detector, source=self.video, fps=30, roi=(0.25, 0.0, 0.75, 1.0), max_side=240).start()
+        engine.join(timeout=30)
+        self.assertEqual(detector.shapes[0], (240, 160, 3))
+
+    def test_motion_detector_finds_the_square(self):
+        detector = MotionDetector()
+        engine = CaptureEngine(detector, source=self.video, fps=5).start()
+        engine.join(timeout=30)
+        first = engine.results.get_nowait()
+        self.assertEqual(first.frame_index, 30)
+        self.assertEqual(len(first.result), 1)
+
+    def test_wait_for_detection_returns_first_result(self):
+        self.assertIsNotNone(wait_for_detection(MotionDetector(), source=self.video, fps=5, timeout=30))
+        self.assertIsNone(wait_for_detection(lambda frame: None, source=self.video, fps=5, timeout=30))
+
+    def test_missing_source_is_reported(self):
+        engine = CaptureEngine(RecordingDetector(), source=os.path.join(self.tmpdir, 'missing.avi')).start()
+        engine.join(timeout=5)
+        self.assertIsInstance(engine.error, IOError)
+        self.assertFalse(engine.running)
+
+
+class TestCrop(unittest.TestCase):
+    def test_crop_uses_fractions(self):
+        frame = np.zeros((100, 200, 3), dtype=np.uint8)
+        self.assertEqual(crop(frame, (0.5, 0.5, 1.0, 1.0)).shape, (50, 100, 3))
+        self.assertIs(crop(frame, None), frame)
+
+
+if __name__ == '__main__':
+    unittest.main()
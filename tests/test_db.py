@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from flask import Flask
+import db
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pool = db.ConnectionPool(os.path.join(self.tmpdir.name, 'events.db'), maxsize=2)
+        conn = self.pool.connect()
+        conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT)')
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.tmpdir.cleanup()
+
+    def test_connections_are_reused_and_tuned(self):
+        conn = self.pool.connect()
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute('PRAGMA busy_timeout').fetchone()[0], db.BUSY_TIMEOUT * 1000)
+        conn.close()
+        conn.close()  # closing twice must not put it in the pool twice
+        self.assertIs(self.pool.connect(), conn)
+        self.assertEqual(len(self.pool._idle), 0)
+
+    def test_uncommitted_work_is_rolled_back_on_release(self):
+        conn = self.pool.connect()
+        conn.execute("INSERT INTO events (title) VALUES ('lost')")
+        conn.close()
+        conn = self.pool.connect()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM events').fetchone()[0], 0)
+        conn.close()
+
+    def test_pool_size_is_bounded_and_usable_across_threads(self):
+        conns = [self.pool.connect() for _ in range(4)]
+        for conn in conns:
+            conn.close()
+        self.assertEqual(len(self.pool._idle), 2)
+        results = []
+        def worker():
+            conn = self.pool.connect()
+            results.append(conn.execute('SELECT COUNT(*) FROM events').fetchone()[0])
+            conn.close()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [0])
+
+    def test_app_context_teardown_returns_forgotten_connections(self):
+        app = Flask(__name__)
+        db.init_app(app)
+        with app.app_context():
+            leaked = self.pool.connect()
+            returned = self.pool.connect()
+            returned.close()
+            reused = self.pool.connect()  # same connection under a new checkout
+            self.assertIs(reused, returned)
+            reused.close()
+            self.assertIs(self.pool.connect(), returned)
+        self.assertFalse(leaked._checked_out)
+        self.assertFalse(returned._checked_out)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import sys
+import os
+import io
+import sqlite3
+import tempfile
+import zipfile
+from types import SimpleNamespace
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from werkzeug.datastructures import FileStorage, MultiDict
+from utils import enrollment, face_index, face_templates
+
+
+class RecordingExtractor:
+    """Extractor that enrolls every photo whose bytes are b'face' and reports no_face otherwise."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, photos):
+        self.batches.append([filename for filename, _ in photos])
+        template = face_templates.encode(np.zeros((face_templates.LANDMARKS, 3), dtype=np.float32))
+        return [('enrolled', None, template) if data == b'face' else ('no_face', 'No face detected', None) for _, data in photos]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class EnrollmentTestCase(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('CREATE TABLE attendees (id INTEGER PRIMARY KEY, event_id INTEGER, email TEXT, face_encoding BLOB, face_landmarks TEXT)')
+        self.conn.executemany('INSERT INTO attendees (id, event_id, email, face_landmarks) VALUES (?, ?, ?, ?)', [
+            (1, 5, 'Ada@Example.com', '[]'), (2, 5, 'bob@example.com', None), (3, 6, 'other@example.com', None),
+        ])
+        self.conn.commit()
+        self.addCleanup(face_index.drop)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_report_and_single_write(self):
+        photos = [('1.jpg', b'face'), ('BOB@example.com.png', b'blank'), ('3.jpg', b'face'),
+                  ('ada@example.com.jpg', b'face'), ('notes.jpg', b'face')]
+        extractor = RecordingExtractor()
+        report = enrollment.enroll(self.conn, 5, photos, extractor=extractor)
+        statuses = [(entry['filename'], entry['attendee_id'], entry['status']) for entry in report['photos']]
+        self.assertEqual(statuses, [
+            ('1.jpg', 1, 'enrolled'), ('BOB@example.com.png', 2, 'no_face'), ('3.jpg', None, 'unknown_attendee'),
+            ('ada@example.com.jpg', 1, 'duplicate'), ('notes.jpg', None, 'unknown_attendee'),
+        ])
+        self.assertEqual(report['summary'], {'enrolled': 1, 'no_face': 1, 'unknown_attendee': 2, 'duplicate': 1})
+        self.assertEqual(extractor.batches, [['1.jpg', 'BOB@example.com.png']])
+        row = self.conn.execute('SELECT face_encoding, face_landmarks FROM attendees WHERE id = 1').fetchone()
+        self.assertEqual(face_templates.decode(row['face_encoding']).shape, (face_templates.LANDMARKS, 3))
+        self.assertIsNone(row['face_landmarks'])
+
+    def test_photos_are_extracted_in_windows(self):
+        self.conn.executemany('INSERT INTO attendees (id, event_id) VALUES (?, 5)', [(i,) for i in range(10, 15)])
+        extractor = RecordingExtractor()
+        original, enrollment.WINDOW = enrollment.WINDOW, 2
+        self.addCleanup(setattr, enrollment, 'WINDOW', original)
+        enrollment.enroll(self.conn, 5, ((f'{i}.jpg', b'face') for i in range(10, 15)), extractor=extractor)
+        self.assertEqual([len(batch) for batch in extractor.batches], [2, 2, 1])
+
+    def test_shared_extractor_is_reused_and_closed_once(self):
+        self.assertIs(enrollment.shared_extractor(), enrollment.shared_extractor())
+        extractor = enrollment.TemplateExtractor()
+        self.assertEqual(extractor([('1.jpg', None)])[0][0], 'too_large')  # small batch, no worker processes
+        self.assertIsNone(extractor._executor)
+        extractor.close()
+        extractor.close()
+
+    def test_saved_batch_reads_zip_then_photos(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('people/1.jpg', b'one')
+            zf.writestr('__MACOSX/people/._1.jpg', b'junk')
+            zf.writestr('people/readme.txt', b'text')
+        buffer.seek(0)
+        files = MultiDict([('archive', FileStorage(buffer, filename='batch.zip')),
+                           ('photos', FileStorage(io.BytesIO(b'two'), filename='../2.png')),
+                           ('photos', FileStorage(io.BytesIO(b'three'), filename='a_b@example.com.jpg'))])
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(enrollment.save_batch(files, directory), 3)
+            self.assertEqual(list(enrollment.iter_saved_batch(directory)),
+                             [('1.jpg', b'one'), ('2.png', b'two'), ('a_b@example.com.jpg', b'three')])
+            bad = MultiDict([('archive', FileStorage(io.BytesIO(b'not a zip'), filename='batch.zip'))])
+            with self.assertRaises(zipfile.BadZipFile):
+                enrollment.save_batch(bad, directory)
+
+    def test_saved_batch_job_enrolls_and_removes_the_batch(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        db_path = os.path.join(tmpdir.name, 'events.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE attendees (id INTEGER PRIMARY KEY, event_id INTEGER, email TEXT, face_encoding BLOB, face_landmarks TEXT)')
+        conn.execute("INSERT INTO attendees (id, event_id) VALUES (1, 5)")
+        conn.commit()
+        conn.close()
+
+        def connect():
+            conn = sqlite3.connect(db_path)
+            conn.row_factory = sqlite3.Row
+            return conn
+        batch_dir = os.path.join(tmpdir.name, 'batch')
+        os.mkdir(batch_dir)
+        enrollment.save_batch(MultiDict([('photos', FileStorage(io.BytesIO(b'face'), filename='1.jpg'))]), batch_dir)
+        report = enrollment.enroll_saved_batch(None, connect, 5, batch_dir, extractor=RecordingExtractor())
+        self.assertEqual(report['summary'], {'enrolled': 1})
+        self.assertFalse(os.path.exists(batch_dir))
+        conn = connect()
+        self.assertIsNotNone(conn.execute('SELECT face_encoding FROM attendees WHERE id = 1').fetchone()[0])
+        conn.close()
+
+    def test_assess_quality(self):
+        def face(x0, y0, x1, y1):
+            xs, ys = np.linspace(x0, x1, 468), np.linspace(y0, y1, 468)
+            return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y) for x, y in zip(xs, ys)])
+        sharp = np.random.default_rng(0).integers(0, 255, (400, 400, 3), dtype=np.uint8)
+        flat = np.full((400, 400, 3), 128, dtype=np.uint8)
+        self.assertEqual(enrollment.assess(sharp, None)[0], 'no_face')
+        self.assertEqual(enrollment.assess(sharp, [face(0.1, 0.1, 0.9, 0.9)] * 2)[0], 'multiple_faces')
+        self.assertEqual(enrollment.assess(sharp, [face(0.1, 0.1, 0.2, 0.2)])[0], 'low_quality')
+        self.assertEqual(enrollment.assess(flat, [face(0.1, 0.1, 0.9, 0.9)])[0], 'low_quality')
+        self.assertEqual(enrollment.assess(sharp, [face(0.1, 0.1, 0.9, 0.9)]), ('ok', None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import csv
+import gzip
+import io
+import tempfile
+from flask import Flask, request
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import db
+import exports
+
+
+class ExportsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pool = db.ConnectionPool(os.path.join(self.tmpdir.name, 'events.db'))
+        conn = self.pool.connect()
+        conn.execute('CREATE TABLE attendees (id INTEGER PRIMARY KEY, name TEXT, email TEXT)')
+        conn.executemany('INSERT INTO attendees (name, email) VALUES (?, ?)',
+                         [(f'Name, {i}', f'a{i}@example.com') for i in range(2500)])
+        conn.commit()
+        conn.close()
+        self.app = Flask(__name__)
+        db.init_app(self.app)
+
+        @self.app.route('/export')
+        def export():
+            rows = exports.iter_query(self.pool.connect(), 'SELECT id, name, email FROM attendees ORDER BY id')
+            return exports.csv_response('attendees.csv', ['id', 'name', 'email'], rows,
+                                        compress=exports.wants_gzip(request.args))
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.tmpdir.cleanup()
+
+    def test_iter_csv_yields_bounded_chunks(self):
+        chunks = list(exports.iter_csv(['n'], ([i] for i in range(25)), chunk_rows=10))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b''.join(chunks).decode().split(), ['n'] + [str(i) for i in range(25)])
+
+    def test_streams_rows_from_cursor_and_returns_connection(self):
+        response = self.app.test_client().get('/export')
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertIn('filename=attendees.csv', response.headers['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(rows[0], ['id', 'name', 'email'])
+        self.assertEqual(len(rows), 2501)
+        self.assertEqual(rows[1], ['1', 'Name, 0', 'a0@example.com'])
+        self.assertEqual(len(self.pool._idle), 1)
+
+    def test_gzip_export(self):
+        response = self.app.test_client().get('/export?gzip=1')
+        self.assertEqual(response.mimetype, 'application/gzip')
+        self.assertIn('filename=attendees.csv.gz', response.headers['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(gzip.decompress(response.get_data()).decode('utf-8'))))
+        self.assertEqual(len(rows), 2501)
+        self.assertEqual(rows[-1], ['2500', 'Name, 2499', 'a2499@example.com'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import mock
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import migrations
+from utils import enrollment, face_templates
+from utils import face_checkin
+from utils.face_checkin import check_in_attendees, enroll_photo, load_event_faces
+
+
+class DesktopCheckinTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'event_management.db')
+        self.face = np.random.default_rng(0).random((face_templates.LANDMARKS, 3)).astype(np.float32)
+        # Schema of the desktop app's event_management.db before it was migrated
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, description TEXT,
+                        date TEXT NOT NULL, time TEXT, location TEXT, status TEXT DEFAULT 'Upcoming', attendance INTEGER)''')
+        conn.execute('''CREATE TABLE attendees (id INTEGER PRIMARY KEY AUTOINCREMENT, event_id INTEGER, name TEXT NOT NULL,
+                        email TEXT, status TEXT DEFAULT 'Invited', FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE)''')
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL, password TEXT NOT NULL)')
+        conn.executemany('INSERT INTO attendees (id, event_id, name, status) VALUES (?, ?, ?, ?)',
+                         [(1, 7, 'Ana', 'Registered'), (2, 7, 'Ben', 'checked_in_motion'), (3, 8, 'Cy', 'Registered')])
+        conn.commit()
+        conn.close()
+        migrations.migrate(self.db_path)
+
+        original_path, face_checkin.DB_PATH = face_checkin.DB_PATH, self.db_path
+        self.addCleanup(setattr, face_checkin, 'DB_PATH', original_path)
+
+    def tearDown(self):
+        face_checkin.attendance_writer().close()
+        shutil.rmtree(self.tmpdir)
+
+    def rows(self, sql):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(sql).fetchall()
+        conn.close()
+        return rows
+
+    def enroll(self, attendee_id):
+        path = os.path.join(self.tmpdir, f'{attendee_id}.jpg')
+        with open(path, 'wb') as f:
+            f.write(b'photo')
+        result = ('enrolled', None, face_templates.encode(self.face))
+        with mock.patch.object(enrollment, 'extract_template', return_value=result) as extract:
+            self.assertEqual(enroll_photo(attendee_id, path), ('enrolled', None))
+        extract.assert_called_once_with((f'{attendee_id}.jpg', b'photo'))
+
+    def test_migrated_desktop_database_has_no_faces_until_enrolled(self):
+        index, names = load_event_faces(7)
+        self.assertEqual(len(index), 0)  # the desktop falls back to presence check-in
+        self.assertEqual(names, {1: 'Ana', 2: 'Ben'})
+        # Old desktop statuses carried the method; they now match the web app's status
+        self.assertEqual(self.rows('SELECT status, checkin_method FROM attendees WHERE id = 2'), [('Checked In', 'motion')])
+
+        self.enroll(1)
+        self.enroll(3)
+        index, names = load_event_faces(7)
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.identify(self.face)[0], 1)
+
+    def test_enroll_photo_reports_rejected_photos_without_writing(self):
+        path = os.path.join(self.tmpdir, 'blank.jpg')
+        with open(path, 'wb') as f:
+            f.write(b'blank')
+        with mock.patch.object(enrollment, 'extract_template', return_value=('no_face', 'No face detected', None)):
+            self.assertEqual(enroll_photo(1, path), ('no_face', 'No face detected'))
+        self.assertEqual(self.rows('SELECT face_encoding FROM attendees WHERE id = 1'), [(None,)])
+
+    def test_check_in_attendees_updates_rows_in_place(self):
+        check_in_attendees([1, 2], 'face')
+        face_checkin.attendance_writer().flush()
+        rows = self.rows('SELECT id, status, checkin_method, timestamp FROM attendees ORDER BY id')
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row[1:3] for row in rows], [('Checked In', 'face'), ('Checked In', 'face'), ('Registered', None)])
+        self.assertIsNotNone(rows[0][3])
+        self.assertIsNone(rows[2][3])
+
+    def test_log_attendance_updates_the_users_row(self):
+        face_checkin.log_attendance('Ben', 'face', 7)
+        face_checkin.log_attendance('Ben', 'motion', 7)
+        face_checkin.log_attendance('Dee', 'face', 7)
+        face_checkin.attendance_writer().flush()
+        rows = self.rows('SELECT name, status, checkin_method FROM attendees WHERE event_id = 7 ORDER BY id')
+        self.assertEqual(rows, [('Ana', 'Registered', None), ('Ben', 'Checked In', 'motion'), ('Dee', 'Checked In', 'face')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import sqlite3
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from utils import face_index, face_templates
+from utils.face_index import FaceIndex
+
+
+class FaceIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.faces = {attendee_id: rng.random((face_templates.LANDMARKS, 3)).astype(np.float32) for attendee_id in range(1, 41)}
+
+    def test_identify_matches_closest_face_under_threshold(self):
+        index = FaceIndex()
+        for attendee_id, face in self.faces.items():
+            index.upsert(attendee_id, face)
+        self.assertEqual(len(index), 40)
+        probe = self.faces[17] + 0.005
+        attendee_id, dist = index.identify(probe)
+        self.assertEqual(attendee_id, 17)
+        self.assertAlmostEqual(dist, face_templates.distance(self.faces[17], probe), places=5)
+        self.assertIsNone(index.identify(np.zeros_like(probe)))
+        self.assertIsNone(index.identify(np.zeros((10, 3))))
+
+    def test_identify_many_matches_each_face_in_a_frame_once(self):
+        index = FaceIndex()
+        for attendee_id, face in self.faces.items():
+            index.upsert(attendee_id, face)
+        stranger = np.zeros_like(self.faces[1])
+        probes = [self.faces[9] + 0.002, stranger, self.faces[21], self.faces[9] + 0.004]
+        matches = index.identify_many(probes)
+        self.assertEqual([(probe, attendee_id) for probe, attendee_id, _ in matches], [(2, 21), (0, 9)])
+        self.assertEqual(index.identify_many(np.zeros((2, 10, 3))), [])
+        self.assertEqual(FaceIndex().identify_many(probes), [])
+
+    def test_distances_are_computed_in_blocks(self):
+        index = FaceIndex()
+        for attendee_id, face in self.faces.items():
+            index.upsert(attendee_id, face)
+        probe = self.faces[33] + 0.01
+        _, whole = index.distances(probe)
+        original = face_index.BLOCK_ROWS
+        face_index.BLOCK_ROWS = 7  # 40 templates: five full blocks and a partial one
+        try:
+            ids, blocked = index.distances(probe)
+            matches = index.identify_many([self.faces[40], self.faces[3]])
+        finally:
+            face_index.BLOCK_ROWS = original
+        np.testing.assert_allclose(blocked, whole, rtol=1e-6)
+        self.assertEqual(int(ids[np.argmin(blocked)]), 33)
+        self.assertEqual(sorted(attendee_id for _, attendee_id, _ in matches), [3, 40])
+
+    def test_incremental_updates_keep_matrix_dense(self):
+        index = FaceIndex()
+        for attendee_id, face in self.faces.items():
+            index.upsert(attendee_id, face)
+        index.remove(3)
+        index.remove(3)
+        self.assertEqual(len(index), 39)
+        self.assertNotIn(3, index)
+        self.assertIsNone(index.identify(self.faces[3]))
+        self.assertEqual(index.identify(self.faces[40])[0], 40)  # moved into the freed slot
+        index.upsert(5, self.faces[3])  # attendee 5 retook their photo
+        self.assertEqual(len(index), 39)
+        self.assertEqual(index.identify(self.faces[3])[0], 5)
+        with self.assertRaises(ValueError):
+            index.upsert(99, np.zeros((10, 3)))
+
+    def test_event_index_built_from_database_and_updated(self):
+        conn = sqlite3.connect(':memory:')
+        conn.row_factory = sqlite3.Row
+        conn.execute('CREATE TABLE attendees (id INTEGER PRIMARY KEY, event_id INTEGER, face_encoding BLOB, face_landmarks TEXT)')
+        conn.execute('INSERT INTO attendees (id, event_id, face_encoding) VALUES (1, 7, ?)', (face_templates.encode(self.faces[1]),))
+        conn.execute('INSERT INTO attendees (id, event_id, face_encoding) VALUES (2, 7, ?)', (b'corrupt',))
+        conn.execute('INSERT INTO attendees (id, event_id, face_encoding) VALUES (3, 8, ?)', (face_templates.encode(self.faces[3]),))
+        face_index.drop()
+        self.addCleanup(face_index.drop)
+        index = face_index.get_index(conn, 7)
+        self.assertEqual(len(index), 1)
+        self.assertIs(face_index.get_index(conn, 7), index)
+        face_index.update(7, 4, self.faces[4])
+        self.assertEqual(index.identify(self.faces[4])[0], 4)
+        face_index.remove(7, 1)
+        self.assertIsNone(index.identify(self.faces[1]))
+        face_index.drop(7)
+        self.assertIsNot(face_index.get_index(conn, 7), index)
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
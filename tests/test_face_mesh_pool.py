@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from utils import face_mesh_pool
+from utils.face_mesh_pool import DetectorBusy, FaceMeshPool
+
+
+class FakeFaceMesh:
+    """Stands in for mediapipe's FaceMesh: returns one face whose landmarks are all at 0.5."""
+    created = 0
+
+    def __init__(self):
+        FakeFaceMesh.created += 1
+        self.closed = False
+        self.fail = False
+
+    def process(self, image):
+        if self.fail:
+            raise RuntimeError('graph error')
+        landmark = [SimpleNamespace(x=0.5, y=0.5, z=0.0)] * 468
+        return SimpleNamespace(multi_face_landmarks=[SimpleNamespace(landmark=landmark)] if image.any() else None)
+
+    def close(self):
+        self.closed = True
+
+
+class FaceMeshPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        FakeFaceMesh.created = 0
+        self.pool = FaceMeshPool(size=2, factory=FakeFaceMesh)
+
+    def test_detectors_are_built_once_and_reused(self):
+        self.pool.warm_up()
+        self.assertEqual(FakeFaceMesh.created, 2)
+        image = np.full((32, 32, 3), 255, dtype=np.uint8)
+        for _ in range(5):
+            template = face_mesh_pool.detect_landmarks(image, pool=self.pool)
+        self.assertEqual(template.shape, (468, 3))
+        self.assertEqual(template.dtype, np.float32)
+        self.assertIsNone(face_mesh_pool.detect_landmarks(np.zeros((32, 32, 3), dtype=np.uint8), pool=self.pool))
+        self.assertEqual(FakeFaceMesh.created, 2)
+
+    def test_concurrency_is_bounded(self):
+        release = threading.Event()
+        def hold():
+            with self.pool.acquire():
+                release.wait()
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        with self.assertRaises(DetectorBusy):
+            with self.pool.acquire(timeout=0.05):
+                pass
+        release.set()
+        for thread in threads:
+            thread.join()
+        with self.pool.acquire(timeout=1):
+            pass
+
+    def test_failed_detector_is_discarded(self):
+        with self.pool.acquire() as detector:
+            detector.fail = True
+        with self.assertRaises(RuntimeError):
+            with self.pool.acquire() as same:
+                same.process(np.zeros((4, 4, 3), dtype=np.uint8))
+        self.assertTrue(detector.closed)
+        with self.pool.acquire() as fresh:
+            self.assertIsNot(fresh, detector)
+
+
+if __name__ == '__main__':
+    unittest.main()
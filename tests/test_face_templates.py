@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+import json
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from utils import face_templates
+
+
+class FaceTemplatesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.landmarks = np.random.default_rng(0).random((face_templates.LANDMARKS, 3)).astype(np.float32)
+
+    def test_round_trip_is_zero_copy(self):
+        blob = face_templates.encode(self.landmarks)
+        self.assertEqual(len(blob), face_templates.HEADER.size + self.landmarks.nbytes)
+        decoded = face_templates.decode(blob)
+        np.testing.assert_array_equal(decoded, self.landmarks)
+        self.assertFalse(decoded.flags.owndata)
+        self.assertFalse(decoded.flags.writeable)
+
+    def test_float16_templates(self):
+        blob = face_templates.encode(self.landmarks, dtype=np.float16)
+        self.assertEqual(len(blob), face_templates.HEADER.size + self.landmarks.size * 2)
+        decoded = face_templates.decode(blob)
+        self.assertEqual(decoded.dtype, np.float32)
+        self.assertLess(face_templates.distance(decoded, self.landmarks), 1e-3)
+
+    def test_rejects_bad_blobs(self):
+        blob = face_templates.encode(self.landmarks)
+        for bad in (b'', b'JSON' + blob[4:], blob[:-4]):
+            with self.assertRaises(ValueError):
+                face_templates.decode(bad)
+
+    def test_from_row_prefers_blob_and_falls_back_to_json(self):
+        blob = face_templates.encode(self.landmarks)
+        legacy = json.dumps(self.landmarks.tolist())
+        np.testing.assert_array_equal(face_templates.from_row({'face_encoding': blob, 'face_landmarks': None}), self.landmarks)
+        np.testing.assert_allclose(face_templates.from_row({'face_encoding': None, 'face_landmarks': legacy}), self.landmarks)
+        self.assertIsNone(face_templates.from_row({'face_encoding': None, 'face_landmarks': None}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import migrations
+from ml import forecasts, ml_utils, model_registry
+
+
+class ForecastsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmpdir.name, 'events.db')
+        migrations.migrate(db_path)
+        self.orig = (forecasts.DB_PATH, ml_utils.DB_PATH, ml_utils.MODEL_PATH,
+                     model_registry.MODEL_PATH, model_registry.STALE_PATH)
+        forecasts.DB_PATH = ml_utils.DB_PATH = db_path
+        ml_utils.MODEL_PATH = os.path.join(self.tmpdir.name, 'attendance_model.pkl')
+        model_registry.MODEL_PATH = os.path.join(self.tmpdir.name, 'model.pkl')
+        model_registry.STALE_PATH = os.path.join(self.tmpdir.name, 'model.stale')
+        model_registry._cache.update(mtime=None, bundle=None)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        events = [(f'Event {i}', f'2025-05-{10 + i:02d}', '10:00', ['Hall', 'Lab', 'Rooftop'][i % 3],
+                   'Completed' if i % 2 else 'Upcoming', 10 + 5 * i) for i in range(7)]
+        self.conn.executemany('INSERT INTO events (title, date, time, location, status, attendance) VALUES (?, ?, ?, ?, ?, ?)', events)
+        attendees = [(1 + i % 7, f'a{i}', 'Present' if i % 3 else 'Absent', 'guest', i / 20) for i in range(20)]
+        self.conn.executemany('INSERT INTO attendees (event_id, name, status, role, previous_attendance_rate) VALUES (?, ?, ?, ?, ?)', attendees)
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        (forecasts.DB_PATH, ml_utils.DB_PATH, ml_utils.MODEL_PATH,
+         model_registry.MODEL_PATH, model_registry.STALE_PATH) = self.orig
+        model_registry._cache.update(mtime=None, bundle=None)
+        ml_utils._model_cache.update(key=None, bundle=None)
+        self.tmpdir.cleanup()
+
+    def test_batch_prediction_matches_single_event_prediction(self):
+        bundle = model_registry.refresh_if_stale()
+        model, columns = bundle['model'], bundle['feature_columns']
+        events = [dict(row) for row in self.conn.execute('SELECT date, location, status FROM events')]
+        events.append({'date': '2025-07-01', 'location': 'Nowhere', 'status': 'Upcoming'})  # unseen category
+        self.assertEqual(ml_utils.predict_attendance_batch(events, model, columns),
+                         [ml_utils.predict_attendance(event, model, columns) for event in events])
+
+    def test_refresh_computes_only_missing_or_outdated_forecasts(self):
+        result = forecasts.refresh(batch_size=3)
+        self.assertEqual(result['forecast'], 7)
+        self.assertIsNone(result['classifier_version'])
+        forecast = forecasts.get(self.conn, 2)
+        self.assertEqual(forecast['model_version'], model_registry.current_version())
+        self.assertIsInstance(forecast['predicted_attendance'], int)
+        self.assertIsNone(forecast['attendee_probabilities'])
+        self.assertEqual(forecasts.refresh()['forecast'], 0)
+
+        forecasts.invalidate(self.conn, 2)
+        self.conn.commit()
+        self.assertIsNone(forecasts.get(self.conn, 2))
+        self.assertEqual(forecasts.refresh()['forecast'], 1)
+
+        # Event writes retrain the regressor but only re-forecast the events they touched
+        model_registry.mark_stale()
+        forecasts.invalidate(self.conn, 3, 4)
+        self.conn.commit()
+        result = forecasts.refresh()
+        self.assertEqual((result['forecast'], result['scored']), (2, 0))
+        self.assertNotEqual(result['model_version'], forecast['model_version'])
+        self.assertEqual(forecasts.get(self.conn, 3)['model_version'], result['model_version'])
+        self.assertEqual(forecasts.get(self.conn, 2)['model_version'], forecast['model_version'])
+        # An admin retrain re-forecasts everything made by an older regressor
+        self.assertEqual(forecasts.refresh(full=True)['forecast'], 5)
+
+    def test_refresh_stores_attendee_probabilities_once_classifier_is_trained(self):
+        forecasts.refresh()
+        X, y = ml_utils.extract_ml_data()
+        ml_utils.train_and_evaluate_model(X, y, X, y)
+        # A new classifier rescores attendees without re-forecasting attendance
+        result = forecasts.refresh()
+        self.assertEqual((result['forecast'], result['scored']), (0, 7))
+        self.assertEqual(forecasts.refresh()['scored'], 0)
+        forecast = forecasts.get(self.conn, 1)
+        self.assertEqual(forecast['classifier_version'], ml_utils.model_version())
+        attendee_ids = [row[0] for row in self.conn.execute('SELECT id FROM attendees WHERE event_id = 1')]
+        self.assertEqual(sorted(forecast['attendee_probabilities']), attendee_ids)
+        for p in forecast['attendee_probabilities'].values():
+            self.assertTrue(0.0 <= p <= 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
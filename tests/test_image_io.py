@@ -0,0 +1,40 @@
+import unittest
+import sys
+import os
+import base64
+import io
+import cv2
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from werkzeug.datastructures import FileStorage, ImmutableMultiDict
+from utils import image_io
+
+
+def png_bytes(height, width):
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    img[:, :, 1] = 200
+    return cv2.imencode('.png', img)[1].tobytes()
+
+
+class ImageIOTestCase(unittest.TestCase):
+    def test_upload_is_decoded_in_memory_and_downscaled(self):
+        files = ImmutableMultiDict({'photo': FileStorage(io.BytesIO(png_bytes(3000, 2000)), filename='phone.png')})
+        img = image_io.read_photo(files, ImmutableMultiDict())
+        self.assertEqual(img.shape, (image_io.MAX_IMAGE_SIDE, round(2000 * image_io.MAX_IMAGE_SIDE / 3000), 3))
+        self.assertEqual(int(img[0, 0, 1]), 200)
+
+    def test_webcam_data_url(self):
+        data_url = 'data:image/png;base64,' + base64.b64encode(png_bytes(240, 320)).decode('ascii')
+        files = ImmutableMultiDict({'photo': FileStorage(io.BytesIO(b''), filename='')})
+        img = image_io.read_photo(files, ImmutableMultiDict({'webcam_photo': data_url}))
+        self.assertEqual(img.shape, (240, 320, 3))  # small images are left alone
+
+    def test_invalid_input(self):
+        self.assertIsNone(image_io.decode_bytes(b'not an image'))
+        self.assertIsNone(image_io.decode_data_url('data:image/png;base64,!!!'))
+        self.assertIsNone(image_io.decode_data_url('javascript:alert(1)'))
+        self.assertIsNone(image_io.read_photo(ImmutableMultiDict(), ImmutableMultiDict()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import jobs
+
+
+def wait_for(job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get_job(job_id)
+        if job['status'] in ('finished', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+class JobsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.orig_db = jobs.DB_PATH
+        jobs.DB_PATH = os.path.join(self.tmpdir.name, 'jobs.db')
+        jobs.init_db()
+
+    def tearDown(self):
+        jobs.DB_PATH = self.orig_db
+        self.tmpdir.cleanup()
+
+    def test_job_reports_progress_and_result(self):
+        def work(job, n):
+            job.progress(0.5, 'halfway')
+            return {'total': n * 2}
+        job_id = jobs.submit('demo', work, 21)
+        job = wait_for(job_id)
+        self.assertEqual(job['status'], 'finished')
+        self.assertEqual(job['progress'], 1.0)
+        self.assertEqual(job['message'], 'halfway')
+        self.assertEqual(job['result'], {'total': 42})
+        self.assertEqual(jobs.latest_job('demo', status='finished')['id'], job_id)
+
+    def test_failed_job_records_error(self):
+        def work(job):
+            raise ValueError('Not enough data')
+        job = wait_for(jobs.submit('demo', work))
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['error'], 'Not enough data')
+        self.assertIsNone(jobs.latest_job('demo', status='finished'))
+
+    def test_missing_job(self):
+        self.assertIsNone(jobs.get_job('does-not-exist'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import json
+import queue
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from utils.kiosk import LatestFrame, run_session, same_origin
+
+
+class TestLatestFrame(unittest.TestCase):
+    def test_put_replaces_untaken_frame(self):
+        slot = LatestFrame()
+        slot.put(b'1')
+        slot.put(b'2')
+        slot.put(b'3')
+        self.assertEqual(slot.take(), b'3')
+        self.assertEqual((slot.received, slot.dropped), (3, 2))
+
+    def test_take_returns_none_once_closed(self):
+        slot = LatestFrame()
+        result = []
+        taker = threading.Thread(target=lambda: result.append(slot.take()))
+        taker.start()
+        slot.close()
+        taker.join(timeout=5)
+        self.assertEqual(result, [None])
+
+
+class TestSameOrigin(unittest.TestCase):
+    def test_only_this_sites_origin_is_accepted(self):
+        self.assertTrue(same_origin('http://kiosk.example.com:5000', 'http://kiosk.example.com:5000/'))
+        self.assertTrue(same_origin('HTTP://Kiosk.Example.com', 'http://kiosk.example.com/'))
+        self.assertFalse(same_origin('https://evil.example.net', 'http://kiosk.example.com/'))
+        self.assertFalse(same_origin('http://kiosk.example.com:8080', 'http://kiosk.example.com:5000/'))
+        self.assertFalse(same_origin('https://kiosk.example.com', 'http://kiosk.example.com/'))
+        self.assertFalse(same_origin(None, 'http://kiosk.example.com/'))
+        self.assertFalse(same_origin('null', 'http://kiosk.example.com/'))
+
+
+class TestRunSession(unittest.TestCase):
+    def run_frames(self, frames, recognise):
+        incoming = queue.Queue()
+        for frame in frames:
+            incoming.put(frame)
+        incoming.put(None)
+        sent = []
+        slot = run_session(incoming.get, sent.append, recognise)
+        return slot, [json.loads(message) for message in sent]
+
+    def test_slow_detection_drops_stale_frames_but_sees_the_last(self):
+        release = threading.Event()
+        seen = []
+
+        def recognise(frame):
+            seen.append(frame)
+            release.wait(timeout=5)  # hold the first frame until the rest have arrived
+            return {'status': 'no_face'}
+
+        incoming = queue.Queue()
+        sent = []
+        session = threading.Thread(target=lambda: run_session(incoming.get, sent.append, recognise))
+        session.start()
+        for i in range(20):
+            incoming.put(b'frame%d' % i)
+        while not seen:
+            threading.Event().wait(0.01)
+        incoming.put(None)
+        release.set()
+        session.join(timeout=5)
+        self.assertLess(len(seen), 20)
+        self.assertEqual(seen[-1], b'frame19')
+        self.assertEqual(json.loads(sent[0]), {'status': 'ready'})
+
+    def test_results_are_sent_as_json(self):
+        slot, sent = self.run_frames([b'a'], lambda frame: {'status': 'match', 'name': 'Jane'})
+        self.assertEqual(sent, [{'status': 'ready'}, {'status': 'match', 'name': 'Jane', 'dropped': 0}])
+        self.assertEqual(slot.received, 1)
+
+    def test_recognition_errors_are_reported_and_session_continues(self):
+        def recognise(frame):
+            raise RuntimeError('boom')
+        slot, sent = self.run_frames(['keep-alive', b'a'], recognise)
+        self.assertEqual(sent[1]['status'], 'error')
+        self.assertEqual(slot.received, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
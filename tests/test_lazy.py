@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+import subprocess
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from utils import lazy
+from utils.lazy import LazyModule, lazy_import
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+
+class LazyImportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        with open(os.path.join(self.tmpdir.name, 'lazy_probe_module.py'), 'w') as f:
+            f.write('VALUE = 42\n')
+        sys.path.insert(0, self.tmpdir.name)
+        self.addCleanup(sys.path.remove, self.tmpdir.name)
+        self.addCleanup(sys.modules.pop, 'lazy_probe_module', None)
+
+    def test_module_is_imported_on_first_attribute_access(self):
+        probe = lazy_import('lazy_probe_module')
+        self.assertNotIn('lazy_probe_module', sys.modules)
+        self.assertEqual(probe.VALUE, 42)
+        self.assertIn('lazy_probe_module', sys.modules)
+        probe.VALUE = 7  # attribute writes (e.g. monkeypatching in tests) reach the real module
+        self.assertEqual(sys.modules['lazy_probe_module'].VALUE, 7)
+        report = {row['module']: row for row in lazy.import_report()}
+        self.assertEqual(report['lazy_probe_module']['trigger'], 'attribute access')
+
+    def test_preload_skips_missing_modules(self):
+        self.assertEqual(lazy.preload(('lazy_probe_module', 'no_such_module_here')), ['no_such_module_here'])
+        self.assertIn('lazy_probe_module', sys.modules)
+        self.assertIs(lazy.load(os), os)
+        self.assertIsInstance(lazy_import('lazy_probe_module'), LazyModule)
+
+    def test_importing_the_app_loads_no_heavy_dependency(self):
+        code = ('import sys, app; print("heavy:" + ",".join(m for m in %r if m in sys.modules))' % (lazy.HEAVY_MODULES,))
+        env = dict(os.environ, PRELOAD_MODULES='0', FACE_MESH_WARMUP='0',
+                   EVENTS_DB=os.path.join(self.tmpdir.name, 'events.db'))
+        result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('heavy:\n', result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
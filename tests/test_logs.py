@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import io
+import json
+import logging
+from flask import Flask
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import logs
+
+
+class CountingArg:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'arg'
+
+
+class LogsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        logs.configure(level='INFO', levels={'test_logs.quiet': 'WARNING', 'test_logs.verbose': 'DEBUG'},
+                       json_output=True, stream=self.stream)
+
+    def tearDown(self):
+        for name in ('test_logs.quiet', 'test_logs.verbose'):
+            logging.getLogger(name).setLevel(logging.NOTSET)
+        logs.configure()
+
+    def lines(self):
+        logs.shutdown()  # flushes the queue
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_lines_with_extra_fields(self):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logging.getLogger('test_logs').exception('Failed %s', 'here', extra={'job_id': 'abc'})
+        entry, = self.lines()
+        self.assertEqual(entry['level'], 'ERROR')
+        self.assertEqual(entry['logger'], 'test_logs')
+        self.assertEqual(entry['message'], 'Failed here')
+        self.assertEqual(entry['job_id'], 'abc')
+        self.assertEqual(entry['request_id'], '-')
+        self.assertIn('ZeroDivisionError', entry['exception'])
+
+    def test_per_module_levels_and_free_disabled_debug(self):
+        arg = CountingArg()
+        logging.getLogger('test_logs.quiet').info('dropped %s', arg)
+        logging.getLogger('test_logs.other').debug('dropped %s', arg)
+        logging.getLogger('test_logs.verbose.child').debug('kept %s', 'arg')
+        self.assertEqual([entry['message'] for entry in self.lines()], ['kept arg'])
+        self.assertEqual(arg.formatted, 0)
+
+    def test_sampling(self):
+        log = logging.getLogger('test_logs')
+        for i in range(25):
+            log.info('frame %d', i, extra={'sample_every': 10})
+        entries = self.lines()
+        self.assertEqual([entry['message'] for entry in entries], ['frame 0', 'frame 10', 'frame 20'])
+        self.assertEqual(entries[0]['sampled'], 10)
+        self.assertNotIn('sample_every', entries[0])
+
+    def test_request_ids(self):
+        app = Flask(__name__)
+        logs.init_app(app)
+        logs.configure(level='INFO', json_output=True, stream=self.stream)
+
+        @app.route('/')
+        def index():
+            logging.getLogger('test_logs').info('in request')
+            return 'ok'
+
+        client = app.test_client()
+        response = client.get('/', headers={'X-Request-ID': 'req-1'})
+        self.assertEqual(response.headers['X-Request-ID'], 'req-1')
+        generated = client.get('/').headers['X-Request-ID']
+        self.assertTrue(generated)
+        self.assertEqual([entry['request_id'] for entry in self.lines()], ['req-1', generated])
+
+
+if __name__ == '__main__':
+    unittest.main()
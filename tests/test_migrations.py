@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import migrations
+
+
+class MigrationsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'events.db')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_fresh_database(self):
+        self.assertEqual(migrations.migrate(self.db_path), [m[0] for m in migrations.MIGRATIONS])
+        self.assertEqual(migrations.migrate(self.db_path), [])
+        conn = self.connect()
+        self.assertEqual(migrations.current_version(conn), migrations.MIGRATIONS[-1][0])
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(attendees)')}
+        self.assertTrue({'face_landmarks', 'face_encoding', 'role', 'previous_attendance_rate', 'timestamp', 'checkin_method'} <= columns)
+        plan = ' '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN SELECT * FROM attendees WHERE event_id = ?', (1,)))
+        self.assertIn('USING INDEX idx_attendees_event_', plan)  # event_id or its (event_id, name) prefix
+        plan = ' '.join(row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT 1 FROM events WHERE date = ? AND time = ? AND LOWER(location) = ?', ('2024-01-01', '10:00', 'hall')))
+        self.assertIn('idx_events_date_time_location', plan)
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(forecasts)')}
+        self.assertTrue({'event_id', 'model_version', 'classifier_version', 'predicted_attendance', 'attendee_probabilities'} <= columns)
+
+    def test_existing_database_from_old_scripts(self):
+        conn = self.connect()
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE, email TEXT NOT NULL, password_hash TEXT NOT NULL)')
+        conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, date TEXT, time TEXT, location TEXT, status TEXT, description TEXT, attendance INTEGER)')
+        conn.execute('CREATE TABLE attendees (id INTEGER PRIMARY KEY AUTOINCREMENT, event_id INTEGER, name TEXT, email TEXT, status TEXT, face_landmarks TEXT)')
+        conn.execute("INSERT INTO events (title, date) VALUES ('Kept', '2024-01-01')")
+        conn.commit()
+        migrations.migrate(self.db_path)
+        self.assertEqual(conn.execute('SELECT title FROM events').fetchone()[0], 'Kept')
+        indexes = {row[1] for row in conn.execute('PRAGMA index_list(users)')}
+        self.assertIn('idx_users_email', indexes)
+        self.assertNotIn('idx_users_username', indexes)  # already covered by the UNIQUE constraint
+
+    def test_legacy_database_without_usernames(self):
+        # Schema of the root events.db: users predate the username column
+        conn = self.connect()
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT UNIQUE NOT NULL, password_hash TEXT NOT NULL, is_admin INTEGER DEFAULT 0)')
+        conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, date TEXT, time TEXT, location TEXT, status TEXT, description TEXT, attendance INTEGER)')
+        conn.execute('CREATE TABLE attendees (id INTEGER PRIMARY KEY AUTOINCREMENT, event_id INTEGER, name TEXT, email TEXT, status TEXT, face_landmarks TEXT, role TEXT, previous_attendance_rate REAL)')
+        conn.execute("INSERT INTO users (email, password_hash) VALUES ('a@example.com', 'x')")
+        conn.commit()
+        self.assertEqual(migrations.migrate(self.db_path), [m[0] for m in migrations.MIGRATIONS])
+        self.assertEqual(conn.execute('SELECT email FROM users').fetchone()[0], 'a@example.com')
+        indexes = {row[1] for row in conn.execute('PRAGMA index_list(users)')}
+        self.assertNotIn('idx_users_username', indexes)
+        self.assertIn('timestamp', {row[1] for row in conn.execute('PRAGMA table_info(attendees)')})
+
+    def test_json_face_landmarks_are_converted(self):
+        from utils import face_templates
+        migrations.migrate(self.db_path)
+        conn = self.connect()
+        conn.execute('DELETE FROM schema_migrations WHERE version = 5')
+        landmarks = [[0.25, 0.5, -0.125]] * face_templates.LANDMARKS
+        conn.execute('INSERT INTO attendees (name, face_landmarks) VALUES (?, ?)', ('json', json.dumps(landmarks)))
+        conn.execute('INSERT INTO attendees (name, face_landmarks) VALUES (?, ?)', ('broken', 'not json'))
+        conn.commit()
+        self.assertEqual(migrations.migrate(self.db_path), [5])
+        rows = {row[0]: row[1:] for row in conn.execute('SELECT name, face_landmarks, face_encoding FROM attendees')}
+        self.assertIsNone(rows['json'][0])
+        self.assertEqual(face_templates.decode(rows['json'][1]).tolist(), landmarks)
+        self.assertEqual(rows['json'][1], face_templates.encode(face_templates.from_json(json.dumps(landmarks))))
+        self.assertEqual(rows['broken'], ('not json', None))
+
+
+if __name__ == '__main__':
+    unittest.main()
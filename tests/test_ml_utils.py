@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from ml import ml_utils
+
+
+class AttendanceClassifierTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.orig_paths = (ml_utils.DB_PATH, ml_utils.MODEL_PATH)
+        ml_utils.DB_PATH = os.path.join(self.tmpdir.name, 'events.db')
+        ml_utils.MODEL_PATH = os.path.join(self.tmpdir.name, 'attendance_model.pkl')
+        conn = sqlite3.connect(ml_utils.DB_PATH)
+        conn.execute('''CREATE TABLE events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT, date TEXT, time TEXT, location TEXT, status TEXT,
+            description TEXT, attendance INTEGER
+        )''')
+        conn.execute('''CREATE TABLE attendees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER, name TEXT, email TEXT, status TEXT,
+            face_landmarks TEXT, role TEXT, previous_attendance_rate REAL
+        )''')
+        events = [
+            ('Talk', '2025-05-10', '10:00', 'Hall', 'Completed', 'x', 40),
+            ('Workshop', '2025-05-12', '18:30', 'Lab', 'Completed', 'x', 12),
+            ('Meetup', '2025-06-01', '09:00', 'Rooftop', 'Upcoming', 'x', 0),
+        ]
+        conn.executemany('INSERT INTO events (title, date, time, location, status, description, attendance) VALUES (?, ?, ?, ?, ?, ?, ?)', events)
+        attendees = []
+        for i in range(12):
+            attendees.append((1 + i % 2, f'a{i}', f'a{i}@example.com', 'Present' if i % 3 else 'Absent',
+                              'speaker' if i % 4 == 0 else 'guest', i / 12))
+        attendees.append((3, 'new', 'new@example.com', 'Registered', 'volunteer', None))
+        conn.executemany('INSERT INTO attendees (event_id, name, email, status, role, previous_attendance_rate) VALUES (?, ?, ?, ?, ?, ?)', attendees)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        ml_utils.DB_PATH, ml_utils.MODEL_PATH = self.orig_paths
+        self.tmpdir.cleanup()
+
+    def test_extract_ml_data_returns_raw_feature_frame(self):
+        X, y = ml_utils.extract_ml_data()
+        self.assertEqual(list(X.columns), ml_utils.FEATURE_COLUMNS)
+        self.assertEqual(len(X), 13)
+        self.assertEqual(int(y.sum()), 8)
+        first = X.iloc[0]
+        self.assertEqual(first['day_of_week'], 5)
+        self.assertEqual(first['is_weekend'], 1)
+        self.assertEqual(first['hour'], 10)
+
+    def test_chunked_extraction_matches_single_pass(self):
+        X_full, y_full = ml_utils.extract_ml_data()
+        X_chunked, y_chunked = ml_utils.extract_ml_data(chunksize=5)
+        self.assertEqual(list(y_full), list(y_chunked))
+        for col in ml_utils.FEATURE_COLUMNS:
+            self.assertEqual(X_full[col].tolist(), X_chunked[col].tolist())
+        encoded = ml_utils.build_pipeline().named_steps['encoder'].fit_transform(X_chunked)
+        self.assertTrue(hasattr(encoded, 'tocsr'))
+
+    def test_prediction_reuses_fitted_encoder(self):
+        self.assertIsNone(ml_utils.load_model())
+        with self.assertRaises(RuntimeError):
+            ml_utils.predict_attendance_for_event(3)
+        X, y = ml_utils.extract_ml_data()
+        trained = ml_utils.train_and_evaluate_model(X, y, X, y)
+        self.assertGreaterEqual(trained['accuracy'], 0.0)
+        pipeline = ml_utils.load_model()
+        encoder = pipeline.named_steps['encoder']
+        n_features = encoder.transform(X).shape[1]
+        # A single unseen event must be encoded with the training column layout
+        preds = ml_utils.predict_attendance_for_event(3)
+        self.assertEqual(len(preds), 1)
+        self.assertIn(preds[0][1], (0, 1))
+        single = ml_utils._feature_frame(next(ml_utils.iter_attendee_chunks('WHERE e.id = ?', (3,))))
+        self.assertEqual(encoder.transform(single).shape[1], n_features)
+
+    def test_event_predictions_batch_all_attendees(self):
+        X, y = ml_utils.extract_ml_data()
+        model = ml_utils.train_and_evaluate_model(X, y, X, y)['model']
+        # Chunks of 5 split events across predict_proba calls; each event is still yielded once
+        events = list(ml_utils.iter_event_predictions(model, 'e.id IN (?, ?)', (1, 2), chunksize=5))
+        self.assertEqual([e['event_id'] for e in events], [1, 2])
+        for event in events:
+            self.assertEqual(len(event['attendees']), 6)
+            expected = dict(ml_utils.predict_attendance_for_event(event['event_id']))
+            self.assertEqual({a['attendee_id']: a['prediction'] for a in event['attendees']}, expected)
+            self.assertEqual(event['predicted_present'], sum(expected.values()))
+            self.assertAlmostEqual(event['expected_attendance'], sum(a['probability'] for a in event['attendees']), places=2)
+        self.assertEqual([e['event_id'] for e in ml_utils.iter_event_predictions(model)], [1, 2, 3])
+
+    def test_trained_model_served_from_cache_until_file_changes(self):
+        X, y = ml_utils.extract_ml_data()
+        trained = ml_utils.train_and_evaluate_model(X, y, X, y)
+        self.assertEqual(len(trained['y_pred']), len(y))
+        self.assertEqual(trained['y_score'].shape, (len(y), 2))
+        # The freshly fitted pipeline is served without unpickling it again
+        self.assertIs(ml_utils.load_model(), trained['model'])
+        self.assertEqual(ml_utils.model_version(), trained['version'])
+        # Another worker retraining (new file mtime) invalidates the cache
+        import joblib
+        bundle = joblib.load(ml_utils.MODEL_PATH)
+        bundle['version'] = 'other-worker'
+        joblib.dump(bundle, ml_utils.MODEL_PATH)
+        os.utime(ml_utils.MODEL_PATH, ns=(1, 1))
+        self.assertEqual(ml_utils.model_version(), 'other-worker')
+        self.assertIsNot(ml_utils.load_model(), trained['model'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from ml import forecasts, ml_utils, model_registry
+
+
+class ModelRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.orig_paths = (model_registry.MODEL_PATH, model_registry.STALE_PATH)
+        model_registry.MODEL_PATH = os.path.join(self.tmpdir.name, 'model.pkl')
+        model_registry.STALE_PATH = os.path.join(self.tmpdir.name, 'model.stale')
+        model_registry._cache.update(mtime=None, bundle=None)
+        self.orig_train = ml_utils.train_attendance_model
+        self.train_calls = 0
+        self.during_training = None
+
+        def fake_train():
+            self.train_calls += 1
+            if self.during_training:
+                self.during_training()
+            return {'calls': self.train_calls}, ['location_Hall', 'status_Upcoming']
+        ml_utils.train_attendance_model = fake_train
+        patcher = mock.patch.object(forecasts, 'request_refresh')
+        self.request_refresh = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        ml_utils.train_attendance_model = self.orig_train
+        model_registry.MODEL_PATH, model_registry.STALE_PATH = self.orig_paths
+        model_registry._cache.update(mtime=None, bundle=None)
+        self.tmpdir.cleanup()
+
+    def test_missing_model_is_trained_in_the_background_then_cached(self):
+        # Lookups never train: they queue the forecast refresh, which trains the first model
+        self.assertEqual(model_registry.get_model(), (None, None))
+        self.assertIsNone(model_registry.current_version())
+        self.assertEqual(self.train_calls, 0)
+        self.assertTrue(self.request_refresh.called)
+        model_registry.refresh_if_stale()
+        model, columns = model_registry.get_model()
+        self.assertEqual(model, {'calls': 1})
+        self.assertEqual(columns, ['location_Hall', 'status_Upcoming'])
+        model_registry.get_model()
+        model_registry.refresh_if_stale()
+        self.assertEqual(self.train_calls, 1)
+        self.assertTrue(os.path.exists(model_registry.MODEL_PATH))
+
+    def test_stale_model_is_served_until_background_refresh(self):
+        version = model_registry.refresh_if_stale()['version']
+        model_registry.mark_stale()
+        # Lookups on the request path never retrain
+        model, _ = model_registry.get_model()
+        self.assertEqual(model, {'calls': 1})
+        self.assertEqual(model_registry.current_version(), version)
+        bundle = model_registry.refresh_if_stale()
+        self.assertEqual(bundle['model'], {'calls': 2})
+        self.assertNotEqual(model_registry.current_version(), version)
+        self.assertFalse(model_registry.is_stale())
+        model_registry.refresh_if_stale()
+        model_registry.get_model()
+        self.assertEqual(self.train_calls, 2)
+
+    def test_lookups_do_not_wait_for_training(self):
+        model_registry.refresh_if_stale()
+        served = []
+
+        def lookup():
+            thread = threading.Thread(target=lambda: served.append(model_registry.get_model()[0]))
+            thread.start()
+            thread.join(timeout=5)
+        self.during_training = lookup
+        model_registry.retrain()
+        self.assertEqual(served, [{'calls': 1}])
+        self.assertEqual(model_registry.get_model()[0], {'calls': 2})
+
+    def test_reloads_model_saved_by_another_worker(self):
+        model_registry.refresh_if_stale()
+        model_registry._cache.update(mtime=None, bundle=None)
+        model, _ = model_registry.get_model()
+        self.assertEqual(model, {'calls': 1})
+        self.assertEqual(self.train_calls, 1)
+
+    def test_retrain_returns_new_version(self):
+        first = model_registry.refresh_if_stale()['version']
+        second = model_registry.retrain()
+        self.assertNotEqual(first, second)
+        self.assertEqual(model_registry.current_version(), second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import migrations
+import pagination
+
+
+class KeysetPageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, date TEXT)')
+        # Duplicate and missing dates make sure ties are broken by id
+        dates = ['2024-01-03', '2024-01-01', None, '2024-01-01', '2024-01-02', '2024-01-03', '2024-01-01']
+        self.conn.executemany('INSERT INTO events (title, date) VALUES (?, ?)', [(f'Event {i}', d) for i, d in enumerate(dates)])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def walk(self, sort_order, limit):
+        ids, cursor = [], None
+        while True:
+            rows, cursor = pagination.keyset_page(self.conn, 'SELECT * FROM events WHERE 1=1', [], 'date', sort_order, cursor=cursor, limit=limit)
+            ids.extend(row['id'] for row in rows)
+            if not cursor:
+                return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = [row['id'] for row in self.conn.execute("SELECT id FROM events ORDER BY COALESCE(date, ''), id")]
+        for limit in (1, 2, 3, 7, 50):
+            self.assertEqual(self.walk('asc', limit), expected)
+            self.assertEqual(self.walk('desc', limit), expected[::-1])
+
+    def test_filters_and_last_page(self):
+        rows, cursor = pagination.keyset_page(self.conn, 'SELECT * FROM events WHERE 1=1 AND date = ?', ['2024-01-01'], 'date', limit=3)
+        self.assertEqual([row['id'] for row in rows], [2, 4, 7])
+        self.assertIsNone(cursor)
+
+    def test_every_event_sort_column_pages_through_an_index(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'events.db')
+            migrations.migrate(db_path)
+            conn = sqlite3.connect(db_path)
+            conn.row_factory = sqlite3.Row
+            statements = []
+            conn.set_trace_callback(statements.append)
+            for sort_by in ('date', 'title', 'location', 'status'):
+                for sort_order in ('asc', 'desc'):
+                    cursor = pagination.encode_cursor('m', 1)
+                    pagination.keyset_page(conn, 'SELECT * FROM events WHERE 1=1', [], sort_by, sort_order, cursor=cursor)
+                    plan = ' '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + statements[-1]))
+                    self.assertIn(f'idx_events_{sort_by}_key', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+            conn.close()
+
+    def test_bad_cursor_and_page_size(self):
+        self.assertIsNone(pagination.decode_cursor('not a cursor'))
+        self.assertEqual(pagination.decode_cursor(pagination.encode_cursor('2024-01-01', 5)), ('2024-01-01', 5))
+        self.assertEqual(pagination.page_size('abc'), pagination.PAGE_SIZE)
+        self.assertEqual(pagination.page_size('100000'), pagination.MAX_PAGE_SIZE)
+        self.assertEqual(pagination.page_size('0'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
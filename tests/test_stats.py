@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import sqlite3
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import stats
+from cache import TTLCache
+
+
+class TTLCacheTestCase(unittest.TestCase):
+    def test_hits_misses_and_expiry(self):
+        cache = TTLCache(ttl=0.05, maxsize=2)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_lru_eviction_and_invalidation(self):
+        cache = TTLCache(ttl=60, maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        cache.invalidate('a')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), 3)
+
+
+class EventStatsTestCase(unittest.TestCase):
+    def setUp(self):
+        stats.invalidate()
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY)')
+        self.conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, date TEXT, status TEXT)')
+        self.conn.executemany('INSERT INTO users (id) VALUES (?)', [(1,), (2,)])
+        self.conn.executemany('INSERT INTO events (date, status) VALUES (date(?), ?)', [
+            ('now', 'Upcoming'), ('2020-01-01', 'Completed'), ('2020-01-02', 'Completed'),
+            ('2020-01-03', 'Cancelled'), ('2030-01-01', 'Pending Approval'),
+        ])
+
+    def tearDown(self):
+        stats.invalidate()
+        self.conn.close()
+
+    def test_counts_and_cache_invalidation(self):
+        result = stats.event_stats(self.conn)
+        self.assertEqual(result, {
+            'total': 5, 'today': 1, 'upcoming': 1, 'in_progress': 0, 'completed': 2,
+            'cancelled': 1, 'pending_approval': 1, 'total_users': 2,
+        })
+        self.conn.execute("INSERT INTO events (date, status) VALUES ('2030-01-02', 'Upcoming')")
+        self.assertEqual(stats.event_stats(self.conn)['total'], 5)
+        stats.invalidate()
+        self.assertEqual(stats.event_stats(self.conn)['upcoming'], 2)
+
+    def test_empty_table(self):
+        self.conn.execute('DELETE FROM events')
+        self.assertEqual(stats.event_stats(self.conn)['completed'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
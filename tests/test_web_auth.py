@@ -1,8 +1,15 @@
 import unittest
 import sys
 import os
+import tempfile
 import sqlite3
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+# Import the app against a throwaway database: its startup migrations must not touch backend/events.db
+_db_dir = tempfile.TemporaryDirectory()
+os.environ.setdefault('EVENTS_DB', os.path.join(_db_dir.name, 'events.db'))
+import app as app_module
+import db
+import migrations
 from app import app, get_db_connection
 from werkzeug.security import generate_password_hash
 
@@ -13,39 +20,26 @@ class WebAuthTestCase(unittest.TestCase):
         self.app.config['TESTING'] = True
         self.app.config['WTF_CSRF_ENABLED'] = False
         self.client = self.app.test_client()
-        # Use a test DB
-        self.db_path = 'backend/events_test.db'
-        self.app.config['DATABASE'] = self.db_path
+        # Each test gets its own migrated database, served through the app's pool
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'events.db')
+        migrations.migrate(self.db_path)
+        self.orig_db = (app_module.DATABASE, app_module.db_pool)
+        app_module.DATABASE = self.db_path
+        app_module.db_pool = db.ConnectionPool(self.db_path)
+        app_module.user_cache.invalidate()
         conn = get_db_connection()
-        # Create users table
-        conn.execute('''CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            is_admin INTEGER DEFAULT 0
-        )''')
-        # Create events table (minimal columns for dashboard)
-        conn.execute('''CREATE TABLE IF NOT EXISTS events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT,
-            date TEXT,
-            time TEXT,
-            location TEXT,
-            status TEXT,
-            description TEXT,
-            attendance INTEGER
-        )''')
         # Insert a test user
-        conn.execute('INSERT OR IGNORE INTO users (username, email, password_hash, is_admin) VALUES (?, ?, ?, ?)',
+        conn.execute('INSERT INTO users (username, email, password_hash, is_admin) VALUES (?, ?, ?, ?)',
                      ('testuser', 'test@example.com', generate_password_hash('TestPass123!'), 0))
         conn.commit()
         conn.close()
 
     def tearDown(self):
-        import os
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+        app_module.db_pool.close_all()
+        app_module.DATABASE, app_module.db_pool = self.orig_db
+        app_module.user_cache.invalidate()
+        self.tmpdir.cleanup()
 
     def test_register(self):
         response = self.client.post('/register', data={
@@ -90,5 +84,27 @@ class WebAuthTestCase(unittest.TestCase):
             b'Logged out successfully' in response.data or b'Login' in response.data
         )
 
+    def test_user_loader_cache_invalidated_by_admin_action(self):
+        from app import User, user_cache
+        conn = get_db_connection()
+        conn.execute('INSERT INTO users (username, email, password_hash, is_admin) VALUES (?, ?, ?, ?)',
+                     ('cacheadmin', 'cacheadmin@example.com', generate_password_hash('AdminPass123!'), 1))
+        conn.commit()
+        admin_id = conn.execute('SELECT id FROM users WHERE email = ?', ('cacheadmin@example.com',)).fetchone()['id']
+        user_id = conn.execute('SELECT id FROM users WHERE email = ?', ('test@example.com',)).fetchone()['id']
+        conn.close()
+        hits = user_cache.stats()['hits']
+        self.assertFalse(User.get(user_id).is_admin)
+        self.assertFalse(User.get(user_id).is_admin)
+        self.assertEqual(user_cache.stats()['hits'], hits + 1)
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(admin_id)
+        for action, expected in (('promote', True), ('demote', False)):
+            self.client.post('/admin/user_action', data={'user_id': user_id, 'action': action})
+            self.assertEqual(bool(User.get(user_id).is_admin), expected)
+        response = self.client.get('/admin/cache_stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_rate', response.get_json()['users'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,11 @@
 import unittest
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+# Import the app against a throwaway database: its startup migrations must not touch backend/events.db
+_db_dir = tempfile.TemporaryDirectory()
+os.environ.setdefault('EVENTS_DB', os.path.join(_db_dir.name, 'events.db'))
 from app import app, get_db_connection
 from werkzeug.security import generate_password_hash
 
@@ -88,6 +92,30 @@ class WebEventTestCase(unittest.TestCase):
         }, follow_redirects=True)
         self.assertTrue(b'Event updated successfully' in response.data or b'Dashboard' in response.data)
 
+    def test_batch_prediction_validates_request(self):
+        conn = get_db_connection()
+        user_id = conn.execute('SELECT id FROM users WHERE username = ?', ('testuser',)).fetchone()['id']
+        conn.close()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+        response = self.client.post('/api/predict_attendance', json={})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/predict_attendance', json={'event_ids': ['1']})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/predict_attendance', json={'start': '2025-13-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_upload_too_large_is_json(self):
+        conn = get_db_connection()
+        user_id = conn.execute('SELECT id FROM users WHERE username = ?', ('testuser',)).fetchone()['id']
+        conn.close()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+        response = self.client.post('/api/predict_attendance', data=b'x' * (self.app.config['MAX_CONTENT_LENGTH'] + 1),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('too large', response.get_json()['error'])
+
     def test_delete_event(self):
         # Add event first
         conn = get_db_connection()